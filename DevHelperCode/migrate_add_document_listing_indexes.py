@@ -0,0 +1,28 @@
+import sqlite3
+
+db_path = "db/database.sqlite"  # Adjust if your path is different
+
+# Indexes declared in app/models.py that create_all() won't add to existing tables
+INDEXES = {
+    "ix_documents_uploaded_by_upload_time_id":
+        "CREATE INDEX ix_documents_uploaded_by_upload_time_id ON documents (uploaded_by, upload_time, id);",
+    "ix_visualizations_document_type_id":
+        "CREATE INDEX ix_visualizations_document_type_id ON visualizations (document_id, type, id);",
+}
+
+conn = sqlite3.connect(db_path)
+cursor = conn.cursor()
+
+cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index';")
+existing = {row[0] for row in cursor.fetchall()}
+
+for name, ddl in INDEXES.items():
+    if name in existing:
+        print(f"Index {name} already exists.")
+        continue
+    print(f"Creating index {name}...")
+    cursor.execute(ddl)
+    conn.commit()
+    print("Index created.")
+
+conn.close()
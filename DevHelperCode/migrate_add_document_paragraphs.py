@@ -0,0 +1,28 @@
+import sqlite3
+
+db_path = "db/database.sqlite"  # Adjust if your path is different
+
+# Paragraph versions used for incremental re-parsing (app/services/cv_versions.py)
+conn = sqlite3.connect(db_path)
+cursor = conn.cursor()
+
+cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'document_paragraphs';")
+if cursor.fetchone():
+    print("Table document_paragraphs already exists.")
+else:
+    print("Creating table document_paragraphs...")
+    cursor.execute("""
+        CREATE TABLE document_paragraphs (
+            id INTEGER NOT NULL PRIMARY KEY,
+            document_id INTEGER NOT NULL REFERENCES documents (id),
+            position INTEGER NOT NULL,
+            hash VARCHAR(16) NOT NULL,
+            text TEXT NOT NULL
+        );
+    """)
+    cursor.execute("CREATE INDEX ix_document_paragraphs_document_id_position ON document_paragraphs (document_id, position);")
+    cursor.execute("CREATE INDEX ix_document_paragraphs_hash ON document_paragraphs (hash);")
+    conn.commit()
+    print("Table created.")
+
+conn.close()
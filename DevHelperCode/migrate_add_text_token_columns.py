@@ -0,0 +1,21 @@
+import sqlite3
+
+db_path = "db/database.sqlite"  # Adjust if your path is different
+
+conn = sqlite3.connect(db_path)
+cursor = conn.cursor()
+
+# Estimated tokens before / after text compaction (app/services/text_compaction.py)
+cursor.execute("PRAGMA table_info(documents);")
+columns = [row[1] for row in cursor.fetchall()]
+
+for column in ("text_tokens_raw", "text_tokens_sent"):
+    if column not in columns:
+        print(f"Adding '{column}' column to documents...")
+        cursor.execute(f"ALTER TABLE documents ADD COLUMN {column} INTEGER;")
+        conn.commit()
+        print("Column added.")
+    else:
+        print(f"Column '{column}' already exists.")
+
+conn.close()
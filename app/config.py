@@ -8,3 +8,22 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
 # Convenience object
 ACCESS_TOKEN_EXPIRE_DELTA = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# Authenticated-principal cache (keyed by token jti)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10_000))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+
+# Token revocation store: SQLite by default, or a redis:// URL (needs the `redis` package)
+REVOCATION_STORE_URL = os.getenv("REVOCATION_STORE_URL", "")
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", 5))
+REVOCATION_PRUNE_SECONDS = float(os.getenv("REVOCATION_PRUNE_SECONDS", 300))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100_000))
+
+# Password hashing: bcrypt runs in a dedicated process pool (0 workers = request threadpool)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_REHASH_ON_LOGIN = os.getenv("PASSWORD_REHASH_ON_LOGIN", "true").lower() in ("1", "true", "yes")
+
+# Admin endpoints (traces, profiles) require this value in the X-Admin-Token header;
+# left empty, they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
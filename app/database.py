@@ -1,8 +1,9 @@
+import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 # Path to your existing SQLite database file
-SQLALCHEMY_DATABASE_URL = "sqlite:///db/database.sqlite"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///db/database.sqlite")
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
@@ -1,5 +1,6 @@
 # app/main.py
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,13 +8,34 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.routes.upload import router as upload_router
 from app.routes.edit   import router as edit_router
 from app.routes.auth   import router as auth_router
+from app.routes.metrics import router as metrics_router
+from app.routes.admin  import router as admin_router
+from app.security import passwords, token_store
+from app.services import parse_cv, profile_documents
+from app.utils import llm_accounting, tracing
+from app.utils.profiling import ProfileRequestMiddleware
 
 import logging #to silence bcrypt version‐check noise
 
 # silence passlib’s missing‐__about__ warning
 logging.getLogger("passlib.handlers.bcrypt").setLevel(logging.ERROR)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # periodic revoked-token prune + Bloom filter resync
+    token_store.start_background_jobs()
+    passwords.start_pool()
+    tracing.ensure_table()
+    parse_cv.ensure_schema()
+    llm_accounting.ensure_table()
+    profile_documents.ensure_table()
+    yield
+    passwords.shutdown_pool()
+    token_store.stop_background_jobs()
+    tracing.flush()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # 1) Apply CORS (before mounting anything else)
 app.add_middleware(
@@ -24,10 +46,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in profiling: admins send X-Profile: 1 (plus X-Admin-Token) to profile one request
+app.add_middleware(ProfileRequestMiddleware)
+
 # 2) Include your API routers
 app.include_router(upload_router)
 app.include_router(edit_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 # 3) Serve timeline images under /static
 app.mount(
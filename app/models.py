@@ -1,5 +1,5 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float, Text, Date
+from sqlalchemy import Column, Integer, String, Enum, ForeignKey, DateTime, Float, Text, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from db.session import Base
@@ -32,11 +32,34 @@ class Document(Base):
 
     llm_prompt = Column(Text, nullable=True)       
     llm_response = Column(Text, nullable=True)     
+    # estimated tokens of the extracted CV text, and of the text actually sent after compaction / diffing
+    text_tokens_raw = Column(Integer, nullable=True)
+    text_tokens_sent = Column(Integer, nullable=True)
 
     extracted_fields = relationship("ExtractedField", back_populates="document")
     visualizations = relationship("Visualization", back_populates="document")
     person = relationship("Person", back_populates="document", uselist=False)
 
+    # keyset pagination of a user's documents: WHERE uploaded_by = ? ORDER BY upload_time, id
+    __table_args__ = (
+        Index("ix_documents_uploaded_by_upload_time_id", "uploaded_by", "upload_time", "id"),
+    )
+
+
+class DocumentParagraph(Base):
+    """Extracted paragraphs of a document, hashed so a revised CV can be diffed against its previous version."""
+    __tablename__ = 'document_paragraphs'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False)
+    position = Column(Integer, nullable=False)
+    hash = Column(String(16), nullable=False)       # blake2b-64 of the whitespace-normalised text
+    text = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_document_paragraphs_document_id_position", "document_id", "position"),
+        Index("ix_document_paragraphs_hash", "hash"),
+    )
 
 
 class ExtractedField(Base):
@@ -65,6 +88,65 @@ class Visualization(Base):
     document = relationship("Document", back_populates="visualizations")
     cluster = relationship("Cluster", back_populates="visualizations")
 
+    # latest artifact of each type per document
+    __table_args__ = (
+        Index("ix_visualizations_document_type_id", "document_id", "type", "id"),
+    )
+
+
+class RevokedToken(Base):
+    __tablename__ = 'revoked_tokens'
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(Float, nullable=False, index=True)  # token exp, unix seconds
+
+
+class PipelineSpan(Base):
+    __tablename__ = 'pipeline_spans'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, nullable=False, index=True)
+    trace_id = Column(String(16), nullable=False)
+    span_id = Column(Integer, nullable=False)
+    parent_id = Column(Integer, nullable=True)      # span_id of the parent, NULL for the root
+    name = Column(String, nullable=False)
+    start = Column(Float, nullable=False)           # unix seconds
+    duration_ms = Column(Float, nullable=False)
+    rows = Column(Integer, nullable=True)
+    bytes = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+
+    # slowest spans of a stage since a point in time
+    __table_args__ = (
+        Index("ix_pipeline_spans_name_start", "name", "start"),
+    )
+
+
+class LLMCall(Base):
+    """One LLM call (or cache hit instead of one) made for a document; see app.utils.llm_accounting."""
+    __tablename__ = 'llm_calls'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    model = Column(String, nullable=True)           # NULL for cache hits
+    tier = Column(String, nullable=True)            # model_router tier
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=True)         # NULL if the model has no price in LLM_PRICES
+    latency_ms = Column(Float, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    hedged = Column(Integer, default=0)             # a duplicate request was sent
+    cache = Column(String, nullable=True)           # cache that answered instead of the LLM
+    estimated = Column(Integer, default=0)          # token counts are local estimates
+    error = Column(String, nullable=True)
+    shared_by = Column(Integer, nullable=False, default=1)  # documents of a packed request
+
+    # cost / latency reports over a time range
+    __table_args__ = (
+        Index("ix_llm_calls_created_at", "created_at"),
+    )
+
 
 # --- CV Data Models ---
 
@@ -80,6 +162,9 @@ class Person(Base):
     website = Column(String, nullable=True)
     short_bio = Column(Text, nullable=True)
     password_hash = Column(String, nullable=True)
+    # the account the person belongs to: the uploader's user id (like Document.uploaded_by),
+    # or the person's own id once they registered
+    created_by = Column(String, nullable=True, index=True)
 
 
     document_id = Column(Integer, ForeignKey('documents.id'))
@@ -98,6 +183,16 @@ class Person(Base):
 
 
 
+class ProfileDocument(Base):
+    """Denormalized JSON of a Person with all CV sections (the API's Person schema); see app.services.profile_documents."""
+    __tablename__ = 'profile_documents'
+
+    person_id = Column(Integer, ForeignKey('persons.id'), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)    # bumped whenever the body changes
+    body = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class Experience(Base):
     __tablename__ = 'experiences'
 
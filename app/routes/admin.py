@@ -0,0 +1,165 @@
+# app/routes/admin.py
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import Document, LLMCall, PipelineSpan
+from app.schemas import LLMCallOut, LLMUsage, ProfileFile, TraceSpan
+from app.security.admin import require_admin
+from app.utils import profiling
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/traces/slowest", response_model=List[TraceSpan])
+def slowest_traces(
+    stage: str = "full_pipeline",
+    since: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    """
+    Slowest recorded spans of `stage` (default: whole pipeline runs) started
+    after `since` (default: the last 24 hours). Served by ix_pipeline_spans_name_start.
+    """
+    if since is None:
+        since = datetime.utcnow() - timedelta(days=1)
+    rows = (
+        db.query(PipelineSpan)
+        .filter(PipelineSpan.name == stage, PipelineSpan.start >= _unix(since))
+        .order_by(PipelineSpan.duration_ms.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        TraceSpan(
+            document_id=s.document_id,
+            trace_id=s.trace_id,
+            name=s.name,
+            start=datetime.utcfromtimestamp(s.start),
+            duration_ms=s.duration_ms,
+            rows=s.rows,
+            bytes=s.bytes,
+            error=s.error,
+        )
+        for s in rows
+    ]
+
+
+@router.get("/llm-usage", response_model=List[LLMUsage])
+def llm_usage(
+    group_by: Literal["day", "user", "tier", "model"] = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    LLM tokens, cost and latency per day, uploading user, model tier or model,
+    for calls recorded between `since` (default: 30 days ago) and `until`.
+    Each document of a packed request holds its share of the tokens and
+    1/shared_by of the request, so `calls` counts requests actually sent and
+    the latency average weights each request once. Latencies are of LLM calls
+    only, cache hits are counted separately.
+    """
+    if since is None:
+        since = datetime.utcnow() - timedelta(days=30)
+    keys = {
+        "day": func.date(LLMCall.created_at),
+        "user": Document.uploaded_by,
+        "tier": LLMCall.tier,
+        "model": LLMCall.model,
+    }
+    key = keys[group_by].label("key")
+    is_call = LLMCall.cache.is_(None)
+    # a packed request is stored once per document it served
+    weight = 1.0 / LLMCall.shared_by
+    query = (
+        db.query(
+            key,
+            func.coalesce(func.sum(case((is_call, weight))), 0).label("calls"),
+            func.count(LLMCall.cache).label("cache_hits"),
+            func.count(func.distinct(LLMCall.document_id)).label("documents"),
+            func.coalesce(func.sum(LLMCall.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(LLMCall.completion_tokens), 0).label("completion_tokens"),
+            func.coalesce(func.sum(LLMCall.cost_usd), 0).label("cost_usd"),
+            func.coalesce(func.sum(case((is_call & LLMCall.cost_usd.is_(None), weight))), 0).label("unpriced_calls"),
+            (func.sum(case((is_call, LLMCall.latency_ms * weight)))
+             / func.sum(case((is_call, weight)))).label("avg_latency_ms"),
+            func.max(case((is_call, LLMCall.latency_ms))).label("max_latency_ms"),
+            func.coalesce(func.sum(LLMCall.retries), 0).label("retries"),
+            func.count(LLMCall.error).label("errors"),
+        )
+        .filter(LLMCall.created_at >= since)
+    )
+    if until is not None:
+        query = query.filter(LLMCall.created_at < until)
+    if group_by == "user":
+        query = query.join(Document, Document.id == LLMCall.document_id)
+    rows = query.group_by(key).order_by(key).all()
+    return [
+        LLMUsage(**{
+            **row._asdict(),
+            "key": None if row.key is None else str(row.key),
+            "calls": round(row.calls, 2),
+            "unpriced_calls": round(row.unpriced_calls, 2),
+            "cost_usd": round(row.cost_usd, 6),
+            "avg_latency_ms": None if row.avg_latency_ms is None else round(row.avg_latency_ms, 1),
+        })
+        for row in rows
+    ]
+
+
+@router.get("/documents/{document_id}/llm-calls", response_model=List[LLMCallOut])
+def document_llm_calls(document_id: int, db: Session = Depends(get_db)):
+    """Every recorded LLM call (and cache hit) of one document, oldest first."""
+    calls = db.query(LLMCall).filter(LLMCall.document_id == document_id).order_by(LLMCall.id).all()
+    return [
+        LLMCallOut(
+            id=c.id,
+            created_at=c.created_at,
+            model=c.model,
+            tier=c.tier,
+            prompt_tokens=c.prompt_tokens,
+            completion_tokens=c.completion_tokens,
+            cost_usd=c.cost_usd,
+            latency_ms=c.latency_ms,
+            retries=c.retries,
+            hedged=bool(c.hedged),
+            cache=c.cache,
+            estimated=bool(c.estimated),
+            error=c.error,
+            shared_by=c.shared_by,
+        )
+        for c in calls
+    ]
+
+
+def _unix(ts: datetime) -> float:
+    # naive datetimes are UTC, like the rest of the API
+    if ts.tzinfo is None:
+        return (ts - datetime(1970, 1, 1)).total_seconds()
+    return ts.timestamp()
+
+
+@router.get("/profiles", response_model=List[ProfileFile])
+def list_profiles():
+    """
+    Stored request / pipeline profiles, newest first.
+    """
+    return [
+        ProfileFile(name=e.name, size=e.stat().st_size, created_at=datetime.utcfromtimestamp(e.stat().st_mtime))
+        for e in profiling.list_profiles()
+    ]
+
+
+@router.get("/profiles/{name}")
+def download_profile(name: str):
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
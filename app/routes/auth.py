@@ -1,38 +1,35 @@
 # app/routes/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app.utils.audit_logger import logger
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app import models
 from app.schemas import (
     RegisterInputStrict,
     RegisterResponse,
+    ChangePasswordInput,
     Person as PersonResponse,
     PersonEditable,
     Person
 )
 from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_DELTA
 from app.security.token_store import is_token_revoked, revoke_token
+from app.security import principal_cache
+from app.security.principal_cache import Principal
+from app.security.passwords import hash_password_async, verify_and_update_async
+from app.services.profile_documents import load_person, parse_fields, rebuild_profile
+from app.utils.profiling import ProfiledRoute
 import uuid
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
-
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-
 def create_access_token(data: dict, expires_delta: timedelta) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
@@ -40,75 +37,149 @@ def create_access_token(data: dict, expires_delta: timedelta) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.Person:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Resolve the bearer token to a lightweight (id, email) principal.
+    Repeat requests with the same token are served from principal_cache
+    without jwt.decode or a database round trip.
+    """
+    try:
+        jti = jwt.get_unverified_claims(token).get("jti")
+    except JWTError:
+        raise _credentials_exception()
+    if jti is None or is_token_revoked(jti):
+        raise _credentials_exception()
+
+    cached = principal_cache.get_cached(jti, token)
+    if cached is not None:
+        return cached[1]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        jti: str = payload.get("jti")
-        sub: str = payload.get("sub")
-        if jti is None or sub is None or is_token_revoked(jti):
-            raise credentials_exception
+    except JWTError:
+        raise _credentials_exception()
+    sub: str = payload.get("sub")
+    if payload.get("jti") != jti or sub is None:
+        raise _credentials_exception()
+
+    db = SessionLocal()
+    try:
+        row = db.query(models.Person.id, models.Person.email).filter(models.Person.email == sub).first()
+    finally:
+        db.close()
+    if row is None:
+        raise _credentials_exception()
 
-        user = db.query(models.Person).filter(models.Person.email == sub).first()
-        if user is None:
-            raise credentials_exception
+    principal = Principal(id=row.id, email=row.email)
+    principal_cache.cache_principal(jti, token, payload, principal)
+    return principal
 
-        return user
 
-    except JWTError:
-        raise credentials_exception
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> models.Person:
+    """Full ORM Person for routes that read or modify the profile."""
+    user = db.get(models.Person, principal.id)
+    if user is None:
+        principal_cache.invalidate_user(principal.id)
+        raise _credentials_exception()
+    return user
 
 
 # --- Routes ---
 
+# The password routes are async so bcrypt can be awaited on the hashing pool.
+# Their DB work runs in the threadpool on short-lived sessions: holding a
+# pooled connection across that await would block the event loop once the
+# connection pool runs dry.
+
+def _find_credentials(email: str):
+    db = SessionLocal()
+    try:
+        return db.query(
+            models.Person.id, models.Person.email, models.Person.password_hash
+        ).filter(models.Person.email == email).first()
+    finally:
+        db.close()
+
+
+def _store_password_hash(user_id: int, password_hash: str):
+    db = SessionLocal()
+    try:
+        db.query(models.Person).filter(models.Person.id == user_id).update(
+            {models.Person.password_hash: password_hash}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _create_user(fields: dict, password_hash: str) -> int:
+    db = SessionLocal()
+    try:
+        user = models.Person(**fields)
+        user.password_hash = password_hash
+        db.add(user)
+        db.flush()
+        user.created_by = str(user.id)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
 @router.post("/register", response_model=RegisterResponse, operation_id="register_user")
-def register(input: RegisterInputStrict, db: Session = Depends(get_db)):
+async def register(input: RegisterInputStrict):
     normalized_email = input.user.email.lower().strip()
     password = input.password
     logger.info(f"🔐 Registration attempt for {normalized_email}")
 
-    existing = db.query(models.Person).filter(models.Person.email == normalized_email).first()
+    existing = await run_in_threadpool(_find_credentials, normalized_email)
     if existing:
         logger.warning(f"❌ Email already registered: {normalized_email}")
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = hash_password(password)
-    user = models.Person(**{**input.user.model_dump(), "email": normalized_email})
-    user.password_hash = hashed_pw
-
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    hashed_pw = await hash_password_async(password)
+    user_id = await run_in_threadpool(
+        _create_user, {**input.user.model_dump(), "email": normalized_email}, hashed_pw
+    )
 
     access_token = create_access_token(
-        data={"sub": user.email},
+        data={"sub": normalized_email},
         expires_delta=ACCESS_TOKEN_EXPIRE_DELTA
     )
-    logger.info(f"✅ Registration successful: {user.id}")
-    return {"message": "Registration successful", "user_id": user.id, "access_token": access_token}
+    logger.info(f"✅ Registration successful: {user_id}")
+    return {"message": "Registration successful", "user_id": user_id, "access_token": access_token}
 
 
 @router.post("/login")
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
-):
+async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     email = form_data.username.lower().strip()
     password = form_data.password
     logger.info(f"🔐 Login attempt for {email}")
 
-    user = db.query(models.Person).filter(models.Person.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
+    user = await run_in_threadpool(_find_credentials, email)
+    verified, new_hash = False, None
+    if user and user.password_hash:
+        verified, new_hash = await verify_and_update_async(password, user.password_hash)
+    if not verified:
         logger.warning(f"❌ Login failed for {email}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if new_hash:
+        # stored hash used an outdated cost factor
+        await run_in_threadpool(_store_password_hash, user.id, new_hash)
+        logger.info(f"🔑 Password rehashed for ID {user.id}")
+
     access_token = create_access_token(
         data={"sub": user.email},
         expires_delta=ACCESS_TOKEN_EXPIRE_DELTA
@@ -117,9 +188,25 @@ def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.get("/me", response_model=Person)
-def read_users_me(current_user: models.Person = Depends(get_current_user)):
-    return current_user
+@router.get("/me", response_model=Person, response_model_exclude_unset=True)
+def read_users_me(
+    fields: Optional[str] = Query(None, description="sections to include, e.g. experiences,languages (default: all)"),
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    The current user's profile. With `fields`, only those sections are loaded
+    and returned; the person's own columns always are.
+    """
+    try:
+        sections = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    user = load_person(db, principal.id, sections)
+    if user is None:
+        principal_cache.invalidate_user(principal.id)
+        raise _credentials_exception()
+    return user
 
 
 @router.put("/me", response_model=PersonResponse, operation_id="update_me")
@@ -130,20 +217,43 @@ def update_me(
 ):
     for field, value in updates.model_dump(exclude_unset=True).items():
         setattr(current_user, field, value)
+    rebuild_profile(db, current_user.id)
     db.commit()
     db.refresh(current_user)
+    principal_cache.invalidate_user(current_user.id)
     logger.info(f"✅ User ID {current_user.id} successfully updated")
     return current_user
 
 
+@router.put("/me/password", operation_id="change_password")
+async def change_password(
+    input: ChangePasswordInput,
+    current_user: Principal = Depends(get_current_principal)
+):
+    user = await run_in_threadpool(_find_credentials, current_user.email)
+    verified = False
+    if user and user.password_hash:
+        verified, _ = await verify_and_update_async(input.current_password, user.password_hash)
+    if not verified:
+        logger.warning(f"❌ Password change rejected for user ID {current_user.id}")
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+
+    new_hash = await hash_password_async(input.new_password)
+    await run_in_threadpool(_store_password_hash, current_user.id, new_hash)
+    principal_cache.invalidate_user(current_user.id)
+    logger.info(f"🔑 Password changed for user ID {current_user.id}")
+    return {"detail": "Password changed successfully"}
+
+
 @router.post("/logout")
 def logout(
-    current_user: models.Person = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     token: str = Depends(oauth2_scheme)
 ):
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    jti = payload.get("jti")
+    claims = jwt.get_unverified_claims(token)
+    jti = claims.get("jti")
     if jti:
-        revoke_token(jti)
+        revoke_token(jti, expires_at=claims.get("exp"))
+        principal_cache.invalidate_token(jti)
         logger.info(f"🔒 Token revoked for user ID {current_user.id}")
     return {"detail": "Logged out successfully"}
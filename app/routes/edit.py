@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models, schemas
+from app.routes.auth import get_current_principal
+from app.security import principal_cache
+from app.security.principal_cache import Principal
+from app.services.profile_documents import get_profile, parse_fields, rebuild_profile, trim_profile
+from app.utils.profiling import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.put("/persons/{person_id}", response_model=schemas.Person)
 def update_person(person_id: int, update_data: schemas.PersonEditable, db: Session = Depends(get_db)):
@@ -15,6 +22,50 @@ def update_person(person_id: int, update_data: schemas.PersonEditable, db: Sessi
     for field, value in update_data.model_dump().items():
         setattr(person, field, value)
 
+    rebuild_profile(db, person.id)
     db.commit()
     db.refresh(person)
+    principal_cache.invalidate_user(person.id)
     return person
+
+
+def _created_by(db: Session, person_id: int, user_id: int) -> bool:
+    """Whether the person belongs to the user's account (see Person.created_by)."""
+    return db.query(
+        db.query(models.Person.id)
+        .filter(models.Person.id == person_id, models.Person.created_by == str(user_id))
+        .exists()
+    ).scalar()
+
+
+@router.get("/persons/{person_id}/profile", response_model=schemas.Person)
+def get_person_profile(
+    person_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description="sections to include, e.g. experiences,languages (default: all)"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    The full profile (person with every CV section) from its stored profile
+    document: one row, returned as stored, or with only the sections named in
+    `fields`. The ETag is the document version (plus the fieldset), so
+    clients can revalidate with If-None-Match.
+
+    Readable by the person themselves and by the account that created them
+    (the uploader of their first CV); to anyone else the person does not exist.
+    """
+    try:
+        sections = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if person_id != current_user.id and not _created_by(db, person_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Person not found")
+    doc = get_profile(db, person_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Person not found")
+    etag = f'W/"{person_id}-{doc.version}"' if fields is None else f'W/"{person_id}-{doc.version};{",".join(sections)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=trim_profile(doc.body, sections), media_type="application/json", headers=headers)
@@ -0,0 +1,13 @@
+# app/routes/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (per-process values)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
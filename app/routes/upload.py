@@ -1,7 +1,11 @@
 # app/routes/upload.py
 
 import os
-from typing import Generator
+import base64
+import binascii
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Generator, List, Optional
 from fastapi import (
     APIRouter,
     Depends,
@@ -11,23 +15,43 @@ from fastapi import (
     HTTPException,
     status,
     Request,
+    Query,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, and_, cast, func, or_, select
+from sqlalchemy.orm import Session, aliased
 
 from db.session import SessionLocal
 from app.models import Document, Person, Visualization
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_principal
+from app.security.principal_cache import Principal
+from app.schemas import (
+    ArtifactSummary,
+    DocumentOverview,
+    DocumentPage,
+    DocumentSummary,
+    ImportResult,
+    PersonSummary,
+)
 from app.services.parse_cv import parse_and_store
+from app.services.profile_import import IMPORT_MAX_PROFILES, Profile, read_profiles, render, store_profiles
 from app.services.generate_pdf import generate_cv_pdf
 from app.services.plot_timeline_vertical import plot_timeline_and_save
-from app.utils.audit_logger import logger
+from app.utils.audit_logger import logger, log_context
+from app.utils.metrics import track_stage
+from app.utils.tracing import annotate, trace
+from app.utils import profiling
+from app.utils.profiling import ProfiledRoute
 
-router = APIRouter(prefix="/documents", tags=["documents"])
+router = APIRouter(prefix="/documents", tags=["documents"], route_class=ProfiledRoute)
 
 # where uploaded files go
 UPLOAD_DIR = os.path.abspath(os.path.join(os.getcwd(), "static", "uploads"))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DOCUMENT_STATUSES = ("pending", "parsed", "complete", "error")
+
 
 def get_db() -> Generator[Session, None, None]:
     """
@@ -40,55 +64,113 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def visualization_url(file_path: str) -> str:
+    """
+    Map a stored Visualization.file_path to the URL it is served under.
+    """
+    fp = file_path.replace("\\", "/")
+    if fp.startswith("static/"):
+        # served under /static
+        return f"/{fp}"
+    # PDFs are served under /pdfs
+    return f"/pdfs/{os.path.basename(fp)}"
+
+
+def encode_cursor(upload_time: datetime | None, doc_id: int) -> str:
+    raw = f"{upload_time.isoformat() if upload_time else ''}|{doc_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, doc_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return (datetime.fromisoformat(ts) if ts else None), int(doc_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def latest_artifacts(db: Session, doc_ids: list[int]) -> dict[int, list[ArtifactSummary]]:
+    """
+    Return the newest Visualization of each type for every given document,
+    grouped by document id. Served by ix_visualizations_document_type_id.
+    """
+    if not doc_ids:
+        return {}
+    newest = (
+        db.query(func.max(Visualization.id))
+        .filter(Visualization.document_id.in_(doc_ids))
+        .group_by(Visualization.document_id, Visualization.type)
+    )
+    grouped: dict[int, list[ArtifactSummary]] = {}
+    for v in db.query(Visualization).filter(Visualization.id.in_(newest)).order_by(Visualization.id):
+        grouped.setdefault(v.document_id, []).append(ArtifactSummary(
+            id=v.id,
+            type=v.type,
+            url=visualization_url(v.file_path),
+            created_at=v.created_at,
+        ))
+    return grouped
+
+
 def full_pipeline(
     document_id: int,
     fallback_email: str,
-    user_id: str
+    user_id: str,
+    profile: bool = False,
 ):
     """
     Background task: parse the CV, then generate PDF & timeline,
-    then mark the document as complete.
+    then mark the document as complete. With `profile`, the whole run
+    is written to the profiles directory.
     """
-    # 1) parse + create/update Person
-    try:
-        person_id = parse_and_store(document_id, fallback_email)
-    except ValueError as e:
-        logger.error(f"⚠️ full_pipeline aborted for doc {document_id}: {e}")
-        return
-
-    if not person_id:
-        logger.error(f"⚠️ full_pipeline: no person for doc {document_id}")
-        return
-
-    # 2) generate PDF
-    generate_cv_pdf(
-        person_id=person_id,
-        user_id=user_id,
-        document_id=document_id
-    )
-    # 3) plot timeline
-    plot_timeline_and_save(
-        person_id=person_id,
-        document_id=document_id
+    profiler = (
+        profiling.profile(profiling.new_profile_id(f"pipeline_doc_{document_id}"))
+        if profile else nullcontext()
     )
+    with profiler, log_context(document_id=document_id), trace(document_id), track_stage("full_pipeline"):
+        # 1) parse + create/update Person
+        try:
+            person_id = parse_and_store(document_id, fallback_email)
+        except ValueError as e:
+            logger.error(f"⚠️ full_pipeline aborted for doc {document_id}: {e}")
+            annotate(error=str(e))
+            return
 
-    # 4) finally, mark the document as complete
-    db2 = SessionLocal()
-    try:
-        doc = db2.get(Document, document_id)
-        if doc:
-            doc.status = "complete"
-            db2.commit()
-            logger.info(f"✅ Document {document_id} marked complete")
-    finally:
-        db2.close()
+        if not person_id:
+            logger.error(f"⚠️ full_pipeline: no person for doc {document_id}")
+            annotate(error="no person")
+            return
+
+        # 2) generate PDF
+        generate_cv_pdf(
+            person_id=person_id,
+            user_id=user_id,
+            document_id=document_id
+        )
+        # 3) plot timeline
+        plot_timeline_and_save(
+            person_id=person_id,
+            document_id=document_id
+        )
+
+        # 4) finally, mark the document as complete
+        db2 = SessionLocal()
+        try:
+            doc = db2.get(Document, document_id)
+            if doc:
+                doc.status = "complete"
+                db2.commit()
+                logger.info(f"✅ Document {document_id} marked complete")
+        finally:
+            db2.close()
 
 
 @router.post("/upload", status_code=status.HTTP_201_CREATED)
 def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    current_user: Person = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -113,21 +195,116 @@ def upload_document(
     db.commit()
     db.refresh(doc)
 
-    # schedule the background task with fallback_email & user_id
+    # schedule the background task with fallback_email & user_id;
+    # a profiled upload request also profiles its pipeline run
     background_tasks.add_task(
         full_pipeline,
         doc.id,
         current_user.email,
         str(current_user.id),
+        profile=profiling.requested_profile.get() is not None,
     )
 
     return {"document_id": doc.id, "status": doc.status}
 
 
+@router.post("/import", status_code=status.HTTP_201_CREATED, response_model=ImportResult)
+def import_profiles(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    render_artifacts: bool = Query(True, alias="render"),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """
+    Import JSON Resume files (one resume or an array each) and LinkedIn data
+    export archives without the LLM; see app.services.profile_import.
+    Profiles are stored before the response, PDF & timeline are rendered in
+    the background. The uploader's email only stands in for a missing one
+    when a single profile is imported, so a batch never merges people, and a
+    profile whose email belongs to another account fails instead of being
+    merged into that account's person.
+    """
+    profiles: list[Profile] = []
+    for file in files:
+        try:
+            profiles += read_profiles(file.filename, file.file.read())
+        except ValueError as e:
+            profiles.append(Profile(file.filename, "", error=str(e)))
+    if len(profiles) > IMPORT_MAX_PROFILES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{len(profiles)} profiles, at most {IMPORT_MAX_PROFILES} per request",
+        )
+
+    fallback_email = current_user.email if len(profiles) == 1 else None
+    with track_stage("import_profiles") as sp:
+        entries = store_profiles(profiles, str(current_user.id), fallback_email)
+        sp.rows = len(entries)
+    if render_artifacts:
+        background_tasks.add_task(render, entries, str(current_user.id))
+
+    imported = sum(e["status"] == "done" for e in entries)
+    logger.info(f"📥 User {current_user.id} imported {imported} of {len(entries)} profiles")
+    return ImportResult(imported=imported, failed=len(entries) - imported, profiles=entries)
+
+
+@router.get("", response_model=DocumentPage)
+def list_documents(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[List[str]] = Query(None, alias="status"),
+    include_artifacts: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    List the current user's documents, newest first.
+    Keyset-paginated on (upload_time, id): pass back `next_cursor` to get the next page.
+    """
+    q = db.query(
+        Document.id, Document.title, Document.status, Document.upload_time
+    ).filter(Document.uploaded_by == str(current_user.id))
+
+    if status_filter:
+        unknown = set(status_filter) - set(DOCUMENT_STATUSES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown status: {', '.join(sorted(unknown))}")
+        q = q.filter(Document.status.in_(status_filter))
+
+    if cursor:
+        after_time, after_id = decode_cursor(cursor)
+        if after_time is None:
+            q = q.filter(Document.upload_time.is_(None), Document.id < after_id)
+        else:
+            q = q.filter(or_(
+                Document.upload_time < after_time,
+                and_(Document.upload_time == after_time, Document.id < after_id),
+                Document.upload_time.is_(None),
+            ))
+
+    rows = q.order_by(Document.upload_time.desc(), Document.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    artifacts = latest_artifacts(db, [r.id for r in rows]) if include_artifacts else {}
+    items = [
+        DocumentSummary(
+            id=r.id,
+            title=r.title,
+            status=r.status,
+            upload_time=r.upload_time,
+            artifacts=artifacts.get(r.id, []) if include_artifacts else None,
+        )
+        for r in rows
+    ]
+    next_cursor = encode_cursor(rows[-1].upload_time, rows[-1].id) if has_more else None
+    return DocumentPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/{doc_id}")
 def get_document_status(
     doc_id: int,
-    current_user: Person = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -139,11 +316,73 @@ def get_document_status(
     return {"document_id": doc.id, "status": doc.status}
 
 
+@router.get("/{doc_id}/overview", response_model=DocumentOverview)
+def get_document_overview(
+    doc_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db),
+):
+    """
+    Everything the dashboard needs in one round trip: document status,
+    the latest artifact of each type and the owner's person summary.
+    Runs as a single query (one row per artifact type).
+    """
+    newest_viz = aliased(Visualization)
+    newest_ids = (
+        select(func.max(newest_viz.id))
+        .where(newest_viz.document_id == doc_id)
+        .group_by(newest_viz.type)
+    )
+    rows = (
+        db.query(
+            Document.id, Document.title, Document.status, Document.upload_time,
+            Person.id.label("person_id"), Person.full_name, Person.email, Person.short_bio,
+            Visualization.id.label("viz_id"), Visualization.type, Visualization.file_path,
+            Visualization.created_at,
+        )
+        .outerjoin(Person, Person.id == cast(Document.uploaded_by, Integer))
+        .outerjoin(Visualization, and_(
+            Visualization.document_id == Document.id,
+            Visualization.id.in_(newest_ids),
+        ))
+        .filter(Document.id == doc_id, Document.uploaded_by == str(current_user.id))
+        .order_by(Visualization.id)
+        .all()
+    )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    first = rows[0]
+    return DocumentOverview(
+        document=DocumentSummary(
+            id=first.id,
+            title=first.title,
+            status=first.status,
+            upload_time=first.upload_time,
+        ),
+        artifacts=[
+            ArtifactSummary(
+                id=r.viz_id,
+                type=r.type,
+                url=visualization_url(r.file_path),
+                created_at=r.created_at,
+            )
+            for r in rows if r.viz_id is not None
+        ],
+        person=PersonSummary(
+            id=first.person_id,
+            full_name=first.full_name,
+            email=first.email,
+            short_bio=first.short_bio,
+        ) if first.person_id is not None else None,
+    )
+
+
 @router.post("/{doc_id}/generate_pdf")
 def regenerate_pdf(
     doc_id: int,
     background_tasks: BackgroundTasks,
-    current_user: Person = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -172,7 +411,7 @@ def regenerate_pdf(
 def regenerate_timeline(
     doc_id: int,
     background_tasks: BackgroundTasks,
-    current_user: Person = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -200,7 +439,7 @@ def regenerate_timeline(
 def list_visualizations(
     doc_id: int,
     request: Request,                        # <<-- moved before defaulted deps
-    current_user: Person = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
 ):
     """
@@ -212,17 +451,9 @@ def list_visualizations(
 
     items = []
     for v in db.query(Visualization).filter_by(document_id=doc_id).all():
-        fp = v.file_path.replace("\\", "/")
-        if fp.startswith("static/"):
-            # served under /static
-            url = f"/{fp}"
-        else:
-            # PDFs are served under /pdfs
-            name = os.path.basename(fp)
-            url = f"/pdfs/{name}"
         items.append({
             "id": v.id,
             "type": v.type,
-            "file_path": url
+            "file_path": visualization_url(v.file_path)
         })
     return items
@@ -1,7 +1,7 @@
 #schemas.py
 from pydantic import BaseModel, EmailStr, constr
 from typing import Optional, List, Annotated
-from datetime import date
+from datetime import date, datetime
 
 
 # Define constraints with Annotated
@@ -183,10 +183,112 @@ class RegisterInputStrict(BaseModel):
     user: PersonRegistration
     password: StrongPassword
 
+class ChangePasswordInput(BaseModel):
+    current_password: str
+    new_password: StrongPassword
+
 class RegisterResponse(BaseModel):
     message: str
     user_id: int
     access_token: Optional[str] = None
 
 
+# --- Document listing ---
+class ArtifactSummary(BaseModel):
+    id: int
+    type: str
+    url: str
+    created_at: Optional[datetime]
+
+
+class DocumentSummary(BaseModel):
+    id: int
+    title: Optional[str]
+    status: str
+    upload_time: Optional[datetime]
+    artifacts: Optional[List[ArtifactSummary]] = None
+
+
+class DocumentPage(BaseModel):
+    items: List[DocumentSummary]
+    next_cursor: Optional[str] = None
+
+
+# --- Document overview (dashboard) ---
+class PersonSummary(BaseModel):
+    id: int
+    full_name: Optional[str]
+    email: Optional[str]
+    short_bio: Optional[str]
+
+
+class DocumentOverview(BaseModel):
+    document: DocumentSummary
+    artifacts: List[ArtifactSummary] = []
+    person: Optional[PersonSummary] = None
+
+
+# --- Structured profile import ---
+class ImportedProfile(BaseModel):
+    name: str
+    status: str                 # "done" or "failed"
+    document_id: Optional[int] = None
+    person_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    profiles: List[ImportedProfile]
+
 
+# --- Pipeline traces (admin) ---
+class TraceSpan(BaseModel):
+    document_id: int
+    trace_id: str
+    name: str
+    start: datetime
+    duration_ms: float
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ProfileFile(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+
+# --- LLM usage (admin) ---
+class LLMCallOut(BaseModel):
+    id: int
+    created_at: datetime
+    model: Optional[str]
+    tier: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    cost_usd: Optional[float]
+    latency_ms: float
+    retries: int
+    hedged: bool
+    cache: Optional[str]
+    estimated: bool
+    error: Optional[str]
+    shared_by: int
+
+
+class LLMUsage(BaseModel):
+    key: Optional[str]          # the day, user or tier (None: cache hits have no tier)
+    calls: float                # LLM requests sent, excluding cache hits (packed requests split by document)
+    cache_hits: int
+    documents: int
+    prompt_tokens: int
+    completion_tokens: int
+    cost_usd: float
+    unpriced_calls: float       # calls to models without a price; not in cost_usd
+    avg_latency_ms: Optional[float]
+    max_latency_ms: Optional[float]
+    retries: int
+    errors: int
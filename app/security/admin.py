@@ -0,0 +1,21 @@
+# app/security/admin.py
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.config import ADMIN_TOKEN
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Dependency for operator-only endpoints: the X-Admin-Token header must match ADMIN_TOKEN.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
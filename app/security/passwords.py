@@ -0,0 +1,88 @@
+# app/security/passwords.py
+"""
+bcrypt hashing off the request threadpool.
+
+Each hash/verify burns ~250 ms of CPU, so they run in a dedicated,
+size-limited process pool (PASSWORD_HASH_WORKERS) and the auth handlers
+await them. A login burst then queues on the pool instead of starving
+unrelated requests of threadpool slots.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_REHASH_ON_LOGIN
+from app.utils.audit_logger import logger
+
+# hashes below BCRYPT_ROUNDS are flagged by needs_update() and rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+_pool: ProcessPoolExecutor | None = None
+
+# cost 4, so warming a worker loads the bcrypt backend without burning a full verify
+_WARM_UP_HASH = "$2b$04$0y3BCiMUfXYIgNl/WzHrFOb.ex4z34nvhofgj9smuanjJ37L7gosC"
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+def verify_and_update(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify, and return a fresh hash if the stored one uses an outdated cost factor."""
+    if PASSWORD_REHASH_ON_LOGIN:
+        return pwd_context.verify_and_update(plain, hashed)
+    return pwd_context.verify(plain, hashed), None
+
+
+def start_pool():
+    """Spawn the hashing workers up front so the first login doesn't pay for it."""
+    global _pool
+    if _pool is None and PASSWORD_HASH_WORKERS > 0:
+        # spawn, not fork: the parent runs background threads
+        _pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # one task per worker makes the pool start them all now
+        for _ in range(PASSWORD_HASH_WORKERS):
+            _pool.submit(verify_password, "warm-up", _WARM_UP_HASH).add_done_callback(_check_warm_up)
+    return _pool
+
+
+def _check_warm_up(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"⚠️ Password hashing worker failed to warm up: {future.exception()!r}")
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn, *args):
+    pool = start_pool()
+    if pool is None:
+        return await run_in_threadpool(fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_and_update_async(plain: str, hashed: str) -> tuple[bool, str | None]:
+    return await _run(verify_and_update, plain, hashed)
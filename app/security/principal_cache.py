@@ -0,0 +1,69 @@
+# app/security/principal_cache.py
+"""
+Bounded TTL cache of validated JWT claims and the lightweight principal
+they resolve to, keyed by the token's `jti`. Lets get_current_user skip
+jwt.decode and the Person lookup on repeat requests (e.g. status polls).
+"""
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from app.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+
+
+class Principal(NamedTuple):
+    id: int
+    email: str
+
+
+class _Entry(NamedTuple):
+    token: str
+    claims: dict
+    principal: Principal
+    expires_at: float
+
+
+_entries: "OrderedDict[str, _Entry]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_cached(jti: str, token: str) -> tuple[dict, Principal] | None:
+    """Return (claims, principal) if this exact token was validated recently."""
+    now = time.time()
+    with _lock:
+        entry = _entries.get(jti)
+        if entry is None:
+            return None
+        if entry.expires_at <= now or not hmac.compare_digest(entry.token, token):
+            # expired, or a different token claiming the same jti
+            if entry.expires_at <= now:
+                del _entries[jti]
+            return None
+        _entries.move_to_end(jti)
+        return entry.claims, entry.principal
+
+
+def cache_principal(jti: str, token: str, claims: dict, principal: Principal):
+    expires_at = time.time() + PRINCIPAL_CACHE_TTL_SECONDS
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp)
+    with _lock:
+        _entries[jti] = _Entry(token, claims, principal, expires_at)
+        _entries.move_to_end(jti)
+        while len(_entries) > PRINCIPAL_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def invalidate_token(jti: str):
+    with _lock:
+        _entries.pop(jti, None)
+
+
+def invalidate_user(user_id: int):
+    """Drop every cached token of a user (profile or password change)."""
+    with _lock:
+        for jti in [k for k, e in _entries.items() if e.principal.id == user_id]:
+            del _entries[jti]
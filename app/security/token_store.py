@@ -1,10 +1,178 @@
-revoked_tokens = set()
+# app/security/token_store.py
+"""
+Revoked-token store shared by every worker.
+
+Revoked jtis live in one sorted set scored by the token's `exp`, so
+entries expire with the token and pruning is a single range delete.
+The store speaks a small subset of Redis sorted-set commands: by default
+they are served from the revoked_tokens table (SQLiteSortedSet); set
+REVOCATION_STORE_URL=redis://... to point at Redis or a local stand-in.
+
+Each process keeps a Bloom filter of the live jtis, so the common
+"not revoked" check is answered in memory. The filter is rebuilt from the
+store every REVOCATION_SYNC_SECONDS, which bounds how long a logout on
+one worker takes to reach the others.
+"""
+import threading
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from db.session import engine
+from app.models import RevokedToken
+from app.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_PRUNE_SECONDS,
+    REVOCATION_STORE_URL,
+    REVOCATION_SYNC_SECONDS,
+)
+from app.security.bloom import BloomFilter
+from app.utils.audit_logger import logger
+
+REVOKED_KEY = "revoked_tokens"
+
+
+class SQLiteSortedSet:
+    """
+    The Redis sorted-set commands used by this module, backed by the
+    revoked_tokens table. Only the REVOKED_KEY set is stored, so `name`
+    is accepted for interface compatibility and otherwise ignored.
+    """
+
+    def __init__(self, bind=engine):
+        self.engine = bind
+        RevokedToken.__table__.create(bind, checkfirst=True)
+
+    @staticmethod
+    def _score_range(min, max):
+        clauses = []
+        if float(min) != float("-inf"):
+            clauses.append(RevokedToken.expires_at >= float(min))
+        if float(max) != float("inf"):
+            clauses.append(RevokedToken.expires_at <= float(max))
+        return clauses
+
+    def zadd(self, name: str, mapping: dict) -> int:
+        stmt = sqlite_insert(RevokedToken).values(
+            [{"jti": member, "expires_at": float(score)} for member, score in mapping.items()]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["jti"], set_={"expires_at": stmt.excluded.expires_at}
+        )
+        with self.engine.begin() as conn:
+            return conn.execute(stmt).rowcount
+
+    def zscore(self, name: str, member: str) -> float | None:
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(RevokedToken.expires_at).where(RevokedToken.jti == member)
+            ).scalar()
+
+    def zrangebyscore(self, name: str, min, max) -> list[str]:
+        with self.engine.connect() as conn:
+            return list(conn.execute(
+                select(RevokedToken.jti).where(*self._score_range(min, max))
+            ).scalars())
+
+    def zremrangebyscore(self, name: str, min, max) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(
+                delete(RevokedToken).where(*self._score_range(min, max))
+            ).rowcount
+
+
+def _connect():
+    if REVOCATION_STORE_URL.startswith(("redis://", "rediss://", "unix://")):
+        import redis  # optional dependency, only needed for a shared Redis store
+        return redis.Redis.from_url(REVOCATION_STORE_URL, decode_responses=True)
+    return SQLiteSortedSet()
+
+
+_store = None
+_lock = threading.Lock()
+_bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY)
+_last_sync = 0.0
+_stop = threading.Event()
+_worker: threading.Thread | None = None
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = _connect()
+    return _store
+
+
+def sync_bloom():
+    """Rebuild this process's Bloom filter from the live entries in the store."""
+    global _bloom, _last_sync
+    store = _get_store()
+    with _lock:
+        live = store.zrangebyscore(REVOKED_KEY, time.time(), "+inf")
+        bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, 2 * len(live)))
+        for jti in live:
+            bloom.add(jti)
+        _bloom = bloom
+        _last_sync = time.monotonic()
+
+
+def revoke_token(jti: str, expires_at: float | None = None):
+    """Revoke `jti` until `expires_at` (the token's exp, unix seconds)."""
+    if expires_at is None:
+        expires_at = time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    store = _get_store()
+    with _lock:
+        store.zadd(REVOKED_KEY, {jti: float(expires_at)})
+        _bloom.add(jti)
 
-def revoke_token(jti: str):
-    revoked_tokens.add(jti)
 
 def is_token_revoked(jti: str) -> bool:
-    return jti in revoked_tokens
+    # the background job keeps the filter fresh; resync inline if it isn't running
+    if time.monotonic() - _last_sync > 2 * REVOCATION_SYNC_SECONDS:
+        sync_bloom()
+    if jti not in _bloom:
+        return False
+    score = _get_store().zscore(REVOKED_KEY, jti)
+    return score is not None and float(score) > time.time()
+
+
+def prune_expired() -> int:
+    """Delete entries whose token has expired anyway."""
+    removed = _get_store().zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+    if removed:
+        logger.info(f"🧹 Pruned {removed} expired revoked tokens")
+    return removed
+
+
+def _run_background_jobs():
+    last_prune = time.monotonic()
+    while not _stop.wait(REVOCATION_SYNC_SECONDS):
+        try:
+            if time.monotonic() - last_prune >= REVOCATION_PRUNE_SECONDS:
+                prune_expired()
+                last_prune = time.monotonic()
+            sync_bloom()
+        except Exception as e:
+            logger.error(f"❌ Token store maintenance failed: {e}")
+
+
+def start_background_jobs():
+    """Start the periodic Bloom resync + prune thread (called on app startup)."""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    _stop.clear()
+    prune_expired()
+    sync_bloom()
+    _worker = threading.Thread(target=_run_background_jobs, name="token-store", daemon=True)
+    _worker.start()
 
 
-# Eventually we can swap this to use Redis.
\ No newline at end of file
+def stop_background_jobs():
+    _stop.set()
+    if _worker is not None:
+        _worker.join(timeout=5)
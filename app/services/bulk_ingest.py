@@ -0,0 +1,382 @@
+# app/services/bulk_ingest.py
+"""
+Bulk ingestion of a directory (recursively) or .zip archive of .docx CVs.
+
+    python -m app.services.bulk_ingest /data/client_cvs.zip --uploaded-by 12 --concurrency 16
+
+- text extraction, compaction and the heuristic parse run in a process pool
+  (python-docx is CPU-bound)
+- LLM extraction, for the CVs the heuristic parser cannot read on its own,
+  runs with at most --concurrency calls in flight
+- parsed CVs are upserted --batch-size documents per transaction
+  (one savepoint per document, so a bad CV does not sink its batch)
+- every committed file is appended to a manifest (sha256 per line), so an
+  interrupted run resumes where it stopped and re-running skips duplicates
+- with --pack, short CVs that need a full LLM parse are sent several per
+  request (up to --pack-budget tokens of CV text), which saves the prompt
+  instructions and a round trip per CV; CVs the packed answer does not cover
+  are parsed on their own
+
+Documents end up "parsed"; PDFs and timelines are rendered with --render.
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from db.session import SessionLocal
+from app.models import Document
+from app.utils.audit_logger import logger, log_context
+from app.utils.llm_accounting import LLMCallRecord, collect_llm_calls, ensure_table, llm_call_rows
+from app.utils.metrics import track_stage
+from app.services.llm_cv_parser import extract_styled_paragraphs_from_docx
+from app.services.text_compaction import CompactedText, compact_cv_text
+from app.services.heuristic_parser import HEURISTIC_PARSE, HeuristicResult, parse_cv_heuristically
+from app.services.cv_versions import needs_full_parse, parse_from_scratch, parse_packed, store_paragraphs
+from app.services.model_router import pick_tier
+from app.utils.tracing import trace
+from app.services.generate_pdf import generate_cv_pdf
+from app.services.plot_timeline_vertical import plot_timeline_and_save
+from app.services.parse_cv import ensure_schema, upsert_parsed_data
+
+BULK_UPLOAD_DIR = os.path.abspath(os.path.join(os.getcwd(), "static", "uploads", "bulk"))
+# --pack defaults: CV text per packed request, CVs per request, and the longest CV that is packed
+LLM_PACK_TOKEN_BUDGET = int(os.getenv("LLM_PACK_TOKEN_BUDGET", 3000))
+LLM_PACK_MAX_DOCS = int(os.getenv("LLM_PACK_MAX_DOCS", 4))
+LLM_PACK_MAX_DOC_TOKENS = int(os.getenv("LLM_PACK_MAX_DOC_TOKENS", 1000))
+# how long a started pack waits for more CVs before it is sent anyway
+PACK_WAIT_SECONDS = 0.5
+
+
+@dataclass
+class SourceFile:
+    name: str               # path inside the directory / archive
+    data: bytes
+    sha256: str
+
+
+@dataclass
+class Parsed:
+    source: SourceFile
+    compacted: CompactedText | None = None
+    heuristic: HeuristicResult | None = None
+    data: dict | None = None
+    prompt: str | None = None
+    raw_response: str | None = None
+    tokens_sent: int = 0
+    llm_calls: list[LLMCallRecord] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass
+class Stats:
+    done: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def docs_per_minute(self) -> float:
+        return self.done / max(time.perf_counter() - self.started, 1e-9) * 60
+
+
+def iter_sources(path: str) -> Iterator[tuple[str, callable]]:
+    """(name, read) for every .docx under a directory or inside a .zip archive."""
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        for info in archive.infolist():
+            base = os.path.basename(info.filename)
+            if not info.is_dir() and info.filename.lower().endswith(".docx") and not base.startswith(("~$", ".")):
+                yield info.filename, lambda info=info: archive.read(info)
+        return
+    for root, _, files in os.walk(path):
+        for fn in sorted(files):
+            if fn.lower().endswith(".docx") and not fn.startswith(("~$", ".")):
+                full = os.path.join(root, fn)
+                yield os.path.relpath(full, path), lambda full=full: open(full, "rb").read()
+
+
+class Manifest:
+    """Append-only JSON Lines record of processed files, keyed by sha256."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry.get("status") == "done":
+                        self.done.add(entry["sha256"])
+
+    def record(self, entries: list[dict]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                if entry["status"] == "done":
+                    self.done.add(entry["sha256"])
+
+
+class Packer:
+    """Groups CVs (per model tier) into packed requests; `parse` returns once its CV's pack is parsed."""
+
+    def __init__(self, loop, pool, budget: int, max_docs: int):
+        self.loop, self.pool = loop, pool
+        self.budget, self.max_docs = budget, max_docs
+        self.open: dict[str, list[tuple[Parsed, asyncio.Future]]] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    async def parse(self, item: Parsed):
+        tier = pick_tier(item.compacted.text)
+        group = self.open.get(tier)
+        if group and (len(group) >= self.max_docs
+                      or sum(i.compacted.tokens for i, _ in group) + item.compacted.tokens > self.budget):
+            self.flush(tier)
+        if tier not in self.open:
+            self.open[tier] = []
+            self.loop.call_later(PACK_WAIT_SECONDS, self.flush, tier, self.open[tier])
+        future = self.loop.create_future()
+        self.open[tier].append((item, future))
+        await future
+
+    def flush(self, tier: str, group: list | None = None):
+        """Send the open pack of `tier` (only if it is still `group`, for the timer)."""
+        if tier not in self.open or (group is not None and self.open[tier] is not group):
+            return
+        task = asyncio.create_task(self._send(tier, self.open.pop(tier)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _send(self, tier: str, group: list[tuple[Parsed, asyncio.Future]]):
+        items = {str(n): item.compacted for n, (item, _) in enumerate(group, 1)}
+        try:
+            results, calls = await self.loop.run_in_executor(self.pool, parse_packed, items, tier)
+        except Exception as e:
+            results, calls = {key: e for key in items}, {}
+        for n, (item, future) in enumerate(group, 1):
+            result = results[str(n)]
+            item.llm_calls = calls.get(str(n), [])
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                continue
+            item.data, item.prompt, item.raw_response, item.tokens_sent = result
+            future.set_result(None)
+
+
+def _extract_text(data: bytes) -> tuple[CompactedText, HeuristicResult | None]:
+    # runs in the process pool
+    styled = extract_styled_paragraphs_from_docx(io.BytesIO(data))
+    compacted = compact_cv_text([text for text, _ in styled])
+    return compacted, parse_cv_heuristically(styled) if HEURISTIC_PARSE else None
+
+
+def _parse_alone(item: Parsed):
+    # runs in the LLM thread pool
+    with collect_llm_calls(item.llm_calls):
+        item.data, item.prompt, item.raw_response, item.tokens_sent = parse_from_scratch(
+            item.compacted, item.heuristic
+        )
+
+
+def store_source(source: SourceFile) -> str:
+    """Keep the original file (content-addressed) so the document can be re-parsed later."""
+    path = os.path.join(BULK_UPLOAD_DIR, source.sha256[:2], f"{source.sha256}.docx")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(source.data)
+    return path
+
+
+def write_batch(batch: list[Parsed], uploaded_by: str, fallback_email: str | None) -> list[dict]:
+    """Upsert a batch in one transaction; returns the manifest entries."""
+    entries = []
+    session = SessionLocal()
+    try:
+        for item in batch:
+            entry = {"sha256": item.source.sha256, "name": item.source.name}
+            if item.error:
+                entries.append({**entry, "status": "failed", "error": item.error})
+                continue
+            try:
+                with session.begin_nested():
+                    doc = Document(
+                        title=os.path.basename(item.source.name),
+                        source_filename=store_source(item.source),
+                        uploaded_by=uploaded_by,
+                        status="parsed",
+                        llm_prompt=item.prompt,
+                        llm_response=item.raw_response,
+                        text_tokens_raw=item.compacted.tokens_raw,
+                        text_tokens_sent=item.tokens_sent,
+                    )
+                    session.add(doc)
+                    session.flush()
+                    store_paragraphs(session, doc.id, item.compacted.lines)
+                    session.add_all(llm_call_rows(doc.id, item.llm_calls))
+                    with log_context(document_id=doc.id), trace(doc.id):
+                        person = upsert_parsed_data(session, doc, item.data, fallback_email)
+                    entries.append({**entry, "status": "done", "document_id": doc.id, "person_id": person.id})
+            except Exception as e:
+                logger.error(f"❌ Bulk ingest of {item.source.name} failed: {e}")
+                entries.append({**entry, "status": "failed", "error": f"{type(e).__name__}: {e}"})
+        with track_stage("commit"):
+            session.commit()
+        return entries
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def render(entries: list[dict], uploaded_by: str):
+    session = SessionLocal()
+    try:
+        for entry in entries:
+            if entry["status"] != "done":
+                continue
+            generate_cv_pdf(entry["person_id"], user_id=uploaded_by, document_id=entry["document_id"])
+            plot_timeline_and_save(entry["person_id"], document_id=entry["document_id"])
+            doc = session.get(Document, entry["document_id"])
+            doc.status = "complete"
+        session.commit()
+    finally:
+        session.close()
+
+
+async def ingest(path: str, args, manifest: Manifest) -> Stats:
+    loop = asyncio.get_running_loop()
+    stats = Stats()
+    # spawn: the parent already runs the audit-log and trace-writer threads
+    extract_pool = ProcessPoolExecutor(args.extract_workers, mp_context=multiprocessing.get_context("spawn"))
+    llm_pool = ThreadPoolExecutor(args.concurrency, thread_name_prefix="bulk-llm")
+    db_pool = ThreadPoolExecutor(1, thread_name_prefix="bulk-db")
+    results: asyncio.Queue[Parsed | None] = asyncio.Queue()
+    # bounds how many files are read and in flight at once
+    in_flight = asyncio.Semaphore(args.concurrency * 2 * (args.pack_max_docs if args.pack else 1))
+    packer = Packer(loop, llm_pool, args.pack_budget, args.pack_max_docs) if args.pack else None
+
+    async def process(source: SourceFile):
+        item = Parsed(source)
+        try:
+            item.compacted, item.heuristic = await loop.run_in_executor(extract_pool, _extract_text, source.data)
+            if (packer is not None and needs_full_parse(item.heuristic)
+                    and item.compacted.tokens <= args.pack_max_doc_tokens):
+                await packer.parse(item)
+            else:
+                await loop.run_in_executor(llm_pool, _parse_alone, item)
+        except Exception as e:
+            item.error = f"{type(e).__name__}: {e}"
+        await results.put(item)
+
+    async def writer():
+        batch: list[Parsed] = []
+        try:
+            while True:
+                item = await results.get()
+                if item is not None:
+                    batch.append(item)
+                    in_flight.release()
+                if batch and (item is None or len(batch) >= args.batch_size):
+                    entries = await loop.run_in_executor(
+                        db_pool, write_batch, batch, args.uploaded_by, args.fallback_email
+                    )
+                    manifest.record(entries)
+                    if args.render:
+                        await loop.run_in_executor(db_pool, render, entries, args.uploaded_by)
+                    stats.done += sum(e["status"] == "done" for e in entries)
+                    stats.failed += sum(e["status"] == "failed" for e in entries)
+                    batch = []
+                    print(f"\r{stats.done:>8} done  {stats.failed:>6} failed  {stats.skipped:>6} skipped  "
+                          f"{stats.docs_per_minute():>8.1f} docs/min", end="", flush=True)
+                if item is None:
+                    return
+        finally:
+            # if a batch failed, the queued items' permits would never come back
+            while not results.empty():
+                if results.get_nowait() is not None:
+                    in_flight.release()
+
+    writer_task = asyncio.create_task(writer())
+
+    async def acquire():
+        """Take an in-flight permit, or raise the writer's exception if it stopped."""
+        acquiring = asyncio.ensure_future(in_flight.acquire())
+        await asyncio.wait({acquiring, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+        if writer_task.done():
+            if acquiring.done() and not acquiring.cancelled():
+                in_flight.release()
+            acquiring.cancel()
+            writer_task.result()
+            raise RuntimeError("the writer stopped before the end of the input")
+
+    tasks = []
+    seen: set[str] = set()
+    try:
+        for name, read in iter_sources(path):
+            if args.limit and len(tasks) >= args.limit:
+                break
+            await acquire()
+            data = read()
+            digest = hashlib.sha256(data).hexdigest()
+            if digest in manifest.done or digest in seen:
+                stats.skipped += 1
+                in_flight.release()
+                continue
+            seen.add(digest)
+            tasks.append(asyncio.create_task(process(SourceFile(name, data, digest))))
+        await asyncio.gather(*tasks)
+        await results.put(None)
+        await writer_task
+    except BaseException:
+        for task in (*tasks, writer_task):
+            task.cancel()
+        raise
+    finally:
+        extract_pool.shutdown()
+        llm_pool.shutdown()
+        db_pool.shutdown()
+    print()
+    return stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", help="directory or .zip archive of .docx files")
+    ap.add_argument("--uploaded-by", default="bulk", help="Document.uploaded_by (usually the client's user id)")
+    ap.add_argument("--fallback-email", help="email for CVs without one (otherwise they fail)")
+    ap.add_argument("--manifest", help="default: <path>.manifest.jsonl")
+    ap.add_argument("--concurrency", type=int, default=8, help="LLM calls in flight")
+    ap.add_argument("--extract-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--batch-size", type=int, default=50, help="documents per transaction")
+    ap.add_argument("--limit", type=int, default=0, help="stop after this many new files")
+    ap.add_argument("--render", action="store_true", help="also render PDF + timeline per document")
+    ap.add_argument("--pack", action="store_true", help="send several short CVs per LLM request")
+    ap.add_argument("--pack-budget", type=int, default=LLM_PACK_TOKEN_BUDGET, help="CV text tokens per packed request")
+    ap.add_argument("--pack-max-docs", type=int, default=LLM_PACK_MAX_DOCS, help="CVs per packed request")
+    ap.add_argument("--pack-max-doc-tokens", type=int, default=LLM_PACK_MAX_DOC_TOKENS,
+                    help="longer CVs are sent on their own")
+    args = ap.parse_args()
+
+    ensure_schema()
+    ensure_table()
+    manifest = Manifest(args.manifest or os.path.abspath(args.path).rstrip(os.sep) + ".manifest.jsonl")
+    logger.info(f"📦 Bulk ingest of {args.path} ({len(manifest.done)} files already done)")
+    stats = asyncio.run(ingest(args.path, args, manifest))
+    elapsed = time.perf_counter() - stats.started
+    summary = (f"{stats.done} ingested, {stats.failed} failed, {stats.skipped} skipped in {elapsed:.1f}s "
+               f"({stats.docs_per_minute():.1f} docs/min); manifest: {manifest.path}")
+    logger.info(f"📦 Bulk ingest finished: {summary}")
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# app/services/cv_versions.py
+"""
+Paragraph-level versions of uploaded CVs.
+
+Every parsed document keeps the lines of its compacted text (what the LLM saw,
+see text_compaction) with a hash each. When the same uploader sends a revised
+CV, the most similar earlier document is taken as its previous version and only
+the paragraph diff goes to the LLM, together with the earlier structured
+result; the changed fields are merged into that result.
+An identical re-upload reuses the earlier result without an LLM call, and a
+heavily rewritten CV is parsed from scratch.
+
+A CV parsed from scratch first goes through the heuristic parser: if it reads
+the CV confidently, its result is used without the LLM, or the LLM is asked
+only for the sections it could not read.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+
+from sqlalchemy import delete, func, select
+
+from app.models import Document, DocumentParagraph
+from app.utils.audit_logger import logger
+from app.utils.llm_accounting import LLMCallRecord, collect_llm_calls, record_cache_hit, share
+from app.utils.metrics import cv_parse_modes, cv_text_tokens, llm_cache_hits, llm_retries, llm_routes, track_stage
+from app.services.text_compaction import CompactedText, estimate_tokens
+from app.services.heuristic_parser import (
+    HEURISTIC_MIN_CONFIDENCE,
+    HEURISTIC_PARSE,
+    HeuristicResult,
+    parse_cv_heuristically,
+)
+from app.services.llm_cv_parser import (
+    compact_text,
+    extract_styled_paragraphs_from_docx,
+    parse_cv_delta_with_llm,
+    parse_cv_sections_with_llm,
+    parse_cvs_packed_with_llm,
+    parse_cv_text_with_llm,
+)
+
+INCREMENTAL_PARSE = os.getenv("INCREMENTAL_PARSE", "true").lower() in ("1", "true", "yes")
+# share of the new version's paragraphs an earlier document must contain to count as its previous version
+INCREMENTAL_MIN_OVERLAP = float(os.getenv("INCREMENTAL_MIN_OVERLAP", 0.6))
+# above this share of changed paragraphs the CV is parsed from scratch
+INCREMENTAL_MAX_CHANGED = float(os.getenv("INCREMENTAL_MAX_CHANGED", 0.5))
+# how many of the uploader's latest documents are considered
+INCREMENTAL_CANDIDATES = 20
+# unchanged paragraphs shown around each change
+DIFF_CONTEXT = 1
+
+_whitespace = re.compile(r"\s+")
+
+
+def paragraph_hash(text: str) -> str:
+    normalized = _whitespace.sub(" ", text).strip()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def ensure_schema():
+    """Create document_paragraphs and the documents token columns on databases that predate them."""
+    from db.session import add_missing_columns, engine
+    DocumentParagraph.__table__.create(bind=engine, checkfirst=True)
+    add_missing_columns(Document.__table__)
+
+
+def store_paragraphs(session, document_id: int, paragraphs: list[str]):
+    session.execute(delete(DocumentParagraph).where(DocumentParagraph.document_id == document_id))
+    session.add_all(
+        DocumentParagraph(document_id=document_id, position=i, hash=paragraph_hash(text), text=text)
+        for i, text in enumerate(paragraphs)
+    )
+
+
+def find_previous_version(session, doc: Document, hashes: list[str]) -> tuple[Document, list[str]] | None:
+    """The uploader's earlier document sharing the most paragraphs with `hashes`, with its paragraphs."""
+    wanted = set(hashes)
+    if not wanted:
+        return None
+    candidates = session.scalars(
+        select(Document.id)
+        .where(
+            Document.uploaded_by == doc.uploaded_by,
+            Document.id < doc.id,
+            Document.llm_response.isnot(None),
+        )
+        .order_by(Document.id.desc())
+        .limit(INCREMENTAL_CANDIDATES)
+    ).all()
+    if not candidates:
+        return None
+    overlaps = session.execute(
+        select(DocumentParagraph.document_id, func.count(func.distinct(DocumentParagraph.hash)))
+        .where(DocumentParagraph.document_id.in_(candidates), DocumentParagraph.hash.in_(wanted))
+        .group_by(DocumentParagraph.document_id)
+    ).all()
+    if not overlaps:
+        return None
+    # most shared paragraphs, then the most recent
+    previous_id, shared = max(overlaps, key=lambda row: (row[1], row[0]))
+    if shared / len(wanted) < INCREMENTAL_MIN_OVERLAP:
+        return None
+    paragraphs = session.scalars(
+        select(DocumentParagraph.text)
+        .where(DocumentParagraph.document_id == previous_id)
+        .order_by(DocumentParagraph.position)
+    ).all()
+    return session.get(Document, previous_id), list(paragraphs)
+
+
+def diff_paragraphs(old: list[str], new: list[str]) -> tuple[str, int]:
+    """Unified diff of two paragraph lists (empty if equal) and the number of changed paragraphs."""
+    matcher = difflib.SequenceMatcher(None, [paragraph_hash(p) for p in old], [paragraph_hash(p) for p in new],
+                                      autojunk=False)
+    changed = sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal")
+    if not changed:
+        return "", 0
+    lines = difflib.unified_diff(old, new, lineterm="", n=DIFF_CONTEXT)
+    # drop the ---/+++ file header
+    return "\n".join(line for line in lines if not line.startswith(("---", "+++"))), changed
+
+
+def parse_document(session, doc: Document) -> tuple[dict, str | None, str]:
+    """
+    Parse `doc` (see module docstring), store its paragraphs and its token counts.
+    Returns (parsed_data, prompt_sent, structured_json) like parse_cv_with_llm;
+    prompt_sent is None when no LLM was asked.
+    """
+    with track_stage("extract_text") as sp:
+        styled = extract_styled_paragraphs_from_docx(doc.source_filename)
+        sp.bytes = sum(len(text.encode("utf-8")) for text, _ in styled)
+    compacted = compact_text([text for text, _ in styled])
+    paragraphs = compacted.lines
+
+    result = _parse_incrementally(session, doc, paragraphs) if INCREMENTAL_PARSE else None
+    if result is None:
+        heuristic = heuristic_parse(styled) if HEURISTIC_PARSE else None
+        result = parse_from_scratch(compacted, heuristic)
+    data, prompt, structured, tokens_sent = result
+    store_paragraphs(session, doc.id, paragraphs)
+    doc.text_tokens_raw = compacted.tokens_raw
+    doc.text_tokens_sent = tokens_sent
+    cv_text_tokens.inc(tokens_sent, kind="sent")
+    return data, prompt, structured
+
+
+def heuristic_parse(styled: list[tuple[str, str | None]]) -> HeuristicResult:
+    with track_stage("heuristic_parse") as sp:
+        heuristic = parse_cv_heuristically(styled)
+        sp.rows = sum(len(heuristic.data[key]) for key in heuristic.section_confidence)
+    return heuristic
+
+
+def parse_from_scratch(compacted: CompactedText, heuristic: HeuristicResult | None = None):
+    """
+    (data, prompt, structured_json, tokens_sent) for a CV without a usable previous version:
+    the heuristic result if it is confident, completed by the LLM where needed, else the LLM's.
+    """
+    if heuristic is not None and heuristic.confidence >= HEURISTIC_MIN_CONFIDENCE:
+        data = heuristic.data
+        weak = heuristic.weak_sections
+        if not weak:
+            logger.info(f"⚡ Parsed the CV without the LLM (confidence {heuristic.confidence})")
+            cv_parse_modes.inc(mode="heuristic")
+            return data, None, json.dumps(data, ensure_ascii=False), 0
+        logger.info(f"⚡ Parsed the CV heuristically (confidence {heuristic.confidence}); "
+                    f"asking the LLM for {', '.join(weak)}")
+        try:
+            # the template summary is replaced by the LLM's while it is asked anyway
+            keys = weak + ["short_bio"]
+            part, prompt, _ = parse_cv_sections_with_llm(compacted.text, keys)
+        except ValueError as e:      # includes JSONDecodeError
+            logger.warning(f"⚠️ Partial parse failed ({e}); parsing in full")
+        else:
+            cv_parse_modes.inc(mode="heuristic_partial")
+            data = {**data, **{key: part[key] for key in keys if key in part}}
+            return data, prompt, json.dumps(data, ensure_ascii=False), compacted.tokens
+    cv_parse_modes.inc(mode="full")
+    data, prompt, structured = parse_cv_text_with_llm(compacted.text)
+    return data, prompt, structured, compacted.tokens
+
+
+def needs_full_parse(heuristic: HeuristicResult | None) -> bool:
+    """Whether parse_from_scratch would send the whole CV to the LLM."""
+    return heuristic is None or heuristic.confidence < HEURISTIC_MIN_CONFIDENCE
+
+
+def parse_packed(
+    items: dict[str, CompactedText], tier: str
+) -> tuple[dict[str, tuple | Exception], dict[str, list[LLMCallRecord]]]:
+    """
+    parse_from_scratch for several CVs that need a full LLM parse, packed into
+    one request; CVs the packed answer does not cover are parsed on their own.
+    Returns ({id: (data, prompt, structured_json, tokens_sent), or the exception},
+    {id: the CV's LLM calls, with its share of the packed request}).
+    """
+    llm_routes.inc(tier=tier)
+    with collect_llm_calls() as packed_calls:
+        parsed, failed, prompt = parse_cvs_packed_with_llm({key: c.text for key, c in items.items()}, tier)
+    calls = {key: share(packed_calls, len(items)) for key in items}
+    results: dict[str, tuple | Exception] = {}
+    for key, data in parsed.items():
+        cv_parse_modes.inc(mode="packed")
+        results[key] = data, prompt, json.dumps(data, ensure_ascii=False), items[key].tokens
+    if failed:
+        logger.warning(f"⚠️ {len(failed)} of {len(items)} packed CVs were not parsed; parsing them on their own")
+    for key in failed:
+        llm_retries.inc(reason="packed_rerun")
+        try:
+            with collect_llm_calls(calls[key]):
+                results[key] = parse_from_scratch(items[key])
+        except Exception as e:
+            results[key] = e
+    return results, calls
+
+
+def _parse_incrementally(session, doc: Document, paragraphs: list[str]):
+    """(data, prompt, structured_json, tokens_sent) from the previous version, or None to parse in full."""
+    with track_stage("find_previous_version"):
+        previous = find_previous_version(session, doc, [paragraph_hash(p) for p in paragraphs])
+    if previous is None:
+        return None
+    previous_doc, previous_paragraphs = previous
+    try:
+        previous_data = json.loads(previous_doc.llm_response)
+    except json.JSONDecodeError:
+        return None
+
+    diff, changed = diff_paragraphs(previous_paragraphs, paragraphs)
+    if not changed:
+        logger.info(f"♻️ Document {doc.id} is unchanged from document {previous_doc.id}; reusing its result")
+        cv_parse_modes.inc(mode="unchanged")
+        llm_cache_hits.inc(cache="unchanged_version")
+        record_cache_hit("unchanged_version")
+        return previous_data, None, previous_doc.llm_response, 0
+    if changed / max(len(paragraphs), 1) > INCREMENTAL_MAX_CHANGED:
+        logger.info(f"📝 Document {doc.id} changed too much from document {previous_doc.id}; parsing in full")
+        return None
+
+    logger.info(f"📝 Document {doc.id} revises document {previous_doc.id}: "
+                f"{changed} of {len(paragraphs)} paragraphs changed")
+    try:
+        delta, prompt, _ = parse_cv_delta_with_llm(previous_data, diff)
+    except ValueError as e:      # includes JSONDecodeError
+        logger.warning(f"⚠️ Incremental parse of document {doc.id} failed ({e}); parsing in full")
+        return None
+    cv_parse_modes.inc(mode="delta")
+    merged = {**previous_data, **delta}
+    # the delta prompt carries the previous result (as compact JSON) along with the diff
+    tokens_sent = estimate_tokens(diff) + estimate_tokens(
+        json.dumps(previous_data, ensure_ascii=False, separators=(",", ":")))
+    return merged, prompt, json.dumps(merged, ensure_ascii=False), tokens_sent
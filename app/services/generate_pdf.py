@@ -2,7 +2,7 @@
 
 import os
 import re
-from datetime import datetime
+from datetime import date, datetime
 from fpdf import FPDF
 from sqlalchemy.orm import joinedload
 
@@ -10,6 +10,8 @@ from db.session import SessionLocal
 from app.models import (Person)
 from app.utils.utils import sanitize
 from app.utils.audit_logger import logger
+from app.utils.metrics import track_stage
+from app.utils.tracing import annotate
 from app.services.plot_timeline_vertical import register_visualization
 
 
@@ -114,6 +116,7 @@ class UniCV(FPDF):
 
 # --- Main generator ---------------------------------------------------------
 
+@track_stage("generate_cv_pdf")
 def generate_cv_pdf(
     person_id: int,
     output_path: str = None,
@@ -143,6 +146,7 @@ def generate_cv_pdf(
         if not person:
             msg = f"No Person #{person_id}"
             logger.error(f"❌ [PDF FAIL] {msg}")
+            annotate(error=msg)
             return
 
         # Decide output_path if not passed in
@@ -174,7 +178,7 @@ def generate_cv_pdf(
         # Professional Experience
         if person.experiences:
             pdf.section_title("Professional Experience")
-            for exp in sorted(person.experiences, key=lambda x: x.start_date or "", reverse=True):
+            for exp in sorted(person.experiences, key=lambda x: x.start_date or date.min, reverse=True):
                 if not (exp.title and exp.company):
                     continue
                 line = f"{exp.title} at {exp.company}"
@@ -195,7 +199,7 @@ def generate_cv_pdf(
         # — Education —
         if person.educations:
             pdf.section_title("Education")
-            for edu in sorted(person.educations, key=lambda e: e.end_date or e.start_date or "", reverse=True):
+            for edu in sorted(person.educations, key=lambda e: e.end_date or e.start_date or date.min, reverse=True):
                 parts = []
                 if edu.degree:          parts.append(edu.degree)
                 if edu.field_of_study:  parts.append(f"in {edu.field_of_study}")
@@ -211,7 +215,7 @@ def generate_cv_pdf(
         # — Further Education —
         if person.further_education:
             pdf.section_title("Further Education")
-            for fe in sorted(person.further_education, key=lambda f: f.end_date or f.start_date or "", reverse=True):
+            for fe in sorted(person.further_education, key=lambda f: f.end_date or f.start_date or date.min, reverse=True):
                 if not fe.title:
                     continue
                 parts = [fe.title]
@@ -284,7 +288,7 @@ def generate_cv_pdf(
         # — Personal Achievements —
         if person.personal_achievements:
             pdf.section_title("Personal Achievements")
-            for ach in sorted(person.personal_achievements, key=lambda a: a.start_date or "", reverse=True):
+            for ach in sorted(person.personal_achievements, key=lambda a: a.start_date or date.min, reverse=True):
                 if not ach.achievement:
                     continue
                 dr   = format_date_range_with_precision(
@@ -299,7 +303,7 @@ def generate_cv_pdf(
         # — Private Milestones —
         if person.private_milestones:
             pdf.section_title("Private Milestones")
-            for ms in sorted(person.private_milestones, key=lambda m: m.start_date or "", reverse=True):
+            for ms in sorted(person.private_milestones, key=lambda m: m.start_date or date.min, reverse=True):
                 if not ms.event:
                     continue
                 dr   = format_date_range_with_precision(
@@ -314,6 +318,7 @@ def generate_cv_pdf(
         # Save and log
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         pdf.output(output_path)
+        annotate(bytes=os.path.getsize(output_path))
 
         # — register in DB if we know the document —
         if document_id is not None:
@@ -330,6 +335,7 @@ def generate_cv_pdf(
         )
 
     except Exception as e:
+        annotate(error=f"{type(e).__name__}: {e}")
         logger.exception(f"❌ [PDF ERROR] person_id={person_id} by={user_id} failed: {e}")
     finally:
         session.close()
@@ -0,0 +1,412 @@
+# app/services/heuristic_parser.py
+"""
+Rule-based fast path for CVs that follow the usual templates: headings such as
+"Education:" or "Professional Experience" and one entry per line, e.g.
+
+    Ph.D. in Machine Learning, ETH Zurich (2015–2019)
+    2010 – 2020: Head of Marketing. Example AG, Zurich
+    German – Native speaker
+
+The document is split into sections by heading (paragraph style or text), each
+line is matched against compiled patterns and the result has the same shape
+as parse_cv_with_llm's. Every section gets a confidence (the share of its
+lines that yielded a complete entry); the overall confidence also counts the
+lines under headings we do not recognise. cv_versions uses the result as is,
+or asks the LLM only for the weak sections.
+"""
+import os
+import re
+from dataclasses import dataclass, field
+
+from app.services.llm_output import SECTION_MODELS
+
+HEURISTIC_PARSE = os.getenv("HEURISTIC_PARSE", "true").lower() in ("1", "true", "yes")
+# below this the LLM parses the whole CV
+HEURISTIC_MIN_CONFIDENCE = float(os.getenv("HEURISTIC_MIN_CONFIDENCE", 0.75))
+# sections below this are re-parsed by the LLM
+HEURISTIC_MIN_SECTION_CONFIDENCE = float(os.getenv("HEURISTIC_MIN_SECTION_CONFIDENCE", 0.9))
+
+SECTION_HEADINGS = {
+    "education": "education", "academic background": "education", "studies": "education",
+    "professional experience": "professional_experience", "work experience": "professional_experience",
+    "experience": "professional_experience", "employment": "professional_experience",
+    "employment history": "professional_experience", "work history": "professional_experience",
+    "career": "professional_experience",
+    "languages": "languages", "language skills": "languages",
+    "further education": "further_education", "training": "further_education",
+    "courses": "further_education", "continuing education": "further_education",
+    "professional development": "further_education",
+    "certifications": "certifications", "certificates": "certifications",
+    "licenses and certifications": "certifications",
+    "awards": "awards", "honors": "awards", "honours": "awards", "awards and honors": "awards",
+    "publications": "publications",
+    "personal achievements": "personal_achievements", "personal achievments": "personal_achievements",
+    "achievements": "personal_achievements",
+    "private milestones": "private_milestones", "personal milestones": "private_milestones",
+    "milestones": "private_milestones",
+}
+# headings whose content the schema has no field for (skipped without lowering confidence)
+IGNORED_HEADINGS = {
+    "references", "referees", "recommendations", "testimonials", "declaration", "hobbies",
+    "interests", "hobbies and interests", "skills", "key skills", "contact", "contact details",
+}
+# what an entry needs before the upserts store it
+REQUIRED = {
+    "education": ("degree", "institution"),
+    "professional_experience": ("title", "company"),
+    "languages": ("language",),
+    "further_education": ("title", "institution"),
+    "certifications": ("name", "issuer"),
+    "awards": ("name", "awarded_by"),
+    "publications": ("title", "journal"),
+    "personal_achievements": ("achievement",),
+    "private_milestones": ("event",),
+}
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_SEASON = r"(?:spring|summer|autumn|fall|winter)"
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_APPROX = re.compile(r"^(?:ca\.|circa|approx\.|~)\s*", re.I)
+_DATE = (rf"(?:(?:ca\.|circa|approx\.|~)\s*)?"
+         rf"(?:(?:{_MONTH}|{_SEASON})\s+\d{{4}}|\d{{1,2}}[./]\d{{1,2}}[./]\d{{4}}|\d{{1,2}}[./]\d{{4}}|\d{{4}}-\d{{1,2}}-\d{{1,2}}|\d{{4}}[./-]\d{{1,2}}(?!\d)|\d{{4}})")
+_OPEN = r"(?:present|current|now|today|ongoing)"
+_RANGE = re.compile(rf"(?<![\w/.])(?P<start>{_DATE})\s*(?:–|—|-|to|until)\s*(?P<end>{_DATE}|{_OPEN})", re.I)
+_SINCE = re.compile(rf"\b(?:since|from)\s+(?P<start>{_DATE})", re.I)
+_SINGLE = re.compile(rf"(?<![\w/.])(?:in\s+)?(?P<start>{_DATE})(?![\w/])", re.I)
+_EDGE = re.compile(r"^[\s:,;|–—\-]+|[\s:,;|–—\-]+$")
+_PARENS = re.compile(r"\(\s*[,;]?\s*\)|\(\s*([^()]*?)\s*[,;]?\s*\)")
+_SPLIT = re.compile(r"\s*(?:,|;|\||\t+|\s[–—-]\s|(?<!\b[A-Z])(?<!\b[A-Z][a-z])\.\s+(?=[A-Z]))\s*")
+_BULLET = re.compile(r"^[•·●○◦▪■►▸‣⁃∙➢➤✓✔*–—-]+\s*")
+_HEADING_NOISE = re.compile(r"^[^\w]+|[\s:]+$")
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"\+?\d[\d\s()/.-]{6,}\d")
+_LINKEDIN = re.compile(r"(?:https?://)?(?:[\w.]*linkedin\.com)?/in/[\w-]+/?", re.I)
+_GITHUB = re.compile(r"(?:https?://)?github\.com/[\w.-]+/?", re.I)
+_WEBSITE = re.compile(r"(?:https?://|www\.)[^\s|,]+", re.I)
+_LABEL = re.compile(r"^(?:name|full name|curriculum vitae|cv|resume)\s*[:–-]\s*", re.I)
+_NAME = re.compile(r"^(?:(?:Dr|Prof|Mr|Ms|Mrs)\.?\s+)?[A-ZÀ-Þ][\w'’-]+(?:\s+[A-ZÀ-Þ][\w'’.-]+){1,3}$")
+
+_DEGREE = re.compile(
+    r"^(?P<degree>Ph\.?\s?D\.?|M\.?\s?Sc\.?|B\.?\s?Sc\.?|M\.?\s?A\.?|B\.?\s?A\.?|MBA|M\.?\s?Eng\.?|B\.?\s?Eng\.?"
+    r"|LL\.?\s?M\.?|LL\.?\s?B\.?|M\.?\s?D\.?|Dr\.|Diploma|Bachelor(?:'s)?|Master(?:'s)?|Doctorate)"
+    r"(?:\s+(?:in|of))?\s*(?P<field>.*)$",
+    re.I,
+)
+_LEVELS = (
+    ("native", r"native|mother tongue|first language"),
+    ("fluent", r"fluent|c2|bilingual"),
+    ("professional", r"professional|business|advanced|c1"),
+    ("intermediate", r"intermediate|conversational|b1|b2"),
+    ("basic", r"basic|beginner|elementary|a1|a2"),
+)
+_LEVEL = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _LEVELS), re.I)
+# a level, optionally followed by the skill it is for: "fluent spoken", "intermediate – written"
+_LEVEL_SKILL = re.compile(
+    r"\b(?P<level>" + "|".join(pattern for _, pattern in _LEVELS) + r")\b[\s–—:()-]*(?P<skill>written|spoken)?", re.I
+)
+# a preamble line this long that ends with a full stop is the CV's own summary
+SUMMARY_MIN_WORDS = 8
+_BY = re.compile(r"\s+(?:by|from|at)\s+", re.I)
+# "A. Author, B. Author (2018). Title (2). Journal."
+_CITATION = re.compile(
+    r"^(?P<authors>[^()]+?)\s*\((?P<date>[^()]*\d{4}[^()]*)\)\.?\s+(?P<title>.+?)\.\s+(?P<journal>[^.]+?)\.?$"
+)
+_SENTENCE = re.compile(r"(?<!\b[A-Z])\.\s+(?=[A-Z])")
+# values that start with punctuation are leftovers of an unrecognised date or layout
+_CLEAN_VALUE = re.compile(r"^[\w\"'“(]")
+
+
+@dataclass
+class HeuristicResult:
+    data: dict
+    confidence: float
+    section_confidence: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def weak_sections(self) -> list[str]:
+        return [key for key, c in self.section_confidence.items() if c < HEURISTIC_MIN_SECTION_CONFIDENCE]
+
+
+def _heading(text: str, style: str | None) -> str | None:
+    """Normalised heading text, or None if the line is not a heading."""
+    name = _HEADING_NOISE.sub("", text).casefold()
+    if not name or len(name) > 40:
+        return None
+    if name in SECTION_HEADINGS or name in IGNORED_HEADINGS:
+        return name
+    # the "Title" style usually holds the name, not a heading
+    if (style or "").startswith("Heading") or (text.rstrip().endswith(":") and not re.search(r"\d", text)):
+        return name
+    return None
+
+
+def iso_date(text: str | None) -> str | None:
+    """Dates as YYYY, YYYY-MM or YYYY-MM-DD ("Nov. 2004" → "2004-11"), the forms normalize_date reads exactly."""
+    if not text:
+        return None
+    text = _APPROX.sub("", text.strip()).casefold()
+    if m := re.fullmatch(r"([a-z]{3})[a-z]*\.?\s+(\d{4})", text):
+        return f"{m.group(2)}-{_MONTHS.index(m.group(1)) + 1:02d}" if m.group(1) in _MONTHS else m.group(2)
+    if m := re.fullmatch(rf"{_SEASON}\s+(\d{{4}})", text):
+        return m.group(1)
+    if m := re.fullmatch(r"(\d{1,2})[./](\d{1,2})[./](\d{4})", text):
+        day, month = int(m.group(1)), int(m.group(2))
+        if month > 12:      # 12/31/2004
+            day, month = month, day
+        return f"{m.group(3)}-{month:02d}-{day:02d}"
+    if m := re.fullmatch(r"(\d{1,2})[./](\d{4})", text):
+        return f"{m.group(2)}-{int(m.group(1)):02d}"
+    if m := re.fullmatch(r"(\d{4})[./-](\d{1,2})(?:-(\d{1,2}))?", text):
+        day = f"-{int(m.group(3)):02d}" if m.group(3) else ""
+        return f"{m.group(1)}-{int(m.group(2)):02d}{day}"
+    return text
+
+
+def split_dates(text: str) -> tuple[str, str | None, str | None]:
+    """(text without its dates, start, end) for the first date range, "since" date or single date."""
+    for pattern in (_RANGE, _SINCE, _SINGLE):
+        m = pattern.search(text)
+        if m:
+            end = m.groupdict().get("end")
+            if end and re.fullmatch(_OPEN, end, re.I):
+                end = "present"
+            rest = text[:m.start()] + text[m.end():]
+            start, end = iso_date(m.group("start")), end if end == "present" else iso_date(end)
+            rest = _PARENS.sub(lambda p: f", {p.group(1)}" if p.group(1) else "", rest)
+            return _EDGE.sub("", rest), start, end
+    return text, None, None
+
+
+def _parts(text: str) -> list[str]:
+    return [p for p in (_EDGE.sub("", p) for p in _SPLIT.split(text)) if p]
+
+
+def _normalize_degree(degree: str) -> str:
+    compact = re.sub(r"[.\s]", "", degree)
+    return {"phd": "PhD", "msc": "MSc", "bsc": "BSc", "ma": "MA", "ba": "BA", "meng": "MEng", "beng": "BEng",
+            "llm": "LLM", "llb": "LLB", "md": "MD", "mba": "MBA"}.get(compact.casefold(), degree.strip())
+
+
+def parse_education(line: str) -> dict:
+    rest, start, end = split_dates(line)
+    parts = _parts(rest)
+    entry = {"degree": None, "field": None, "start_date": start, "end_date": end, "institution": None}
+    if parts:
+        m = _DEGREE.match(parts[0])
+        if m:
+            entry["degree"] = _normalize_degree(m.group("degree"))
+            entry["field"] = m.group("field").strip() or None
+            entry["institution"] = parts[1] if len(parts) > 1 else None
+    return entry
+
+
+def parse_experience(line: str) -> dict:
+    rest, start, end = split_dates(line)
+    entry = {"title": None, "company": None, "start_date": start, "end_date": end,
+             "location": None, "role_type": None, "role_description": None}
+    if start is None:
+        return entry
+    # "Title, Company (City). Worked on …": the sentences after the first are the description,
+    # unless the first holds only the title ("Title. Company, City")
+    first, *description = _SENTENCE.split(rest, maxsplit=1)
+    if description and (len(_parts(first)) > 1 or re.search(r"\s+at\s+", first)):
+        rest, entry["role_description"] = first, description[0]
+    head, *tail = re.split(r"\s+at\s+", rest, maxsplit=1)
+    parts = _parts(tail[0]) if tail else _parts(head)[1:]
+    entry["title"] = _parts(head)[0] if _parts(head) else None
+    if parts:
+        entry["company"] = parts[0]
+        entry["location"] = ", ".join(parts[1:]) or None
+    return entry
+
+
+def parse_language(line: str) -> dict:
+    m = re.match(r"^(?P<language>[A-ZÀ-Þ][\w-]+)\b\s*[:(–—-]?\s*(?P<rest>.*)$", line)
+    entry = {"language": None, "proficiency_written": None, "proficiency_spoken": None}
+    if not m:
+        return entry
+    rest = m.group("rest")
+    written = spoken = None
+    # "fluent spoken, professional written" / "intermediate – written | beginner – spoken"
+    for m_level in _LEVEL_SKILL.finditer(rest):
+        name = _LEVEL.fullmatch(m_level.group("level")).lastgroup
+        skill = (m_level.group("skill") or "").lower()
+        if skill == "written":
+            written = name
+        elif skill == "spoken":
+            spoken = name
+        else:
+            written = written or name
+            spoken = spoken or name
+    if written is None and spoken is None:
+        return entry
+    entry.update(language=m.group("language"), proficiency_written=written or spoken,
+                 proficiency_spoken=spoken or written)
+    return entry
+
+
+def _titled(line: str, keys: tuple[str, str], by_split: bool = False) -> tuple[dict, str | None, str | None]:
+    """Split "<name>, <issuer>, <date>" (or "<name> by <issuer> in <date>") into the two given keys."""
+    rest, start, end = split_dates(line)
+    parts = _parts(rest)
+    if by_split and len(parts) == 1:
+        parts = [p for p in _BY.split(parts[0], maxsplit=1) if p]
+    first, second = keys
+    return {first: parts[0] if parts else None, second: parts[1] if len(parts) > 1 else None}, start, end
+
+
+def parse_further_education(line: str) -> dict:
+    entry, start, end = _titled(line, ("title", "institution"), by_split=True)
+    return {"title": entry["title"], "start_date": start, "end_date": end, "institution": entry["institution"]}
+
+
+def parse_certification(line: str) -> dict:
+    entry, start, end = _titled(line, ("name", "issuer"), by_split=True)
+    return {**entry, "start_date": start, "end_date": end}
+
+
+def parse_award(line: str) -> dict:
+    entry, start, end = _titled(line, ("name", "awarded_by"), by_split=True)
+    return {**entry, "start_date": start, "end_date": end}
+
+
+def parse_publication(line: str) -> dict:
+    m = _CITATION.match(line)
+    if m:
+        _, start, end = split_dates(m.group("date"))
+        return {"start_date": start, "end_date": end, "title": m.group("title"),
+                "journal": m.group("journal"), "authors": m.group("authors")}
+    rest, start, end = split_dates(line)
+    parts = _parts(rest)
+    return {"start_date": start, "end_date": end, "title": parts[0] if parts else None,
+            "journal": parts[1] if len(parts) > 1 else None, "authors": ", ".join(parts[2:]) or None}
+
+
+def parse_achievement(line: str) -> dict:
+    rest, start, end = split_dates(line)
+    return {"start_date": start, "end_date": end, "achievement": rest or None, "description": None}
+
+
+def parse_milestone(line: str) -> dict:
+    rest, start, end = split_dates(line)
+    # "Born: 1980", "Married: 2005 – 2010"
+    return {"start_date": start, "end_date": end, "event": rest or None, "description": None}
+
+
+SECTION_PARSERS = {
+    "education": parse_education,
+    "professional_experience": parse_experience,
+    "languages": parse_language,
+    "further_education": parse_further_education,
+    "certifications": parse_certification,
+    "awards": parse_award,
+    "publications": parse_publication,
+    "personal_achievements": parse_achievement,
+    "private_milestones": parse_milestone,
+}
+
+
+def _contact(lines: list[str]) -> tuple[dict, int]:
+    """
+    Contact fields from the lines before the first heading, and how many lines
+    yielded something. A prose line there is taken as the CV's own summary.
+    """
+    data = {"full_name": None, "email": None, "phone": None, "linkedin": None, "github": None, "website": None,
+            "short_bio": None}
+    used = 0
+    for line in lines:
+        found = False
+        for key, pattern in (("email", _EMAIL), ("linkedin", _LINKEDIN), ("github", _GITHUB), ("phone", _PHONE)):
+            m = pattern.search(line)
+            if m and not data[key]:
+                data[key] = m.group(0).strip()
+                found = True
+        m = _WEBSITE.search(_EMAIL.sub("", _LINKEDIN.sub("", _GITHUB.sub("", line))))
+        if m and not data["website"]:
+            data["website"] = m.group(0)
+            found = True
+        name = _LABEL.sub("", line).strip()
+        if not data["full_name"] and not found and _NAME.match(name):
+            data["full_name"] = name
+            found = True
+        if not found and len(line.split()) >= SUMMARY_MIN_WORDS and line.endswith("."):
+            data["short_bio"] = " ".join(filter(None, [data["short_bio"], line]))
+            found = True
+        used += found
+    return data, used
+
+
+def _latest(entries: list[dict]) -> dict:
+    def key(entry):
+        if entry["end_date"] == "present":
+            return 9999
+        years = re.findall(r"\d{4}", f"{entry['start_date']} {entry['end_date']}")
+        return int(years[-1]) if years else 0
+    return max(entries, key=key)
+
+
+def _short_bio(data: dict) -> str | None:
+    """A plain summary from the parsed entries; the LLM writes a better one when it is asked anyway."""
+    sentences = []
+    if data["professional_experience"]:
+        job = _latest(data["professional_experience"])
+        sentences.append(f"{job['title']} at {job['company']}.")
+    if data["education"]:
+        edu = _latest(data["education"])
+        field = f" in {edu['field']}" if edu["field"] else ""
+        sentences.append(f"{edu['degree']}{field} from {edu['institution']}.")
+    if data["languages"]:
+        sentences.append("Languages: " + ", ".join(lang["language"] for lang in data["languages"]) + ".")
+    return " ".join(sentences) or None
+
+
+def parse_cv_heuristically(paragraphs: list[tuple[str, str | None]]) -> HeuristicResult:
+    """
+    `paragraphs` are (text, style name) pairs in document order.
+    Returns the parsed dict (PROMPT_TEMPLATE shape) and the confidences.
+    """
+    sections: dict[str | None, list[str]] = {None: []}
+    current: str | None = None
+    unknown_lines = 0
+    for text, style in paragraphs:
+        for line in text.splitlines():
+            line = _BULLET.sub("", re.sub(r"\s+", " ", line).strip())
+            if not line:
+                continue
+            heading = _heading(line, style)
+            if heading is not None:
+                current = SECTION_HEADINGS.get(heading, "ignored" if heading in IGNORED_HEADINGS else "unknown")
+                sections.setdefault(current, [])
+                continue
+            if current == "unknown":
+                unknown_lines += 1
+            sections.setdefault(current, []).append(line)
+
+    data, contact_used = _contact(sections[None])
+    preamble_unused = len(sections[None]) - contact_used
+    section_confidence = {}
+    parsed_lines = 0
+    for key, parse in SECTION_PARSERS.items():
+        entries, ok = [], 0
+        for line in sections.get(key, []):
+            entry = parse(line)
+            if all(entry.get(f) and _CLEAN_VALUE.match(entry[f]) for f in REQUIRED[key]):
+                entries.append(entry)
+                ok += 1
+            elif key == "professional_experience" and entries and entry["start_date"] is None:
+                # description line of the entry above
+                previous = entries[-1]
+                previous["role_description"] = "; ".join(filter(None, [previous["role_description"], line]))
+                ok += 1
+        data[key] = entries
+        if key in sections:
+            section_confidence[key] = ok / len(sections[key]) if sections[key] else 1.0
+            parsed_lines += ok
+    data["short_bio"] = data["short_bio"] or _short_bio(data)
+
+    considered = sum(len(sections.get(key, [])) for key in SECTION_PARSERS) + unknown_lines + preamble_unused
+    confidence = parsed_lines / considered if considered else 0.0
+    if not data["full_name"] or not any(data[key] for key in SECTION_MODELS):
+        confidence = 0.0
+    return HeuristicResult(data, round(confidence, 3), section_confidence)
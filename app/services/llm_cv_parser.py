@@ -1,7 +1,21 @@
+import os
+import re
 import json
 from docx import Document as DocxDocument
 from app.utils.audit_logger import logger
-from app.utils.llm_utils import query_openai
+from app.utils.metrics import cv_text_tokens, llm_failures, llm_retries, track_stage
+from app.services.text_compaction import compact_cv_text
+from app.services.llm_output import (
+    FIELDS,
+    SECTION_MODELS,
+    loads_tolerant,
+    loads_tolerant_array,
+    validate_parsed_cv,
+)
+from app.services.model_router import escalate, query_tier, route
+
+# how often invalid or truncated sections are re-asked before they are dropped
+LLM_SECTION_RETRIES = int(os.getenv("LLM_SECTION_RETRIES", 1))
 
 # — your full prompt, with a single placeholder —
 PROMPT_TEMPLATE = """
@@ -42,10 +56,67 @@ Here is the CV:
 {full_text}
 """
 
-def extract_text_from_docx(path: str) -> str:
-    """Load a .docx and return its non-empty paragraphs joined by newlines."""
+# Re-parse of a revised CV: only the changed paragraphs plus the earlier result are sent
+DELTA_PROMPT_TEMPLATE = """
+You are an experienced expert parser.
+
+A CV was parsed earlier into the JSON below. The CV has since been revised; the
+revision is given as a diff of its paragraphs (lines starting with "-" were removed,
+lines starting with "+" were added, other lines are unchanged context).
+
+Return a JSON object with ONLY the top-level fields whose value changes because of
+the revision, each with its complete new value. For list sections return the whole
+updated list, including the entries that did not change. Use the same field names,
+entry fields and normalization as the earlier result. Return {{}} if nothing changes.
+
+Earlier result:
+{previous_json}
+
+Revision:
+{diff}
+"""
+
+# Re-ask for the sections of an answer that were invalid or cut off
+SECTION_PROMPT_TEMPLATE = """
+You are an experienced expert parser.
+
+Carefully read the CV content provided below. Extract ONLY the following fields into
+structured JSON, as an object with exactly these keys:
+{field_specs}
+
+Here is the CV:
+
+{full_text}
+"""
+
+# Several short CVs in one request (bulk ingestion): the PROMPT_TEMPLATE instructions once, then the CVs
+PACKED_PROMPT_TEMPLATE = PROMPT_TEMPLATE.split("Here is the CV:")[0] + """
+Several CVs follow, each between "=== CV <id> ===" and "=== END CV <id> ===".
+Return a JSON array with one object per CV, in the same order. Each object has an "id" key
+with the CV's id plus the fields above. Never mix up information between CVs.
+
+{documents}
+"""
+
+# "- education: list of {degree, ...}" lines of PROMPT_TEMPLATE, by field
+FIELD_SPECS = {
+    key: line.replace("{{", "{").replace("}}", "}")
+    for line, key in re.findall(r"^(- (\w+)(?:: .*)?)$", PROMPT_TEMPLATE, re.M)
+}
+FIELD_SPECS["short_bio"] = "- short_bio: a summary of the person in 2–3 sentences"
+
+def extract_styled_paragraphs_from_docx(path) -> list[tuple[str, str | None]]:
+    """Like extract_paragraphs_from_docx, with each paragraph's style name ("Heading 1", "List Bullet", …)."""
     doc = DocxDocument(path)
-    return "\n".join(p.text.strip() for p in doc.paragraphs if p.text.strip())
+    return [(p.text.strip(), p.style.name if p.style is not None else None) for p in doc.paragraphs if p.text.strip()]
+
+def extract_paragraphs_from_docx(path) -> list[str]:
+    """Load a .docx (path or file-like object) and return its non-empty, stripped paragraphs."""
+    return [text for text, _ in extract_styled_paragraphs_from_docx(path)]
+
+def extract_text_from_docx(path) -> str:
+    """Load a .docx (path or file-like object) and return its non-empty paragraphs joined by newlines."""
+    return "\n".join(extract_paragraphs_from_docx(path))
 
 def parse_cv_with_llm(docx_path: str) -> tuple[dict, str, str]:
     """
@@ -54,9 +125,197 @@ def parse_cv_with_llm(docx_path: str) -> tuple[dict, str, str]:
       - prompt_sent: the actual prompt string we sent
       - raw_response: the LLM’s raw JSON string
     """
-    full_text = extract_text_from_docx(docx_path)
+    with track_stage("extract_text") as sp:
+        paragraphs = extract_paragraphs_from_docx(docx_path)
+        sp.bytes = sum(len(p.encode("utf-8")) for p in paragraphs)
+    compacted = compact_text(paragraphs)
+    cv_text_tokens.inc(compacted.tokens, kind="sent")
+    return parse_cv_text_with_llm(compacted.text)
+
+def compact_text(paragraphs: list[str]):
+    """compact_cv_text with stage timing; counts the raw tokens (callers count what they send)."""
+    with track_stage("compact_text") as sp:
+        compacted = compact_cv_text(paragraphs)
+        sp.rows = len(compacted.lines)
+    cv_text_tokens.inc(compacted.tokens_raw, kind="raw")
+    if compacted.dropped_sections or compacted.trimmed_lines:
+        logger.warning(f"✂️ CV text over the token budget: dropped sections {compacted.dropped_sections}, "
+                       f"trimmed {compacted.trimmed_lines} lines ({compacted.tokens_raw} → {compacted.tokens} tokens)")
+    return compacted
+
+def parse_cv_text_with_llm(full_text: str, tier: str | None = None) -> tuple[dict, str, str]:
+    """
+    Same as parse_cv_with_llm, for text that has already been extracted.
+    If the answer had to be repaired or sections were re-asked, the returned
+    JSON string is the merged, validated result rather than the raw answer.
+    The model tier is picked by model_router; an undecodable or implausible
+    answer of a weaker tier is parsed again by the stronger one.
+    """
+    tier = tier or route(full_text)
     prompt = PROMPT_TEMPLATE.format(full_text=full_text)
-    logger.info("🔄 Querying OpenAI for CV parsing…")
-    raw_response = query_openai(prompt)
-    parsed_data = json.loads(raw_response)
-    return parsed_data, prompt, raw_response
+    logger.info(f"🔄 Querying OpenAI for CV parsing ({tier} tier)…")
+    raw_response = query_tier(prompt, tier)
+    try:
+        parsed_data, clean = decode_cv_response(raw_response, full_text, tier)
+    except ValueError:
+        stronger = escalate(tier, "invalid_json")
+        if stronger is None:
+            raise
+        return parse_cv_text_with_llm(full_text, stronger)
+    if not _plausible(parsed_data):
+        stronger = escalate(tier, "implausible")
+        if stronger is not None:
+            return parse_cv_text_with_llm(full_text, stronger)
+    return parsed_data, prompt, raw_response if clean else json.dumps(parsed_data, ensure_ascii=False)
+
+def _plausible(data: dict) -> bool:
+    """Every CV has a name and some entries; an answer without either was misread."""
+    return bool(data.get("full_name")) and any(data.get(key) for key in SECTION_MODELS)
+
+def _decode(raw_response: str, keys=None, expected=None) -> tuple[dict, list[str], bool]:
+    """
+    loads_tolerant + validate_parsed_cv: (valid fields, invalid or truncated fields, repaired).
+    `expected` are the keys a complete answer has (default: `keys`); only those
+    count as cut off when missing from a truncated answer.
+    """
+    keys = keys or FIELDS
+    try:
+        with track_stage("json_decode"):
+            data, truncated, repaired = loads_tolerant(raw_response, keys if expected is None else expected)
+            data, invalid = validate_parsed_cv(data, keys)
+    except ValueError:
+        llm_failures.inc(reason="invalid_json")
+        raise
+    return data, list(dict.fromkeys(invalid + [key for key in truncated if key in keys])), repaired
+
+def _section_prompt(keys: list[str], full_text: str) -> str:
+    return SECTION_PROMPT_TEMPLATE.format(
+        field_specs="\n".join(FIELD_SPECS.get(key, f"- {key}") for key in keys),
+        full_text=full_text,
+    )
+
+def parse_cv_sections_with_llm(full_text: str, keys: list[str], tier: str | None = None) -> tuple[dict, str, str]:
+    """
+    Ask only for the given fields (SECTION_PROMPT_TEMPLATE), e.g. the sections
+    the heuristic parser could not read. Invalid fields are re-asked from the
+    stronger tier if there is one, else left out.
+    Returns (fields, prompt, raw_response).
+    """
+    tier = tier or route(full_text)
+    prompt = _section_prompt(keys, full_text)
+    logger.info(f"🔄 Querying OpenAI for CV sections ({tier} tier): {', '.join(keys)}")
+    raw_response = query_tier(prompt, tier)
+    try:
+        data, bad, _ = _decode(raw_response, keys=keys)
+    except ValueError:
+        stronger = escalate(tier, "invalid_json")
+        if stronger is None:
+            raise
+        return parse_cv_sections_with_llm(full_text, keys, stronger)
+    stronger = escalate(tier, "invalid_section") if bad else None
+    if stronger is not None:
+        part, _, _ = parse_cv_sections_with_llm(full_text, bad, stronger)
+        data.update(part)
+        bad = [key for key in bad if key not in part]
+    for key in bad:
+        llm_failures.inc(reason="invalid_section")
+        logger.warning(f"⚠️ CV section '{key}' is invalid; continuing without it")
+        data.pop(key, None)
+    return data, prompt, raw_response
+
+def decode_cv_response(raw_response: str, full_text: str, tier: str = "strong") -> tuple[dict, bool]:
+    """
+    Validate a PROMPT_TEMPLATE answer section by section. Invalid or cut-off
+    sections are re-asked on their own (SECTION_PROMPT_TEMPLATE) up to
+    LLM_SECTION_RETRIES times, keeping the valid ones; sections still invalid
+    after that are dropped (truncated ones keep their complete entries).
+    Re-asks go to the tier above `tier`, the one that gave the answer, if there is one.
+    Returns (data, clean), clean meaning the raw answer was valid as it came.
+    """
+    data, bad, repaired = _decode(raw_response)
+    clean = not bad and not repaired
+    if bad:
+        tier = escalate(tier, "invalid_section") or tier
+    for _ in range(LLM_SECTION_RETRIES):
+        if not bad:
+            break
+        logger.warning(f"⚠️ Re-asking invalid CV sections ({tier} tier): {', '.join(bad)}")
+        llm_retries.inc(reason="invalid_section")
+        with track_stage("section_reask") as sp:
+            sp.rows = len(bad)
+            try:
+                part, still_bad, _ = _decode(query_tier(_section_prompt(bad, full_text), tier), keys=bad)
+            except ValueError:
+                continue
+        # a field left out of a complete answer has nothing to extract
+        fixed = [key for key in bad if key not in still_bad]
+        data.update({key: part[key] for key in fixed if key in part})
+        bad = [key for key in bad if key not in fixed]
+    for key in bad:
+        llm_failures.inc(reason="invalid_section")
+        logger.warning(f"⚠️ CV section '{key}' is still invalid; continuing without it")
+    return data, clean
+
+def parse_cvs_packed_with_llm(texts: dict[str, str], tier: str) -> tuple[dict[str, dict], list[str], str]:
+    """
+    Parse several CVs ({id: text}) in one request (PACKED_PROMPT_TEMPLATE).
+    Each element of the answer is validated on its own; a CV whose element is
+    missing, invalid, implausible or cut off counts as failed.
+    Returns ({id: data} of the parsed CVs, failed ids, prompt).
+    """
+    documents = "\n\n".join(f"=== CV {doc_id} ===\n{text}\n=== END CV {doc_id} ===" for doc_id, text in texts.items())
+    prompt = PACKED_PROMPT_TEMPLATE.format(documents=documents)
+    logger.info(f"🔄 Querying OpenAI for {len(texts)} packed CVs ({tier} tier)…")
+    raw_response = query_tier(prompt, tier)
+    try:
+        with track_stage("json_decode") as sp:
+            elements, truncated = loads_tolerant_array(raw_response)
+            sp.rows = len(elements)
+    except ValueError as e:
+        llm_failures.inc(reason="invalid_json")
+        logger.warning(f"⚠️ Packed answer is not a JSON array ({e})")
+        return {}, list(texts), prompt
+    if truncated:
+        elements = elements[:-1]
+    parsed: dict[str, dict] = {}
+    for element in elements:
+        if not isinstance(element, dict):
+            continue
+        doc_id = str(element.pop("id", ""))
+        if doc_id not in texts or doc_id in parsed:
+            continue
+        data, invalid = validate_parsed_cv(element)
+        if not invalid and _plausible(data):
+            parsed[doc_id] = data
+    return parsed, [doc_id for doc_id in texts if doc_id not in parsed], prompt
+
+def parse_cv_delta_with_llm(previous_data: dict, diff: str, tier: str | None = None) -> tuple[dict, str, str]:
+    """
+    Ask only for the fields a revision changes (see DELTA_PROMPT_TEMPLATE).
+    The tier is routed by the diff; invalid changes are asked again from the
+    stronger tier if there is one. Returns (changed_fields, prompt, raw_response).
+    """
+    tier = tier or route(diff)
+    prompt = DELTA_PROMPT_TEMPLATE.format(
+        previous_json=json.dumps(previous_data, ensure_ascii=False, separators=(",", ":")),
+        diff=diff,
+    )
+    logger.info(f"🔄 Querying OpenAI for the changes of a revised CV ({tier} tier)…")
+    raw_response = query_tier(prompt, tier)
+    try:
+        # a delta holds only the changed fields, so absent ones were not cut off
+        delta, bad, _ = _decode(raw_response, expected=())
+    except ValueError:
+        stronger = escalate(tier, "invalid_json")
+        if stronger is None:
+            raise
+        return parse_cv_delta_with_llm(previous_data, diff, stronger)
+    stronger = escalate(tier, "invalid_section") if bad else None
+    if stronger is not None:
+        return parse_cv_delta_with_llm(previous_data, diff, stronger)
+    for key in bad:
+        # the earlier value of the field is kept
+        llm_failures.inc(reason="invalid_section")
+        logger.warning(f"⚠️ Ignoring invalid change of CV section '{key}'")
+        delta.pop(key, None)
+    return delta, prompt, raw_response
@@ -0,0 +1,275 @@
+# app/services/llm_output.py
+"""
+Tolerant decoding and validation of the LLM's parsed-CV JSON.
+
+The models mirror the fields parse_cv's upserts read (see PROMPT_TEMPLATE).
+Decoding strips code fences and prose around the object, drops trailing
+commas and closes a truncated answer after its last complete value.
+Validation is per top-level field, so one broken section does not cost the
+others: `validate_parsed_cv` returns the valid fields plus the names of the
+invalid ones, which can then be re-asked on their own.
+"""
+import json
+import re
+from typing import Annotated, Any
+
+from pydantic import BaseModel, BeforeValidator, ConfigDict, TypeAdapter, ValidationError
+
+
+def _loose_str(value: Any) -> str | None:
+    # the LLM writes years as numbers and authors as lists
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        raise ValueError("expected text")
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return ", ".join(value)
+    raise ValueError("expected text")
+
+
+Text = Annotated[str | None, BeforeValidator(_loose_str)]
+
+
+class _Entry(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+
+class EducationEntry(_Entry):
+    degree: Text = None
+    field: Text = None
+    start_date: Text = None
+    end_date: Text = None
+    institution: Text = None
+
+
+class ExperienceEntry(_Entry):
+    title: Text = None
+    company: Text = None
+    start_date: Text = None
+    end_date: Text = None
+    location: Text = None
+    role_type: Text = None
+    role_description: Text = None
+
+
+class LanguageEntry(_Entry):
+    language: Text = None
+    proficiency_written: Text = None
+    proficiency_spoken: Text = None
+
+
+class FurtherEducationEntry(_Entry):
+    title: Text = None
+    start_date: Text = None
+    end_date: Text = None
+    institution: Text = None
+
+
+class CertificationEntry(_Entry):
+    name: Text = None
+    issuer: Text = None
+    start_date: Text = None
+    end_date: Text = None
+
+
+class AwardEntry(_Entry):
+    name: Text = None
+    awarded_by: Text = None
+    start_date: Text = None
+    end_date: Text = None
+
+
+class PublicationEntry(_Entry):
+    start_date: Text = None
+    end_date: Text = None
+    title: Text = None
+    journal: Text = None
+    authors: Text = None
+
+
+class PersonalAchievementEntry(_Entry):
+    start_date: Text = None
+    end_date: Text = None
+    achievement: Text = None
+    description: Text = None
+
+
+class PrivateMilestoneEntry(_Entry):
+    start_date: Text = None
+    end_date: Text = None
+    event: Text = None
+    description: Text = None
+
+
+SCALAR_FIELDS = ("full_name", "email", "phone", "linkedin", "github", "website", "short_bio")
+SECTION_MODELS = {
+    "education": EducationEntry,
+    "professional_experience": ExperienceEntry,
+    "languages": LanguageEntry,
+    "further_education": FurtherEducationEntry,
+    "certifications": CertificationEntry,
+    "awards": AwardEntry,
+    "publications": PublicationEntry,
+    "personal_achievements": PersonalAchievementEntry,
+    "private_milestones": PrivateMilestoneEntry,
+}
+FIELDS = SCALAR_FIELDS + tuple(SECTION_MODELS)
+
+_scalar = TypeAdapter(Text)
+_sections = {key: TypeAdapter(list[model] | None) for key, model in SECTION_MODELS.items()}
+
+_fence = re.compile(r"^\s*```[a-zA-Z]*\s*\n?|\n?\s*```\s*$")
+_trailing_comma = re.compile(r",\s*([}\]])")
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Remove commas before } or ], outside of strings."""
+    out, in_string, escaped = [], False, False
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == ",":
+            m = _trailing_comma.match(text, i)
+            if m:
+                i = m.start(1)
+                continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _close_truncated(text: str) -> tuple[str, list[str]]:
+    """
+    Cut a truncated JSON object back to its last complete value and close the
+    open brackets. Also returns the top-level keys that were still open at the
+    cut, whose values are therefore incomplete.
+
+    Cuts are only made between top-level values or between the elements of a
+    top-level value, so a half-received entry is dropped rather than kept
+    without its remaining fields.
+    """
+    stack, in_string, escaped = [], False, False
+    cut, cut_stack = None, []
+    key_start, current_key, last_string = None, None, None
+    for i, c in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+                last_string = text[key_start + 1:i]
+            continue
+        if c == '"':
+            in_string, key_start = True, i
+        elif c == ":" and len(stack) == 1:
+            current_key = last_string
+        elif c in "{[":
+            stack.append((c, current_key))
+        elif c in "}]":
+            stack.pop()
+            if not stack:
+                return text[:i + 1], []
+        elif c == "," and len(stack) <= 2:
+            cut, cut_stack = i, list(stack)
+    if cut is None:
+        raise ValueError("no complete value in the answer")
+    closing = "".join("}" if b == "{" else "]" for b, _ in reversed(cut_stack))
+    open_keys = [key for _, key in cut_stack[1:2] if key]
+    return text[:cut] + closing, open_keys
+
+
+def loads_tolerant(raw: str, expected=FIELDS) -> tuple[dict, list[str], bool]:
+    """
+    Decode the LLM's answer. Returns (object, keys cut off by truncation, repaired),
+    `repaired` being False if the answer was valid JSON as it came. The keys cut
+    off are the ones still open at the cut and those of `expected` (the keys the
+    prompt asked for) that never arrived.
+    Raises ValueError if no JSON object can be recovered.
+    """
+    try:
+        data = json.loads(raw)
+        if isinstance(data, dict):
+            return data, [], False
+    except json.JSONDecodeError:
+        pass
+
+    text = _fence.sub("", raw.strip())
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("no JSON object in the answer")
+    text = _strip_trailing_commas(text[start:])
+    truncated: list[str] = []
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text)
+    except json.JSONDecodeError:
+        text, truncated = _close_truncated(text)
+        data = json.loads(text)
+        # everything after the cut never arrived
+        truncated += [key for key in expected if key not in data and key not in truncated]
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+    return data, truncated, True
+
+
+def loads_tolerant_array(raw: str) -> tuple[list, bool]:
+    """
+    loads_tolerant for an answer that should be a JSON array. Returns (elements,
+    truncated); if truncated, the last element may be incomplete. An object
+    wrapping the array ({"results": [...]}) or keyed by id ({"1": {...}}) is
+    turned into the array, with the keys as "id".
+    """
+    truncated = False
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        text = _fence.sub("", raw.strip())
+        starts = [i for i in (text.find("["), text.find("{")) if i >= 0]
+        if not starts:
+            raise ValueError("no JSON array in the answer")
+        text = _strip_trailing_commas(text[min(starts):])
+        try:
+            data, _ = json.JSONDecoder().raw_decode(text)
+        except json.JSONDecodeError:
+            text, _ = _close_truncated(text)
+            data, truncated = json.loads(text), True
+    if isinstance(data, dict):
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(data) == 1 and lists:
+            data = lists[0]
+        elif data and all(isinstance(value, dict) for value in data.values()):
+            data = [{"id": key, **value} for key, value in data.items()]
+    if not isinstance(data, list):
+        raise ValueError(f"expected a JSON array, got {type(data).__name__}")
+    return data, truncated
+
+
+def validate_parsed_cv(data: dict, keys=FIELDS) -> tuple[dict, list[str]]:
+    """(valid fields with their cleaned values, names of invalid fields) for `keys` of `data`."""
+    valid, invalid = {}, []
+    for key in keys:
+        if key not in data:
+            continue
+        try:
+            if key in _sections:
+                entries = _sections[key].validate_python(data[key]) or []
+                valid[key] = [entry.model_dump() for entry in entries]
+            else:
+                valid[key] = _scalar.validate_python(data[key])
+        except ValidationError:
+            invalid.append(key)
+    # fields the prompt does not ask for are passed through untouched
+    valid.update({key: value for key, value in data.items() if key not in FIELDS})
+    return valid, invalid
@@ -0,0 +1,117 @@
+# app/services/model_router.py
+"""
+Routing of LLM requests to a model tier by how hard the CV looks.
+
+Short English CVs with few sections go to the fast tier, the rest to the
+strong tier. llm_cv_parser escalates a fast-tier answer to the strong tier
+when it fails validation or looks implausible (no name, no entries).
+
+Routing and escalation counts and the latency of each tier are exported as
+cv_llm_route_total, cv_llm_escalations_total and cv_llm_call_seconds, so the
+ROUTER_* thresholds can be tuned from data: a high escalation rate of the fast
+tier means its thresholds are too generous.
+"""
+import os
+import re
+import time
+from dataclasses import dataclass
+
+from app.utils.audit_logger import logger
+from app.utils.llm_utils import LLM_MODEL, query_openai
+from app.utils.metrics import llm_call_seconds, llm_escalations, llm_routes
+from app.services.text_compaction import estimate_tokens, split_sections
+
+LLM_ROUTING = os.getenv("LLM_ROUTING", "true").lower() in ("1", "true", "yes")
+LLM_MODEL_FAST = os.getenv("LLM_MODEL_FAST", "gpt-4o-mini")
+LLM_MODEL_STRONG = os.getenv("LLM_MODEL_STRONG", LLM_MODEL)
+# a CV above any of these goes to the strong tier
+ROUTER_MAX_FAST_TOKENS = int(os.getenv("ROUTER_MAX_FAST_TOKENS", 1500))
+ROUTER_MAX_FAST_SECTIONS = int(os.getenv("ROUTER_MAX_FAST_SECTIONS", 10))
+# languages the fast tier handles well (see detect_language)
+ROUTER_FAST_LANGUAGES = set(os.getenv("ROUTER_FAST_LANGUAGES", "en,unknown").split(","))
+
+TIERS = {"fast": LLM_MODEL_FAST, "strong": LLM_MODEL_STRONG}
+ESCALATION = {"fast": "strong"}
+
+# frequent function words; whichever language has the most hits is the CV's
+_STOPWORDS = {
+    "en": {"the", "and", "of", "in", "for", "with", "to", "at", "on", "as", "by", "from", "my", "was", "is"},
+    "de": {"und", "der", "die", "das", "mit", "für", "von", "bei", "im", "zur", "zum", "als", "ich", "ein", "eine"},
+    "fr": {"et", "le", "la", "les", "des", "du", "de", "pour", "avec", "en", "au", "aux", "un", "une", "je"},
+    "es": {"y", "el", "la", "los", "las", "de", "del", "para", "con", "en", "un", "una", "por", "como", "yo"},
+    "it": {"e", "il", "lo", "la", "gli", "le", "di", "del", "della", "per", "con", "un", "una", "da", "nel"},
+}
+_word = re.compile(r"[^\W\d_]+")
+# letters outside Latin script (Cyrillic, Greek, CJK, Arabic, …)
+_non_latin = re.compile(r"[^\W\d_a-zA-ZÀ-ɏ]")
+
+
+@dataclass
+class Complexity:
+    tokens: int
+    sections: int
+    language: str
+
+    @property
+    def tier(self) -> str:
+        if (self.tokens > ROUTER_MAX_FAST_TOKENS or self.sections > ROUTER_MAX_FAST_SECTIONS
+                or self.language not in ROUTER_FAST_LANGUAGES):
+            return "strong"
+        return "fast"
+
+
+def detect_language(text: str) -> str:
+    """One of the _STOPWORDS languages, "other" for non-Latin script or "unknown" if no function words occur."""
+    words = _word.findall(text.casefold())
+    if not words:
+        return "unknown"
+    if sum(bool(_non_latin.search(w)) for w in words) / len(words) > 0.3:
+        return "other"
+    hits = {lang: sum(w in stopwords for w in words) for lang, stopwords in _STOPWORDS.items()}
+    lang, count = max(hits.items(), key=lambda kv: kv[1])
+    return lang if count else "unknown"
+
+
+def score_complexity(text: str) -> Complexity:
+    lines = text.splitlines()
+    sections = sum(name is not None for name, _ in split_sections(lines))
+    return Complexity(estimate_tokens(text), sections, detect_language(text))
+
+
+def pick_tier(text: str) -> str:
+    """The tier for a request about `text` (the strong tier if routing is off)."""
+    if not LLM_ROUTING:
+        return "strong"
+    complexity = score_complexity(text)
+    logger.info(f"🧭 {complexity.tier} tier: {complexity.tokens} tokens, "
+                f"{complexity.sections} sections, language {complexity.language}")
+    return complexity.tier
+
+
+def route(text: str) -> str:
+    """pick_tier, counted in cv_llm_route_total."""
+    tier = pick_tier(text)
+    llm_routes.inc(tier=tier)
+    return tier
+
+
+def escalate(tier: str, reason: str) -> str | None:
+    """The next stronger tier, counting the escalation; None if `tier` is the strongest."""
+    stronger = ESCALATION.get(tier)
+    if stronger is not None:
+        llm_escalations.inc(tier=tier, reason=reason)
+        logger.warning(f"⚠️ Escalating from the {tier} to the {stronger} tier ({reason})")
+    return stronger
+
+
+def query_tier(prompt: str, tier: str) -> str:
+    """query_openai with the tier's model, timed per tier."""
+    t0 = time.perf_counter()
+    outcome = "success"
+    try:
+        return query_openai(prompt, model=TIERS[tier], tier=tier)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        llm_call_seconds.observe(time.perf_counter() - t0, tier=tier, outcome=outcome)
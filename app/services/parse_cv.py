@@ -3,12 +3,17 @@
 import os
 import re
 import json
-from datetime import date
-from docx import Document as DocxDocument
+from datetime import date, datetime
 from dateutil import parser as date_parser
-from db.session import SessionLocal
-from app.utils.audit_logger import logger
-from app.services.llm_cv_parser import parse_cv_with_llm
+from sqlalchemy import text
+from db.session import SessionLocal, add_missing_columns, engine
+from app.utils.audit_logger import logger, log_context
+from app.utils.llm_accounting import collect_llm_calls, llm_call_rows
+from app.utils.metrics import track_stage
+from app.utils.tracing import trace
+from app.services import cv_versions
+from app.services.cv_versions import parse_document
+from app.services.profile_documents import rebuild_profile
 from app.models import (
     Document,
     Person,
@@ -25,10 +30,6 @@ from app.models import (
 from app.services.generate_pdf import generate_cv_pdf
 from app.services.plot_timeline_vertical import plot_timeline_and_save
 
-def extract_text(docx_path: str) -> list[str]:
-    doc = DocxDocument(docx_path)
-    return [p.text.strip() for p in doc.paragraphs if p.text.strip()]
-
 def normalize_date(raw: str, prefer_start=True) -> tuple[date|None, str|None]:
     if not raw:
         return None, None
@@ -42,7 +43,8 @@ def normalize_date(raw: str, prefer_start=True) -> tuple[date|None, str|None]:
         if re.fullmatch(r"\d{4}[-/]\d{2}", raw):
             year, month = map(int, re.split("[-/]", raw))
             return date(year, month, 1), "month"
-        return parsed.date(), "day"
+        # dateutil returns a date when the default is one
+        return (parsed.date() if isinstance(parsed, datetime) else parsed), "day"
     except Exception as e:
         logger.warning(f"⚠️ Date parse failed for '{raw}': {e}")
         return None, None
@@ -75,6 +77,23 @@ def get_or_create_document(session, cv_path: str, uploaded_by="system") -> Docum
         logger.info(f"📄 Found existing Document: {doc.title}")
     return doc
 
+def ensure_schema():
+    """
+    cv_versions.ensure_schema, plus persons.created_by on databases that predate
+    it, filled in from each person's account (registered users) or the
+    uploader of their document.
+    """
+    cv_versions.ensure_schema()
+    if "created_by" in add_missing_columns(Person.__table__):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE persons SET created_by = CASE WHEN password_hash IS NOT NULL THEN CAST(id AS TEXT) "
+                "ELSE (SELECT uploaded_by FROM documents WHERE documents.id = persons.document_id) END"
+            ))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_persons_created_by ON persons (created_by)"))
+        logger.info("🗄️ Added persons.created_by")
+
+
 def get_or_create_person(
     session,
     data: dict,
@@ -85,6 +104,9 @@ def get_or_create_person(
     Given the parsed `data` and the Document record, find or create
     the Person. If `data["email"]` is missing, falls back to `fallback_email`.
     Raises ValueError if neither is provided.
+    A new Person belongs to the document's uploader. Raises PermissionError
+    if the email is another account's person, so that an upload or import
+    can never write into someone else's profile.
     """
     # 1) Determine the email to use
     raw_email = data.get("email") or fallback_email
@@ -96,9 +118,14 @@ def get_or_create_person(
     person = session.query(Person).filter_by(email=email).first()
     if person:
         logger.info(f"🔁 Found existing person: {person.full_name}")
+        if person.created_by not in (None, document.uploaded_by):
+            logger.warning(f"⚠️ Person {person.id} belongs to another account; "
+                           f"not merging document {document.id} into them")
+            raise PermissionError(f"{email} belongs to another account")
         # If this document isn’t already linked, attach it
         if person.document_id != document.id:
             person.document = document
+            person.created_by = document.uploaded_by
             session.flush()
             logger.info(f"🔁 Linked person {person.full_name} to document {document.id}")
     else:
@@ -112,6 +139,7 @@ def get_or_create_person(
             website      = data.get("website", ""),
             short_bio    = data.get("short_bio", ""),
             document     = document,
+            created_by   = document.uploaded_by,
         )
         session.add(person)
         session.flush()
@@ -129,6 +157,7 @@ def get_or_create_person(
 
 
 def upsert_educations(session, person, educations_data):
+    changed = 0
     existing = {
         (e.degree, e.field_of_study, e.institution): e
         for e in person.educations
@@ -162,7 +191,8 @@ def upsert_educations(session, person, educations_data):
                 updated = True
 
             if updated:
-                logger.info(f"🔁 Updated education | Person: {person.full_name} | Key: {key}")
+                changed += 1
+                logger.debug("🔁 Updated education | Person: %s | Key: %s", person.full_name, key)
         else:
             session.add(Education(
                 person_id=person.id,
@@ -174,11 +204,14 @@ def upsert_educations(session, person, educations_data):
                 end_date=end_date,
                 end_date_precision=end_precision
             ))
-            logger.info(f"➕ Added new education | Person: {person.full_name} | Key: {key}")
+            changed += 1
+            logger.debug("➕ Added new education | Person: %s | Key: %s", person.full_name, key)
+    return changed
 
 
 
 def upsert_experiences(session, person, experiences_data):
+    changed = 0
     existing = {
         (e.title, e.company, e.start_date): e
         for e in person.experiences
@@ -216,7 +249,8 @@ def upsert_experiences(session, person, experiences_data):
                 updated = True
 
             if updated:
-                logger.info(f"🔁 Updated experience | Person: {person.full_name} | Key: {key}")
+                changed += 1
+                logger.debug("🔁 Updated experience | Person: %s | Key: %s", person.full_name, key)
         else:
             session.add(Experience(
                 person_id=person.id,
@@ -230,10 +264,13 @@ def upsert_experiences(session, person, experiences_data):
                 role_type=exp_data.get("role_type"),
                 role_description=exp_data.get("role_description"),
             ))
-            logger.info(f"➕ Added new experience | Person: {person.full_name} | Key: {key}")
+            changed += 1
+            logger.debug("➕ Added new experience | Person: %s | Key: %s", person.full_name, key)
+    return changed
 
 
 def upsert_languages(session, person, languages_data):
+    changed = 0
     existing = {
         lang.language.lower(): lang
         for lang in person.languages
@@ -261,7 +298,8 @@ def upsert_languages(session, person, languages_data):
                 updated = True
 
             if updated:
-                logger.info(f"🔁 Updated language | Person: {person.full_name}")
+                changed += 1
+                logger.debug("🔁 Updated language | Person: %s", person.full_name)
         else:
             session.add(Language(
                 person_id=person.id,
@@ -269,11 +307,14 @@ def upsert_languages(session, person, languages_data):
                 proficiency_written=written,
                 proficiency_spoken=spoken
             ))
-            logger.info(f"➕ Added new language | Person: {person.full_name}")
+            changed += 1
+            logger.debug("➕ Added new language | Person: %s", person.full_name)
+    return changed
 
 
 
 def upsert_further_education(session, person, fe_data_list):
+    changed = 0
     existing = {
         (fe.title, fe.institution): fe
         for fe in person.further_education
@@ -306,7 +347,8 @@ def upsert_further_education(session, person, fe_data_list):
                 updated = True
 
             if updated:
-                logger.info(f"🔁 Updated further education | Person: {person.full_name} | Key: {key}")
+                changed += 1
+                logger.debug("🔁 Updated further education | Person: %s | Key: %s", person.full_name, key)
         else:
             session.add(FurtherEducation(
                 person_id=person.id,
@@ -317,10 +359,13 @@ def upsert_further_education(session, person, fe_data_list):
                 end_date=end_date,
                 end_date_precision=end_precision
             ))
-            logger.info(f"➕ Added new further education | Person: {person.full_name} | Key: {key}")
+            changed += 1
+            logger.debug("➕ Added new further education | Person: %s | Key: %s", person.full_name, key)
+    return changed
 
 
 def upsert_certifications(session, person, certs_data):
+    changed = 0
     existing = {
         (c.name, c.issuer): c
         for c in person.certifications
@@ -353,7 +398,8 @@ def upsert_certifications(session, person, certs_data):
                 updated = True
 
             if updated:
-                logger.info(f"🔁 Updated certification | Person: {person.full_name} | Key: {key}")
+                changed += 1
+                logger.debug("🔁 Updated certification | Person: %s | Key: %s", person.full_name, key)
         else:
             session.add(Certification(
                 person_id=person.id,
@@ -364,10 +410,13 @@ def upsert_certifications(session, person, certs_data):
                 end_date=end_date,
                 end_date_precision=end_precision
             ))
-            logger.info(f"➕ Added new certification | Person: {person.full_name} | Key: {key}")
+            changed += 1
+            logger.debug("➕ Added new certification | Person: %s | Key: %s", person.full_name, key)
+    return changed
 
 
 def upsert_awards(session, person, awards_data):
+    changed = 0
     existing = {
         (a.name, a.awarded_by): a
         for a in person.awards
@@ -400,7 +449,8 @@ def upsert_awards(session, person, awards_data):
                 updated = True
 
             if updated:
-                logger.info(f"🔁 Updated award | Person: {person.full_name} | Key: {key}")
+                changed += 1
+                logger.debug("🔁 Updated award | Person: %s | Key: %s", person.full_name, key)
         else:
             session.add(Award(
                 person_id=person.id,
@@ -411,11 +461,14 @@ def upsert_awards(session, person, awards_data):
                 end_date=end_date,
                 end_date_precision=end_precision
             ))
-            logger.info(f"➕ Added new award | Person: {person.full_name} | Key: {key}")
+            changed += 1
+            logger.debug("➕ Added new award | Person: %s | Key: %s", person.full_name, key)
+    return changed
 
 
 
 def upsert_publications(session, person, pubs_data):
+    changed = 0
     existing = {
         (p.title, p.journal): p
         for p in person.publications
@@ -444,7 +497,8 @@ def upsert_publications(session, person, pubs_data):
                 existing_entry.authors = authors
                 updated = True
             if updated:
-                logger.info(f"🔁 Updated publication: {title} @ {journal} | Person: {person.full_name}")
+                changed += 1
+                logger.debug("🔁 Updated publication: %s @ %s | Person: %s", title, journal, person.full_name)
         else:
             session.add(Publication(
                 person_id=person.id,
@@ -454,9 +508,12 @@ def upsert_publications(session, person, pubs_data):
                 publication_date=pub_date,
                 publication_date_precision=pub_precision
             ))
-            logger.info(f"➕ Added new publication: {title} @ {journal} | Person: {person.full_name}")
+            changed += 1
+            logger.debug("➕ Added new publication: %s @ %s | Person: %s", title, journal, person.full_name)
+    return changed
 
 def upsert_personal_achievements(session, person, achievements_data):
+    changed = 0
     existing = {
         (a.achievement or "", a.description or ""): a
         for a in person.personal_achievements
@@ -487,7 +544,8 @@ def upsert_personal_achievements(session, person, achievements_data):
                 existing_entry.end_date_precision = end_precision
                 updated = True
             if updated:
-                logger.info(f"🔁 Updated personal achievement: {title} | Person: {person.full_name}")
+                changed += 1
+                logger.debug("🔁 Updated personal achievement: %s | Person: %s", title, person.full_name)
         else:
             session.add(PersonalAchievement(
                 person_id=person.id,
@@ -498,10 +556,13 @@ def upsert_personal_achievements(session, person, achievements_data):
                 end_date=end_date,
                 end_date_precision=end_precision
             ))
-            logger.info(f"➕ Added new personal achievement: {title} | Person: {person.full_name}")
+            changed += 1
+            logger.debug("➕ Added new personal achievement: %s | Person: %s", title, person.full_name)
+    return changed
 
 
 def upsert_private_milestones(session, person, milestones_data):
+    changed = 0
     existing = {
         (m.event or "", m.description or ""): m
         for m in person.private_milestones
@@ -532,7 +593,8 @@ def upsert_private_milestones(session, person, milestones_data):
                 existing_entry.end_date_precision = end_precision
                 updated = True
             if updated:
-                logger.info(f"🔁 Updated private milestone: {event} | Person: {person.full_name}")
+                changed += 1
+                logger.debug("🔁 Updated private milestone: %s | Person: %s", event, person.full_name)
         else:
             session.add(PrivateMilestone(
                 person_id=person.id,
@@ -543,7 +605,9 @@ def upsert_private_milestones(session, person, milestones_data):
                 end_date=end_date,
                 end_date_precision=end_precision
             ))
-            logger.info(f"➕ Added new private milestone: {event} | Person: {person.full_name}")
+            changed += 1
+            logger.debug("➕ Added new private milestone: %s | Person: %s", event, person.full_name)
+    return changed
 
 
 ##################################################################################################################
@@ -552,6 +616,47 @@ def upsert_private_milestones(session, person, milestones_data):
 #
 ##################################################################################################################
 
+# section key in the parsed CV dict -> upsert function
+SECTION_UPSERTS = [
+    ("education", upsert_educations),
+    ("professional_experience", upsert_experiences),
+    ("languages", upsert_languages),
+    ("further_education", upsert_further_education),
+    ("certifications", upsert_certifications),
+    ("awards", upsert_awards),
+    ("publications", upsert_publications),
+    ("personal_achievements", upsert_personal_achievements),
+    ("private_milestones", upsert_private_milestones),
+]
+
+
+def upsert_parsed_data(
+    session,
+    document: Document,
+    data: dict,
+    fallback_email: str | None = None,
+    changes: dict | None = None,
+) -> Person:
+    """
+    Find or create the Person for `data`, upsert every CV section and rebuild
+    the person's profile document. Flushes but does not commit; the caller
+    owns the transaction.
+    If `changes` is given, it receives the inserted/updated row count per section.
+    """
+    with track_stage("upsert_parsed_data") as total:
+        person = get_or_create_person(session, data, document, fallback_email)
+        total.rows = 0
+        with log_context(person_id=person.id):
+            for key, fn in SECTION_UPSERTS:
+                with log_context(stage=fn.__name__), track_stage(fn.__name__) as sp:
+                    sp.rows = fn(session, person, data.get(key) or [])
+                total.rows += sp.rows
+                if changes is not None:
+                    changes[key] = sp.rows
+        rebuild_profile(session, person.id)
+    return person
+
+
 # app/services/parse_cv.py
 
 def parse_and_store(
@@ -562,40 +667,35 @@ def parse_and_store(
     Parse the document, upsert all data, and return the person_id.
     If the parser fails to extract an email, use fallback_email instead.
     """
+    with log_context(document_id=doc_id), trace(doc_id), track_stage("parse_and_store"):
+        return _parse_and_store(doc_id, fallback_email)
+
+
+def _parse_and_store(doc_id: int, fallback_email: str | None) -> int | None:
     session = SessionLocal()
+    llm_calls = []
     try:
         doc = session.get(Document, doc_id)
         if not doc:
             logger.error(f"❌ No Document {doc_id}")
             return
 
-        # 1) delegate parsing to LLM
-        data, prompt, structured = parse_cv_with_llm(doc.source_filename)
+        # 1) delegate parsing to LLM (only the changes, if this revises an earlier upload)
+        with collect_llm_calls(llm_calls):
+            data, prompt, structured = parse_document(session, doc)
         doc.llm_prompt = prompt
         doc.llm_response = structured
+        session.add_all(llm_call_rows(doc.id, llm_calls))
         session.flush()
 
-        # 2) upsert person, passing our fallback
-        person = get_or_create_person(session, data, doc, fallback_email)
-
-        # 3) upsert all the sections
-        mapping = [
-            ("education", upsert_educations),
-            ("professional_experience", upsert_experiences),
-            ("languages", upsert_languages),
-            ("further_education", upsert_further_education),
-            ("certifications", upsert_certifications),
-            ("awards", upsert_awards),
-            ("publications", upsert_publications),
-            ("personal_achievements", upsert_personal_achievements),
-            ("private_milestones", upsert_private_milestones),
-        ]
-        for key, fn in mapping:
-            fn(session, person, data.get(key) or [])
+        # 2+3) upsert person (with our fallback email) and all the sections
+        person = upsert_parsed_data(session, doc, data, fallback_email)
 
         # 4) mark parsed & commit
         doc.status = "parsed"
-        session.commit()
+        with track_stage("commit"):
+            session.commit()
+        llm_calls = []      # stored with the commit
         logger.info(f"✅ Finished parsing Document {doc_id} for Person ID {person.id}")
 
         # 5) generate PDF & timeline
@@ -604,7 +704,8 @@ def parse_and_store(
 
         # 6) mark complete
         doc.status = "complete"
-        session.commit()
+        with track_stage("commit"):
+            session.commit()
         logger.info(f"🎉 All steps done for Document {doc_id}")
 
         return person.id
@@ -612,6 +713,19 @@ def parse_and_store(
     except Exception as e:
         session.rollback()
         logger.error(f"❌ parse_and_store({doc_id}) failed: {e}")
+        _keep_llm_calls(session, doc_id, llm_calls)
         raise
     finally:
         session.close()
+
+
+def _keep_llm_calls(session, doc_id: int, llm_calls: list):
+    # the calls were paid for even though parsing failed
+    if not llm_calls:
+        return
+    try:
+        session.add_all(llm_call_rows(doc_id, llm_calls))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"⚠️ Could not store {len(llm_calls)} LLM calls of doc {doc_id}: {e}")
@@ -17,6 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 from db.session import SessionLocal
 from app.models import Person, Visualization
 from app.utils.audit_logger import logger
+from app.utils.metrics import track_stage
+from app.utils.tracing import annotate
 
 # ───── helper funcs ─────
 
@@ -89,6 +91,7 @@ def collect_timeline_events(person):
 
 # ───── main plotting + save ─────
 
+@track_stage("plot_timeline_and_save")
 def plot_timeline_and_save(person_id: int, document_id: int, save_dir: str = "static/timelines"):
     """
     1) Load Person
@@ -102,9 +105,11 @@ def plot_timeline_and_save(person_id: int, document_id: int, save_dir: str = "st
         person = session.get(Person, person_id)
         if not person:
             logger.error(f"❌ No person found ({person_id})")
+            annotate(error=f"No Person #{person_id}")
             return
 
         events = collect_timeline_events(person)
+        annotate(rows=len(events))
 
         # bucket events for rows
         buckets = {
@@ -167,6 +172,7 @@ def plot_timeline_and_save(person_id: int, document_id: int, save_dir: str = "st
         rel = os.path.join(save_dir, fn)
         plt.savefig(rel, dpi=300, bbox_inches="tight")
         plt.close(fig)
+        annotate(bytes=os.path.getsize(rel))
 
         logger.info(f"📸 Saved timeline image {rel}")
         register_visualization(
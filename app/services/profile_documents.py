@@ -0,0 +1,178 @@
+# app/services/profile_documents.py
+"""
+Read model of full profiles: one profile_documents row per person holding the
+JSON of the Person with every CV section, so GET /persons/{id}/profile is a
+single-row read instead of Person plus ten child collections.
+
+The row is rebuilt inside the transaction that changes the person (the
+upserts in parse_cv and the edit routes call rebuild_profile before they
+commit), so it is never newer or older than the tables it is built from.
+Its version only moves when the body actually changes, so it doubles as the
+profile's ETag.
+
+Persons that predate the table get their row on first read, or all at once:
+
+    python -m app.services.profile_documents --rebuild
+
+Person endpoints take a sparse fieldset, `fields=experiences,languages`:
+only those sections are loaded (one selectinload each, the others raise if
+touched) and returned, next to the person's own columns, which are always
+included.
+"""
+import argparse
+import json
+from datetime import datetime
+from functools import lru_cache
+
+from pydantic import BaseModel, create_model
+from sqlalchemy import select
+from sqlalchemy.orm import raiseload, selectinload
+
+from db.session import SessionLocal, engine
+from app import schemas
+from app.models import Person, ProfileDocument
+from app.utils.audit_logger import logger
+from app.utils.metrics import track_stage
+
+PROFILE_COLLECTIONS = (
+    Person.experiences,
+    Person.skills,
+    Person.educations,
+    Person.languages,
+    Person.certifications,
+    Person.awards,
+    Person.further_education,
+    Person.publications,
+    Person.personal_achievements,
+    Person.private_milestones,
+)
+PROFILE_SECTIONS = {c.key: c for c in PROFILE_COLLECTIONS}
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    """
+    The sections named in a `fields=` value, in PROFILE_SECTIONS order (all of
+    them if `fields` is None). Raises ValueError for unknown names.
+    """
+    if fields is None:
+        return tuple(PROFILE_SECTIONS)
+    wanted = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = wanted - set(PROFILE_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; "
+                         f"available: {', '.join(PROFILE_SECTIONS)}")
+    return tuple(name for name in PROFILE_SECTIONS if name in wanted)
+
+
+def section_options(sections: tuple[str, ...]) -> list:
+    """Loader options fetching `sections` and refusing to lazy-load the others."""
+    return [selectinload(c) if c.key in sections else raiseload(c) for c in PROFILE_COLLECTIONS]
+
+
+@lru_cache(maxsize=None)
+def person_model(sections: tuple[str, ...]) -> type[BaseModel]:
+    """schemas.Person trimmed to its own columns plus `sections`."""
+    if sections == tuple(PROFILE_SECTIONS):
+        return schemas.Person
+    return create_model(
+        f"Person_{'_'.join(sections) or 'basic'}",
+        __base__=schemas.PersonEditable,
+        id=(int, ...),
+        **{name: (schemas.Person.model_fields[name].annotation, []) for name in sections},
+    )
+
+
+def load_person(session, person_id: int, sections: tuple[str, ...]) -> BaseModel | None:
+    """The person with only `sections` loaded, as person_model(sections) (None if there is no such person)."""
+    # populate_existing: the upserts add child rows by person_id, so loaded collections can be stale
+    person = session.get(Person, person_id, options=section_options(sections), populate_existing=True)
+    if person is None:
+        return None
+    return person_model(sections).model_validate(person)
+
+
+def trim_profile(body: str, sections: tuple[str, ...]) -> str:
+    """A stored profile body with only `sections` (and the person's own columns)."""
+    if sections == tuple(PROFILE_SECTIONS):
+        return body
+    data = json.loads(body)
+    dropped = set(PROFILE_SECTIONS) - set(sections)
+    return json.dumps({key: value for key, value in data.items() if key not in dropped},
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+def build_profile(session, person_id: int) -> str | None:
+    """The profile JSON of a person assembled from the ORM (None if there is no such person)."""
+    person = load_person(session, person_id, tuple(PROFILE_SECTIONS))
+    return None if person is None else person.model_dump_json()
+
+
+def rebuild_profile(session, person_id: int) -> ProfileDocument | None:
+    """
+    Rebuild the person's profile row in the caller's transaction (flushes
+    pending changes first, does not commit).
+    """
+    with track_stage("rebuild_profile") as sp:
+        session.flush()
+        body = build_profile(session, person_id)
+        if body is None:
+            return None
+        sp.bytes = len(body)
+        doc = session.get(ProfileDocument, person_id)
+        if doc is None:
+            doc = ProfileDocument(person_id=person_id, version=1, body=body, updated_at=datetime.utcnow())
+            session.add(doc)
+        elif doc.body != body:
+            doc.version += 1
+            doc.body = body
+            doc.updated_at = datetime.utcnow()
+        session.flush()
+        return doc
+
+
+def get_profile(session, person_id: int) -> ProfileDocument | None:
+    """The stored profile row; built (and committed) on first read for persons without one."""
+    doc = session.get(ProfileDocument, person_id)
+    if doc is None:
+        doc = rebuild_profile(session, person_id)
+        if doc is not None:
+            session.commit()
+    return doc
+
+
+def ensure_table():
+    """Create profile_documents on databases that predate it."""
+    ProfileDocument.__table__.create(bind=engine, checkfirst=True)
+
+
+def rebuild_all(batch_size: int = 500) -> int:
+    """Rebuild every person's profile row; returns how many there are."""
+    ensure_table()
+    session = SessionLocal()
+    try:
+        ids = session.scalars(select(Person.id).order_by(Person.id)).all()
+        for i, person_id in enumerate(ids, 1):
+            rebuild_profile(session, person_id)
+            if i % batch_size == 0:
+                session.commit()
+                session.expunge_all()
+        session.commit()
+        return len(ids)
+    finally:
+        session.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rebuild", action="store_true", help="rebuild the profile rows of all persons")
+    args = ap.parse_args()
+    if not args.rebuild:
+        ap.print_help()
+        return
+    count = rebuild_all()
+    logger.info(f"🗂️ Rebuilt {count} profile documents")
+    print(f"{count} profile documents rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+# app/services/profile_import.py
+"""
+Import of machine-readable profiles, without the LLM.
+
+    python -m app.services.profile_import resumes.json linkedin_export.zip --uploaded-by 12 --render
+
+Accepted formats:
+- JSON Resume (https://jsonresume.org/schema): a .json file holding one
+  resume or an array of them
+- LinkedIn data export: the .zip archive ("Get a copy of your data"), read
+  from its Profile, Email Addresses, PhoneNumbers, Positions, Education,
+  Languages, Certifications, Honors, Publications and Projects CSVs
+
+Each profile is mapped to the dict the LLM parser returns (see
+PROMPT_TEMPLATE) and stored through the same upserts, so an imported person
+is indistinguishable from a parsed one. The mapped dict is kept as the
+document's llm_response, the prompt stays empty. Awards without an issuer,
+which the awards upsert skips, are kept as personal achievements.
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+from dataclasses import dataclass
+
+from db.session import SessionLocal
+from app.models import Document
+from app.utils.audit_logger import logger, log_context
+from app.utils.metrics import cv_parse_modes, track_stage
+from app.utils.tracing import trace
+from app.services.heuristic_parser import iso_date
+from app.services.llm_output import SECTION_MODELS, validate_parsed_cv
+from app.services.parse_cv import ensure_schema, upsert_parsed_data
+from app.services.bulk_ingest import render
+
+IMPORT_UPLOAD_DIR = os.path.abspath(os.path.join(os.getcwd(), "static", "uploads", "imports"))
+# profiles accepted per import request / CLI run
+IMPORT_MAX_PROFILES = int(os.getenv("IMPORT_MAX_PROFILES", 500))
+
+# LinkedIn's language proficiency labels, in normalize_proficiency's terms
+LINKEDIN_PROFICIENCY = {
+    "native or bilingual proficiency": "native",
+    "full professional proficiency": "professional",
+    "professional working proficiency": "professional",
+    "limited working proficiency": "intermediate",
+    "elementary proficiency": "basic",
+}
+_websites = re.compile(r"(?:[A-Z_]+:)?(https?://[^,\]\s]+)")
+
+
+@dataclass
+class Profile:
+    name: str               # file name, "#n" for the n-th resume of a JSON array
+    source: str             # stored copy of the file it came from
+    data: dict | None = None
+    error: str | None = None
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _join(*parts) -> str | None:
+    return "\n".join(p for p in map(_text, parts) if p) or None
+
+
+def _profile_url(profiles: list[dict], network: str, base: str) -> str | None:
+    for profile in profiles:
+        if (profile.get("network") or "").strip().lower() == network:
+            if profile.get("url"):
+                return profile["url"]
+            if profile.get("username"):
+                return f"{base}{profile['username']}"
+    return None
+
+
+def _awards_or_achievements(awards: list[dict]) -> tuple[list[dict], list[dict]]:
+    """(awards with an issuer, the rest as personal achievements)"""
+    with_issuer = [a for a in awards if a["awarded_by"]]
+    achievements = [
+        {"start_date": a["start_date"], "end_date": a["end_date"], "achievement": a["name"],
+         "description": a.get("description")}
+        for a in awards if not a["awarded_by"]
+    ]
+    return [{k: v for k, v in a.items() if k != "description"} for a in with_issuer], achievements
+
+
+def from_json_resume(resume: dict) -> dict:
+    """The parser dict of a JSON Resume document."""
+    basics = resume.get("basics") or {}
+    profiles = basics.get("profiles") or []
+
+    def experience(entry: dict, role_type: str | None) -> dict:
+        return {
+            "title": _text(entry.get("position")),
+            "company": _text(entry.get("name") or entry.get("company") or entry.get("organization")),
+            "start_date": _text(entry.get("startDate")),
+            "end_date": _text(entry.get("endDate")) or "present",
+            "location": _text(entry.get("location")),
+            "role_type": role_type,
+            "role_description": _join(entry.get("summary") or entry.get("description"),
+                                      *(entry.get("highlights") or [])),
+        }
+
+    awards, achievements = _awards_or_achievements([
+        {"name": _text(e.get("title")), "awarded_by": _text(e.get("awarder")),
+         "start_date": _text(e.get("date")), "end_date": _text(e.get("date")), "description": _text(e.get("summary"))}
+        for e in resume.get("awards") or []
+    ])
+    return {
+        "full_name": _text(basics.get("name")),
+        "email": _text(basics.get("email")),
+        "phone": _text(basics.get("phone")),
+        "linkedin": _profile_url(profiles, "linkedin", "https://www.linkedin.com/in/"),
+        "github": _profile_url(profiles, "github", "https://github.com/"),
+        "website": _text(basics.get("url") or basics.get("website")),
+        "short_bio": _text(basics.get("summary")),
+        "education": [
+            {
+                "degree": _text(e.get("studyType")),
+                "field": _text(e.get("area")),
+                "start_date": _text(e.get("startDate")),
+                "end_date": _text(e.get("endDate")),
+                "institution": _text(e.get("institution")),
+            }
+            for e in resume.get("education") or []
+        ],
+        "professional_experience": (
+            [experience(e, None) for e in resume.get("work") or []]
+            + [experience(e, "volunteer") for e in resume.get("volunteer") or []]
+        ),
+        "languages": [
+            {
+                "language": _text(e.get("language")),
+                "proficiency_written": _text(e.get("fluency")),
+                "proficiency_spoken": _text(e.get("fluency")),
+            }
+            for e in resume.get("languages") or []
+        ],
+        "further_education": [],
+        "certifications": [
+            {"name": _text(e.get("name")), "issuer": _text(e.get("issuer")),
+             "start_date": _text(e.get("date")), "end_date": _text(e.get("date"))}
+            for e in resume.get("certificates") or []
+        ],
+        "awards": awards,
+        "publications": [
+            {"start_date": _text(e.get("releaseDate")), "end_date": _text(e.get("releaseDate")),
+             "title": _text(e.get("name")), "journal": _text(e.get("publisher")), "authors": None}
+            for e in resume.get("publications") or []
+        ],
+        "personal_achievements": [
+            {"start_date": _text(e.get("startDate")), "end_date": _text(e.get("endDate")),
+             "achievement": _text(e.get("name")),
+             "description": _join(e.get("description"), *(e.get("highlights") or []))}
+            for e in resume.get("projects") or []
+        ] + achievements,
+        "private_milestones": [],
+    }
+
+
+def _linkedin_csvs(archive: zipfile.ZipFile) -> dict[str, list[dict]]:
+    """Rows of every CSV in the export, by lower-case file name without extension."""
+    tables = {}
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+        if not name.lower().endswith(".csv"):
+            continue
+        text = archive.read(info).decode("utf-8-sig")
+        rows = [{k.strip(): (v or "").strip() for k, v in row.items() if k} for row in csv.DictReader(io.StringIO(text))]
+        tables[name[:-4].lower()] = rows
+    return tables
+
+
+def _linkedin_date(value: str | None) -> str | None:
+    # "Jan 2020", "2015" or "Oct 15, 2019"
+    return iso_date(value) if value else None
+
+
+def from_linkedin_export(archive: zipfile.ZipFile) -> dict:
+    """The parser dict of a LinkedIn data export."""
+    tables = _linkedin_csvs(archive)
+    if "profile" not in tables and "positions" not in tables:
+        raise ValueError("not a LinkedIn data export (no Profile.csv or Positions.csv)")
+    profile = (tables.get("profile") or [{}])[0]
+    emails = tables.get("email addresses") or []
+    primary = next((e for e in emails if e.get("Primary", "").lower() == "yes"), emails[0] if emails else {})
+    phones = tables.get("phonenumbers") or tables.get("phone numbers") or []
+    websites = _websites.findall(profile.get("Websites", ""))
+
+    def dated(row: dict, start: str, end: str | None = None) -> dict:
+        return {"start_date": _linkedin_date(row.get(start)), "end_date": _linkedin_date(row.get(end or start))}
+
+    awards, achievements = _awards_or_achievements([
+        {"name": _text(row.get("Title")), "awarded_by": _text(row.get("Issuer")),
+         "description": _text(row.get("Description")), **dated(row, "Issued On")}
+        for row in tables.get("honors", [])
+    ])
+    return {
+        "full_name": " ".join(filter(None, (profile.get("First Name"), profile.get("Last Name")))) or None,
+        "email": _text(primary.get("Email Address")),
+        "phone": _text(phones[0].get("Number")) if phones else None,
+        "linkedin": _text(profile.get("Profile URL")),
+        "github": next((url for url in websites if "github.com" in url), None),
+        "website": next((url for url in websites if "github.com" not in url), None),
+        "short_bio": _text(profile.get("Summary")) or _text(profile.get("Headline")),
+        "education": [
+            {"degree": _text(row.get("Degree Name")), "field": _text(row.get("Notes")),
+             "institution": _text(row.get("School Name")), **dated(row, "Start Date", "End Date")}
+            for row in tables.get("education", [])
+        ],
+        "professional_experience": [
+            {"title": _text(row.get("Title")), "company": _text(row.get("Company Name")),
+             **dated(row, "Started On", "Finished On"),
+             "location": _text(row.get("Location")), "role_type": None,
+             "role_description": _text(row.get("Description"))}
+            for row in tables.get("positions", [])
+        ],
+        "languages": [
+            {"language": _text(row.get("Name")),
+             "proficiency_written": LINKEDIN_PROFICIENCY.get(row.get("Proficiency", "").lower(),
+                                                             _text(row.get("Proficiency"))),
+             "proficiency_spoken": LINKEDIN_PROFICIENCY.get(row.get("Proficiency", "").lower(),
+                                                            _text(row.get("Proficiency")))}
+            for row in tables.get("languages", [])
+        ],
+        "further_education": [],
+        "certifications": [
+            {"name": _text(row.get("Name")), "issuer": _text(row.get("Authority")),
+             **dated(row, "Started On", "Finished On")}
+            for row in tables.get("certifications", [])
+        ],
+        "awards": awards,
+        "publications": [
+            {"title": _text(row.get("Name")), "journal": _text(row.get("Publisher")), "authors": None,
+             **dated(row, "Published On")}
+            for row in tables.get("publications", [])
+        ],
+        "personal_achievements": [
+            {"achievement": _text(row.get("Title")), "description": _text(row.get("Description")),
+             **dated(row, "Started On", "Finished On")}
+            for row in tables.get("projects", [])
+        ] + achievements,
+        "private_milestones": [],
+    }
+
+
+def _validated(data: dict) -> dict:
+    valid, invalid = validate_parsed_cv(data)
+    if invalid:
+        logger.warning(f"⚠️ Dropped invalid imported fields: {', '.join(invalid)}")
+    for key in SECTION_MODELS:
+        valid.setdefault(key, [])
+    return valid
+
+
+def _store_source(filename: str, data: bytes) -> str:
+    """Keep the original file (content-addressed), like bulk_ingest does for .docx files."""
+    digest = hashlib.sha256(data).hexdigest()
+    ext = os.path.splitext(filename)[1].lower() or ".json"
+    path = os.path.join(IMPORT_UPLOAD_DIR, digest[:2], f"{digest}{ext}")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return path
+
+
+def read_profiles(filename: str, data: bytes) -> list[Profile]:
+    """
+    The profiles of one uploaded file: a LinkedIn export (.zip) or a JSON
+    Resume file (one resume or an array). Raises ValueError for anything else.
+    """
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            mapped = _validated(from_linkedin_export(archive))
+        return [Profile(filename, _store_source(filename, data), mapped)]
+    try:
+        parsed = json.loads(data.decode("utf-8-sig"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"{filename} is neither a LinkedIn export nor JSON: {e}")
+    source = _store_source(filename, data)
+    resumes = parsed if isinstance(parsed, list) else [parsed]
+    profiles = []
+    for n, resume in enumerate(resumes, 1):
+        name = f"{filename}#{n}" if isinstance(parsed, list) else filename
+        if not isinstance(resume, dict) or not isinstance(resume.get("basics"), dict):
+            profiles.append(Profile(name, source, error="not a JSON Resume document (no basics)"))
+            continue
+        profiles.append(Profile(name, source, _validated(from_json_resume(resume))))
+    return profiles
+
+
+def store_profiles(profiles: list[Profile], uploaded_by: str, fallback_email: str | None) -> list[dict]:
+    """
+    Upsert the profiles in one transaction (a savepoint each, so one bad
+    profile does not sink the others). Returns an entry per profile like
+    bulk_ingest's manifest: name, status ("done" / "failed"), document_id,
+    person_id or error.
+    """
+    entries = []
+    session = SessionLocal()
+    try:
+        for profile in profiles:
+            entry = {"name": profile.name}
+            if profile.error:
+                entries.append({**entry, "status": "failed", "error": profile.error})
+                continue
+            try:
+                with session.begin_nested():
+                    doc = Document(
+                        title=profile.name,
+                        source_filename=profile.source,
+                        uploaded_by=uploaded_by,
+                        status="parsed",
+                        llm_response=json.dumps(profile.data, ensure_ascii=False),
+                        text_tokens_sent=0,
+                    )
+                    session.add(doc)
+                    session.flush()
+                    with log_context(document_id=doc.id), trace(doc.id):
+                        person = upsert_parsed_data(session, doc, profile.data, fallback_email)
+                cv_parse_modes.inc(mode="import")
+                entries.append({**entry, "status": "done", "document_id": doc.id, "person_id": person.id})
+            except Exception as e:
+                logger.error(f"❌ Import of {profile.name} failed: {e}")
+                entries.append({**entry, "status": "failed", "error": f"{type(e).__name__}: {e}"})
+        with track_stage("commit"):
+            session.commit()
+        return entries
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="+", help="JSON Resume files and LinkedIn export archives")
+    ap.add_argument("--uploaded-by", default="import", help="Document.uploaded_by (usually the client's user id)")
+    ap.add_argument("--fallback-email", help="email for profiles without one (otherwise they fail)")
+    ap.add_argument("--render", action="store_true", help="also render PDF + timeline per profile")
+    args = ap.parse_args()
+
+    ensure_schema()
+    profiles = []
+    for path in args.paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            profiles += read_profiles(os.path.basename(path), data)
+        except ValueError as e:
+            profiles.append(Profile(os.path.basename(path), path, error=str(e)))
+    if len(profiles) > IMPORT_MAX_PROFILES:
+        ap.error(f"{len(profiles)} profiles, at most {IMPORT_MAX_PROFILES} per run")
+
+    entries = store_profiles(profiles, args.uploaded_by, args.fallback_email)
+    if args.render:
+        render(entries, args.uploaded_by)
+    for entry in entries:
+        print(json.dumps(entry, ensure_ascii=False))
+    done = sum(e["status"] == "done" for e in entries)
+    logger.info(f"📥 Imported {done} of {len(entries)} profiles")
+
+
+if __name__ == "__main__":
+    main()
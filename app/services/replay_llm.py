@@ -0,0 +1,232 @@
+# app/services/replay_llm.py
+"""
+Rebuild Person data from the LLM responses already stored on every Document,
+without calling the LLM again: run it after changing the upserts, date
+normalisation or the schema.
+
+    python -m app.services.replay_llm --workers 4 --batch-size 200
+    python -m app.services.replay_llm --dry-run          # only report what would change
+    python -m app.services.replay_llm --document-id 12 --document-id 15 --render
+
+Documents are streamed in id order, one page at a time, and sharded by person email,
+so all documents of one person are replayed in order by the same worker and
+the last one stays linked, as after the original uploads. Each worker commits
+--batch-size documents per transaction, with one savepoint per document.
+
+Because upserts never delete, a replay only adds and updates rows; the report
+lists those counts per CV section.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import Integer, cast, event, select
+from sqlalchemy.orm import aliased
+
+from db.session import SessionLocal, engine
+from app.models import Document, Person
+from app.utils.audit_logger import logger, log_context
+from app.utils.metrics import track_stage
+from app.services.generate_pdf import generate_cv_pdf
+from app.services.plot_timeline_vertical import plot_timeline_and_save
+from app.services.parse_cv import SECTION_UPSERTS, upsert_parsed_data
+
+SECTIONS = [key for key, _ in SECTION_UPSERTS]
+
+
+def _sqlite_busy_timeout():
+    # several processes use the same SQLite file: wait for locks instead of failing
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _busy_timeout(dbapi_conn, _):
+            dbapi_conn.execute("PRAGMA busy_timeout = 60000")
+
+
+def _init_worker():
+    """
+    On SQLite, take the write lock when the transaction begins (BEGIN IMMEDIATE).
+    With the default deferred BEGIN, two workers that both read and then write
+    deadlock, and SQLite fails one of them without waiting.
+    """
+    _sqlite_busy_timeout()
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _no_implicit_begin(dbapi_conn, _):
+            dbapi_conn.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def iter_documents(session, document_ids: list[int] | None, page_size: int, fallback_email: str | None = None):
+    """
+    (document_id, llm_response, fallback email) for every document with a stored response.
+
+    Pages by id and ends the read transaction after each page: on SQLite an
+    open cursor holds a shared lock that would block the workers' commits.
+    """
+    uploader = aliased(Person)
+    linked = aliased(Person)
+    stmt = (
+        select(Document.id, Document.llm_response, uploader.email, linked.email)
+        # uploads fall back to the uploader's email, like full_pipeline does
+        .outerjoin(uploader, uploader.id == cast(Document.uploaded_by, Integer))
+        .outerjoin(linked, linked.document_id == Document.id)
+        .where(Document.llm_response.isnot(None))
+        .order_by(Document.id)
+        .limit(page_size)
+    )
+    if document_ids:
+        stmt = stmt.where(Document.id.in_(document_ids))
+    last_id = 0
+    while True:
+        rows = session.execute(stmt.where(Document.id > last_id)).all()
+        session.rollback()
+        for doc_id, raw, uploader_email, linked_email in rows:
+            yield doc_id, raw, uploader_email or linked_email or fallback_email
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1][0]
+
+
+def replay_batch(items: list[tuple[int, dict, str | None]], dry_run: bool, render: bool) -> dict:
+    """Re-run the upserts for one batch in one transaction; runs in a worker process."""
+    result = {"documents": 0, "changed": 0, "sections": Counter(), "failed": []}
+    rendered = []
+    session = SessionLocal()
+    try:
+        for doc_id, data, fallback_email in items:
+            result["documents"] += 1
+            changes: dict[str, int] = {}
+            try:
+                with session.begin_nested(), log_context(document_id=doc_id):
+                    doc = session.get(Document, doc_id)
+                    person = upsert_parsed_data(session, doc, data, fallback_email, changes)
+            except Exception as e:
+                result["failed"].append((doc_id, f"{type(e).__name__}: {e}"))
+                continue
+            result["sections"].update(changes)
+            if any(changes.values()):
+                result["changed"] += 1
+                rendered.append((person.id, doc_id))
+        if dry_run:
+            session.rollback()
+            return result
+        with track_stage("commit"):
+            session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    if render:
+        for person_id, doc_id in rendered:
+            try:
+                generate_cv_pdf(person_id, document_id=doc_id)
+                plot_timeline_and_save(person_id, document_id=doc_id)
+            except Exception as e:
+                result["failed"].append((doc_id, f"render: {type(e).__name__}: {e}"))
+    return result
+
+
+def run(args) -> dict:
+    totals = {"documents": 0, "changed": 0, "sections": Counter(), "failed": []}
+    _sqlite_busy_timeout()
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(
+        args.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+    )
+    batches: list[list] = [[] for _ in range(args.workers)]
+    # one batch in flight per shard keeps a person's documents in order
+    pending: list = [None] * args.workers
+
+    def collect(shard: int):
+        future, pending[shard] = pending[shard], None
+        if future is None:
+            return
+        result = future.result()
+        totals["documents"] += result["documents"]
+        totals["changed"] += result["changed"]
+        totals["sections"].update(result["sections"])
+        totals["failed"].extend(result["failed"])
+        rate = totals["documents"] / (time.perf_counter() - started) * 60
+        print(f"\r{totals['documents']:>9} replayed  {totals['changed']:>8} changed  "
+              f"{len(totals['failed']):>6} failed  {rate:>9.0f} docs/min", end="", flush=True)
+
+    def submit(shard: int):
+        collect(shard)
+        pending[shard] = pool.submit(replay_batch, batches[shard], args.dry_run, args.render)
+        batches[shard] = []
+
+    session = SessionLocal()
+    try:
+        for doc_id, raw, fallback_email in iter_documents(
+            session, args.document_id, args.page_size, args.fallback_email
+        ):
+            try:
+                data = json.loads(raw)
+            except json.JSONDecodeError as e:
+                totals["documents"] += 1
+                totals["failed"].append((doc_id, f"JSONDecodeError: {e}"))
+                continue
+            key = (data.get("email") or fallback_email or "").strip().lower()
+            shard = zlib.crc32(key.encode()) % args.workers
+            batches[shard].append((doc_id, data, fallback_email))
+            if len(batches[shard]) >= args.batch_size:
+                submit(shard)
+        for shard in range(args.workers):
+            if batches[shard]:
+                submit(shard)
+            collect(shard)
+    finally:
+        session.close()
+        pool.shutdown()
+    print()
+    totals["elapsed"] = time.perf_counter() - started
+    return totals
+
+
+def report(totals: dict, dry_run: bool):
+    elapsed = totals["elapsed"]
+    verb = "would change" if dry_run else "changed"
+    print(f"{totals['documents']} documents replayed in {elapsed:.1f}s "
+          f"({totals['documents'] / max(elapsed, 1e-9) * 60:.0f} docs/min); "
+          f"{totals['changed']} {verb}, {len(totals['failed'])} failed")
+    print(f"\n{'section':<24} {'rows added/updated':>18}")
+    for key in SECTIONS:
+        print(f"{key:<24} {totals['sections'].get(key, 0):>18}")
+    for doc_id, error in totals["failed"][:20]:
+        print(f"  document {doc_id}: {error}")
+    if len(totals["failed"]) > 20:
+        print(f"  … and {len(totals['failed']) - 20} more")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    ap.add_argument("--batch-size", type=int, default=200, help="documents per transaction")
+    ap.add_argument("--page-size", type=int, default=1000, help="documents read per query")
+    ap.add_argument("--document-id", type=int, action="append", help="replay only these documents")
+    ap.add_argument("--fallback-email", help="for documents whose uploader and linked person are unknown")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="roll back instead of committing (counts are per batch, so they can over-report)")
+    ap.add_argument("--render", action="store_true", help="re-render PDF + timeline of changed documents")
+    args = ap.parse_args()
+
+    logger.info(f"🔁 Replaying stored LLM responses (workers={args.workers}, dry_run={args.dry_run})")
+    totals = run(args)
+    report(totals, args.dry_run)
+    logger.info(f"🔁 Replay finished: {totals['documents']} documents, {totals['changed']} changed, "
+                f"{len(totals['failed'])} failed in {totals['elapsed']:.1f}s")
+    sys.exit(1 if totals["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# app/services/text_compaction.py
+"""
+Compaction of extracted CV text before it goes to the LLM.
+
+1. Unicode NFKC, whitespace runs and tabs collapsed, decorative bullets and
+   separator lines removed, paragraphs split into lines
+2. repeated lines (page headers/footers, pasted boilerplate) kept once
+3. if the estimated token count is over CV_TOKEN_BUDGET, content is cut by
+   value: sections the prompt does not ask for (references, hobbies, …)
+   first, then the tail of the longest sections, then the tail of the text
+
+Token counts are a local estimate (no tokenizer dependency); they run a bit
+high for English, which is the safe side for a budget.
+"""
+import math
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+# budget for the CV text alone; PROMPT_TEMPLATE and the JSON answer need the rest of the context window
+CV_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", 4000))
+# shorter repeated lines ("Responsibilities:", "2019 – 2021") can be legitimate and are kept
+DEDUP_MIN_CHARS = 25
+# a trimmed section keeps at least this many lines
+MIN_SECTION_LINES = 3
+
+BULLETS = "•·●○◦▪▫■□►▶▸‣⁃∙➢➤→✓✔✗✘❖◆◇★☆*-–—"
+_bullet = re.compile(f"^[{re.escape(BULLETS)}]+\\s*")
+_separator = re.compile(r"^[\W_]+$")      # "-----", "____", "* * *", "|"
+_whitespace = re.compile(r"\s+")
+_token = re.compile(r"\w+|[^\w\s]")
+
+# section headings the prompt has no field for; dropped first when over budget
+LOW_VALUE_SECTIONS = (
+    "references", "referees", "recommendations", "testimonials", "declaration",
+    "hobbies", "interests", "hobbies and interests", "additional information",
+    "other", "miscellaneous", "personal details", "personal information",
+)
+# known headings, recognised with or without a trailing colon
+KNOWN_SECTIONS = LOW_VALUE_SECTIONS + (
+    "education", "professional experience", "work experience", "experience", "employment",
+    "languages", "further education", "training", "courses", "certifications", "certificates",
+    "awards", "honors", "publications", "personal achievements", "achievements",
+    "private milestones", "personal milestones", "skills", "profile", "summary",
+    "professional summary", "contact",
+)
+
+
+@dataclass
+class CompactedText:
+    lines: list[str]
+    tokens_raw: int
+    tokens: int
+    dropped_sections: list[str] = field(default_factory=list)
+    trimmed_lines: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly what a BPE tokenizer makes of `text`: short words are one token, long or non-ASCII ones more."""
+    total = 0
+    for piece in _token.findall(text):
+        if piece.isascii():
+            total += math.ceil(len(piece) / 5)
+        else:
+            total += math.ceil(len(piece) / 2)
+    return total
+
+
+def normalize_lines(paragraphs: list[str]) -> list[str]:
+    """Steps 1 and 2 of the module docstring."""
+    lines, seen = [], set()
+    for paragraph in paragraphs:
+        for line in unicodedata.normalize("NFKC", paragraph).splitlines():
+            line = _bullet.sub("", _whitespace.sub(" ", line).strip())
+            if not line or _separator.match(line):
+                continue
+            if len(line) >= DEDUP_MIN_CHARS:
+                key = line.casefold()
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+    return lines
+
+
+def _heading(line: str) -> str | None:
+    name = line.rstrip(":").strip().casefold()
+    if name in KNOWN_SECTIONS or (line.endswith(":") and len(line) <= 40):
+        return name
+    return None
+
+
+def split_sections(lines: list[str]) -> list[tuple[str | None, list[str]]]:
+    """[(heading or None for the preamble, lines incl. the heading line)]"""
+    sections = [(None, [])]
+    for line in lines:
+        name = _heading(line)
+        if name is not None:
+            sections.append((name, [line]))
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def compact_cv_text(paragraphs: list[str], budget: int = CV_TOKEN_BUDGET) -> CompactedText:
+    tokens_raw = estimate_tokens("\n".join(paragraphs))
+    lines = normalize_lines(paragraphs)
+    result = CompactedText(lines, tokens_raw, estimate_tokens("\n".join(lines)))
+    if result.tokens <= budget:
+        return result
+
+    sections = split_sections(lines)
+    costs = [estimate_tokens("\n".join(body)) for _, body in sections]
+    total = sum(costs)
+
+    for i, (name, body) in enumerate(sections):
+        if total <= budget:
+            break
+        if name in LOW_VALUE_SECTIONS:
+            result.dropped_sections.append(name)
+            total -= costs[i]
+            costs[i] = 0
+            sections[i] = (name, [])
+
+    while total > budget:
+        i = max(range(len(sections)), key=lambda k: costs[k])
+        name, body = sections[i]
+        if len(body) <= MIN_SECTION_LINES:
+            break
+        cost = estimate_tokens(body.pop())
+        costs[i] -= cost
+        total -= cost
+        result.trimmed_lines += 1
+
+    lines = [line for _, body in sections for line in body]
+    while total > budget and lines:
+        total -= estimate_tokens(lines.pop())
+        result.trimmed_lines += 1
+
+    result.lines = lines
+    result.tokens = estimate_tokens("\n".join(lines))
+    return result
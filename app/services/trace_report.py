@@ -0,0 +1,86 @@
+# app/services/trace_report.py
+"""
+Flame-style breakdown of the recorded pipeline traces of one document.
+
+    python -m app.services.trace_report 42            # latest run
+    python -m app.services.trace_report 42 --all      # every recorded run
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime
+
+from db.session import SessionLocal
+from app.models import PipelineSpan
+
+BAR_WIDTH = 40
+
+
+def load_traces(session, document_id: int) -> dict[str, list[PipelineSpan]]:
+    """Spans of every trace recorded for the document, newest trace first."""
+    spans = (
+        session.query(PipelineSpan)
+        .filter(PipelineSpan.document_id == document_id)
+        .order_by(PipelineSpan.start, PipelineSpan.span_id)
+        .all()
+    )
+    traces: dict[str, list[PipelineSpan]] = defaultdict(list)
+    for s in spans:
+        traces[s.trace_id].append(s)
+    return dict(sorted(traces.items(), key=lambda kv: kv[1][0].start, reverse=True))
+
+
+def format_trace(spans: list[PipelineSpan]) -> list[str]:
+    children: dict[int | None, list[PipelineSpan]] = defaultdict(list)
+    for s in spans:
+        children[s.parent_id].append(s)
+    roots = children[None]
+    total = sum(s.duration_ms for s in roots) or 1.0
+    t_start = min(s.start for s in spans)
+
+    lines = [f"trace {spans[0].trace_id}  started {datetime.utcfromtimestamp(t_start):%Y-%m-%d %H:%M:%S} UTC"]
+
+    def walk(s: PipelineSpan, depth: int):
+        offset = int((s.start - t_start) * 1000 / total * BAR_WIDTH)
+        width = max(1, round(s.duration_ms / total * BAR_WIDTH))
+        bar = (" " * offset + "█" * width)[:BAR_WIDTH].ljust(BAR_WIDTH)
+        extra = []
+        if s.rows is not None:
+            extra.append(f"rows={s.rows}")
+        if s.bytes is not None:
+            extra.append(f"bytes={s.bytes}")
+        if s.error:
+            extra.append(f"error={s.error}")
+        label = "  " * depth + s.name
+        lines.append(
+            f"{bar} {label:<36} {s.duration_ms:>10.1f}ms {s.duration_ms / total:>6.1%}  {' '.join(extra)}".rstrip()
+        )
+        for child in children[s.span_id]:
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return lines
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("document_id", type=int)
+    ap.add_argument("--all", action="store_true", help="show every recorded run, not just the latest")
+    args = ap.parse_args()
+
+    session = SessionLocal()
+    try:
+        traces = load_traces(session, args.document_id)
+    finally:
+        session.close()
+
+    if not traces:
+        print(f"No traces recorded for document {args.document_id}")
+        return
+    for spans in list(traces.values())[: None if args.all else 1]:
+        print("\n".join(format_trace(spans)))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,86 @@
 # audit_logger.py
 import os
+import json
+import queue
+import atexit
+import random
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 
 # Set audit log directory
-AUDIT_LOG_DIR = r"C:\Users\chasp\Documents\WORK\SKILL SCANNER\SKSC_Prototype\AuditTrail"
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+AUDIT_LOG_DIR = os.getenv("AUDIT_LOG_DIR", os.path.join(PROJECT_ROOT, "AuditTrail"))
 os.makedirs(AUDIT_LOG_DIR, exist_ok=True)
 
+# Fraction of per-row DEBUG events (one per inserted/updated CV row) that are kept
+AUDIT_ROW_SAMPLE_RATE = float(os.getenv("AUDIT_ROW_SAMPLE_RATE", 1.0))
+
+# Structured fields copied onto every record (and into the JSON Lines output)
+CONTEXT_FIELDS = ("document_id", "person_id", "stage")
+
+_log_context: ContextVar[dict] = ContextVar("audit_log_context", default={})
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach document_id / person_id / stage to every audit record logged inside the block."""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class RowEventSampler(logging.Filter):
+    """Keep every INFO+ record; keep DEBUG per-row events with probability `rate`."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the current log_context onto the record, in the caller's thread before it is queued."""
+
+    def filter(self, record):
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class InProcessQueueHandler(QueueHandler):
+    """
+    The queue never leaves this process, so hand the record over as-is and let
+    the listener thread do the formatting instead of the caller.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
 # === General log (human readable)
 log_file = os.path.join(AUDIT_LOG_DIR, "LOGFILE.log")
 log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
@@ -16,12 +90,26 @@ file_handler = TimedRotatingFileHandler(
 )
 file_handler.setFormatter(log_formatter)
 
+# === Structured log (JSON Lines)
+json_handler = TimedRotatingFileHandler(
+    os.path.join(AUDIT_LOG_DIR, "AUDIT.jsonl"), when="midnight", interval=1, backupCount=7, encoding="utf-8"
+)
+json_handler.setFormatter(JsonLinesFormatter())
+
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_formatter)
 
-logger = logging.getLogger("audit")
-logger.setLevel(logging.INFO)
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# === The hot path only enqueues; a background thread does the file/console I/O
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = InProcessQueueHandler(log_queue)
+row_sampler = RowEventSampler(AUDIT_ROW_SAMPLE_RATE)
+queue_handler.addFilter(row_sampler)
+queue_handler.addFilter(ContextFilter())
 
+listener = QueueListener(log_queue, file_handler, json_handler, console_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
 
+logger = logging.getLogger("audit")
+logger.setLevel(logging.DEBUG if AUDIT_ROW_SAMPLE_RATE > 0 else logging.INFO)
+logger.addHandler(queue_handler)
@@ -0,0 +1,126 @@
+# app/utils/llm_accounting.py
+"""
+Per-document accounting of LLM calls: model, tier, prompt and completion
+tokens, latency, retries, hedging and cache hits, stored in llm_calls.
+
+query_openai reports every call to the innermost open collector:
+
+    with collect_llm_calls() as calls:
+        data, prompt, structured = parse_document(session, doc)
+    session.add_all(llm_call_rows(doc.id, calls))
+
+Calls made outside a collector are not stored. A call whose answer served
+several documents (packed requests) is split with `share`, so summing the
+rows of all documents gives the real token count and cost.
+
+Costs are computed when the call is recorded, from LLM_PRICES (USD per
+million prompt / completion tokens), so later price changes do not rewrite
+history. Token counts are the provider's; where it reports none (the offline
+stand-in, abandoned streams) they are estimated and flagged as such.
+"""
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+
+# USD per 1M tokens: (prompt, completion); LLM_PRICES='{"my-model": [1.0, 2.0]}' adds or overrides
+LLM_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-3.5-turbo": (0.5, 1.5),
+    **{model: tuple(prices) for model, prices in json.loads(os.getenv("LLM_PRICES", "{}")).items()},
+}
+
+
+@dataclass
+class LLMCallRecord:
+    model: str | None
+    tier: str | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    retries: int = 0
+    hedged: bool = False
+    cache: str | None = None            # name of the cache that answered instead of the LLM
+    estimated: bool = False             # token counts are estimates, not the provider's
+    error: str | None = None
+    shared_by: int = 1                  # documents the call served (packed requests)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def cost_usd(self) -> float | None:
+        prices = LLM_PRICES.get(self.model) if self.model else (0.0, 0.0)
+        if prices is None:
+            return None
+        return (self.prompt_tokens * prices[0] + self.completion_tokens * prices[1]) / 1_000_000
+
+
+_collector: ContextVar[list[LLMCallRecord] | None] = ContextVar("llm_call_collector", default=None)
+
+
+@contextmanager
+def collect_llm_calls(calls: list[LLMCallRecord] | None = None):
+    """Collect the calls recorded inside the block (into `calls`, if given); yields the list."""
+    calls = [] if calls is None else calls
+    token = _collector.set(calls)
+    try:
+        yield calls
+    finally:
+        _collector.reset(token)
+
+
+def record_llm_call(call: LLMCallRecord):
+    calls = _collector.get()
+    if calls is not None:
+        calls.append(call)
+
+
+def record_cache_hit(cache: str):
+    """An LLM call avoided by reusing an earlier result."""
+    record_llm_call(LLMCallRecord(model=None, cache=cache))
+
+
+def share(calls: list[LLMCallRecord], n: int) -> list[LLMCallRecord]:
+    """Each document's part of calls that served `n` documents: tokens split evenly, latency kept."""
+    if n <= 1:
+        return list(calls)
+    return [
+        replace(call, prompt_tokens=round(call.prompt_tokens / n),
+                completion_tokens=round(call.completion_tokens / n), shared_by=call.shared_by * n)
+        for call in calls
+    ]
+
+
+def llm_call_rows(document_id: int, calls: list[LLMCallRecord]) -> list:
+    """LLMCall rows of `calls` for `document_id`, to be added to the caller's session."""
+    from app.models import LLMCall
+    return [
+        LLMCall(
+            document_id=document_id,
+            created_at=call.created_at,
+            model=call.model,
+            tier=call.tier,
+            prompt_tokens=call.prompt_tokens,
+            completion_tokens=call.completion_tokens,
+            cost_usd=call.cost_usd,
+            latency_ms=round(call.latency_ms, 1),
+            retries=call.retries,
+            hedged=int(call.hedged),
+            cache=call.cache,
+            estimated=int(call.estimated),
+            error=call.error,
+            shared_by=call.shared_by,
+        )
+        for call in calls
+    ]
+
+
+def ensure_table():
+    """Create llm_calls on databases that predate it."""
+    from db.session import engine
+    from app.models import LLMCall
+    LLMCall.__table__.create(bind=engine, checkfirst=True)
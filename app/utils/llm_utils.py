@@ -1,18 +1,287 @@
 import os
+import glob
+import json
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+
+import openai
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from app.services.text_compaction import estimate_tokens
+from app.utils.llm_accounting import LLMCallRecord, record_llm_call
+from app.utils.metrics import (
+    llm_failures,
+    llm_hedged_seconds,
+    llm_hedges,
+    llm_retries,
+    llm_tokens,
+    track_stage,
+)
+
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-def query_openai(prompt):
-    response = client.chat.completions.create(
-        model="gpt-4",  # Or "gpt-3.5-turbo" if you're budget-sensitive
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that extracts structured data from CVs."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.2
-    )
-    return response.choices[0].message.content
+# model for calls that do not name one (model_router picks per tier)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4")
+
+# retries are done here (not inside the SDK) so they show up in the metrics
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Offline stand-in (load tests, local development without an API key): every prompt is
+# answered with one of the recorded responses, with the email removed so the uploader's
+# email is used and each user gets their own person.
+LLM_OFFLINE = os.getenv("LLM_OFFLINE", "false").lower() in ("1", "true", "yes")
+LLM_OFFLINE_FIXTURES = os.getenv("LLM_OFFLINE_FIXTURES", os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks", "fixtures", "llm_responses")
+))
+LLM_OFFLINE_LATENCY_MS = float(os.getenv("LLM_OFFLINE_LATENCY_MS", 0))
+
+# Hedging: a request still running at the LLM_HEDGE_QUANTILE of recent latencies (per model)
+# gets a duplicate; the first answer wins and the other one is abandoned. Hedges are capped
+# at LLM_HEDGE_BUDGET_PER_MINUTE, which bounds the extra cost.
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", 0.9))
+LLM_HEDGE_BUDGET_PER_MINUTE = int(os.getenv("LLM_HEDGE_BUDGET_PER_MINUTE", 10))
+# share of requests never hedged, as the baseline the hedged latencies are compared with
+LLM_HEDGE_CONTROL_SHARE = float(os.getenv("LLM_HEDGE_CONTROL_SHARE", 0.05))
+# latencies kept per model, and how many are needed before hedging starts
+LLM_HEDGE_WINDOW = 200
+LLM_HEDGE_MIN_SAMPLES = 20
+
+SYSTEM_PROMPT = "You are a helpful assistant that extracts structured data from CVs."
+
+client = None if LLM_OFFLINE else OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+_offline_responses: list[str] = []
+_packed_id = re.compile(r"^=== CV (\S+) ===$", re.M)
+
+
+class _Abandoned(Exception):
+    """Raised inside a hedged attempt whose twin already answered."""
+
+
+class _LatencyWindow:
+    """Recent latencies per model; the hedge delay is their LLM_HEDGE_QUANTILE."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+
+    def add(self, model: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=LLM_HEDGE_WINDOW)).append(seconds)
+
+    def hedge_delay(self, model: str) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * LLM_HEDGE_QUANTILE), len(samples) - 1)]
+
+
+class _HedgeBudget:
+    """At most LLM_HEDGE_BUDGET_PER_MINUTE hedges in any 60 s."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._issued: deque[float] = deque()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._issued and now - self._issued[0] > 60:
+                self._issued.popleft()
+            if len(self._issued) >= LLM_HEDGE_BUDGET_PER_MINUTE:
+                return False
+            self._issued.append(now)
+            return True
+
+
+_latencies = _LatencyWindow()
+_hedge_budget = _HedgeBudget()
+
+
+def _offline_response(prompt: str, cancel: threading.Event | None = None) -> str:
+    if not _offline_responses:
+        for path in sorted(glob.glob(os.path.join(LLM_OFFLINE_FIXTURES, "*.json"))):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            data["email"] = None
+            _offline_responses.append(json.dumps(data, ensure_ascii=False))
+        if not _offline_responses:
+            raise RuntimeError(f"LLM_OFFLINE is set but {LLM_OFFLINE_FIXTURES} has no *.json responses")
+    if LLM_OFFLINE_LATENCY_MS:
+        if cancel is None:
+            time.sleep(LLM_OFFLINE_LATENCY_MS / 1000)
+        elif cancel.wait(LLM_OFFLINE_LATENCY_MS / 1000):
+            raise _Abandoned()
+    # packed prompts (several CVs) get an array with one response per CV id
+    ids = _packed_id.findall(prompt)
+    if ids:
+        return json.dumps([{"id": doc_id, **json.loads(_offline_pick(f"{doc_id}{prompt}"))} for doc_id in ids],
+                          ensure_ascii=False)
+    return _offline_pick(prompt)
+
+
+def _offline_pick(prompt: str) -> str:
+    # same prompt -> same response
+    return _offline_responses[zlib.crc32(prompt.encode("utf-8")) % len(_offline_responses)]
+
+
+def _complete(prompt: str, model: str, cancel: threading.Event | None = None) -> tuple[str, tuple[int, int] | None]:
+    """
+    One chat completion: (answer, (prompt_tokens, completion_tokens) if the
+    provider reported them). With `cancel` (hedged attempts) the answer is
+    streamed, so setting the event closes the connection at the next chunk and
+    the provider stops generating; an attempt still waiting for its first chunk
+    finishes that wait first.
+    """
+    if LLM_OFFLINE:
+        return _offline_response(prompt, cancel), None
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+    if cancel is None:
+        response = client.chat.completions.create(model=model, messages=messages, temperature=0.2)
+        content, usage = response.choices[0].message.content or "", response.usage
+    else:
+        stream = client.chat.completions.create(
+            model=model, messages=messages, temperature=0.2, stream=True, stream_options={"include_usage": True}
+        )
+        parts, usage = [], None
+        try:
+            for chunk in stream:
+                if cancel.is_set():
+                    raise _Abandoned()
+                if chunk.choices:
+                    parts.append(chunk.choices[0].delta.content or "")
+                if chunk.usage:
+                    usage = chunk.usage
+        finally:
+            stream.close()
+        content = "".join(parts)
+    if not usage:
+        return content, None
+    llm_tokens.inc(usage.prompt_tokens, kind="prompt")
+    llm_tokens.inc(usage.completion_tokens, kind="completion")
+    return content, (usage.prompt_tokens, usage.completion_tokens)
+
+
+def _hedged_complete(prompt: str, model: str) -> tuple[str, tuple[int, int] | None, bool]:
+    """
+    _complete with a hedge (see LLM_HEDGE), plus whether the hedge was sent.
+    A random LLM_HEDGE_CONTROL_SHARE of requests is sent without one;
+    cv_llm_hedged_request_seconds has both groups, and the difference of their
+    p99 is what hedging saves.
+    """
+    if random.random() < LLM_HEDGE_CONTROL_SHARE:
+        t0 = time.perf_counter()
+        content, usage = _complete(prompt, model)
+        seconds = time.perf_counter() - t0
+        _latencies.add(model, seconds)
+        llm_hedged_seconds.observe(seconds, group="control")
+        return content, usage, False
+
+    results: queue.Queue = queue.Queue()
+    cancels: dict[str, threading.Event] = {}
+    started = time.perf_counter()
+
+    def launch(kind: str):
+        cancel = cancels[kind] = threading.Event()
+
+        def attempt():
+            t0 = time.perf_counter()
+            try:
+                results.put((kind, _complete(prompt, model, cancel), None, time.perf_counter() - t0))
+            except BaseException as e:
+                results.put((kind, None, e, time.perf_counter() - t0))
+
+        threading.Thread(target=attempt, name=f"llm-{kind}", daemon=True).start()
+
+    launch("primary")
+    delay = _latencies.hedge_delay(model)
+    try:
+        first = results.get(timeout=delay)
+    except queue.Empty:
+        if _hedge_budget.take():
+            launch("hedge")
+        else:
+            llm_hedges.inc(outcome="over_budget")
+        first = results.get()
+
+    # the first successful answer wins; an error only counts once both attempts failed
+    pending, error = len(cancels) - 1, None
+    kind, answer, e, seconds = first
+    while e is not None:
+        error = error or e
+        if not pending:
+            raise error
+        pending -= 1
+        kind, answer, e, seconds = results.get()
+    for other, cancel in cancels.items():
+        if other != kind:
+            cancel.set()
+
+    elapsed = time.perf_counter() - started
+    # an abandoned first attempt would have taken at least this long
+    _latencies.add(model, seconds if kind == "primary" else elapsed)
+    if "hedge" in cancels:
+        llm_hedges.inc(outcome="won" if kind == "hedge" else "lost")
+    llm_hedged_seconds.observe(elapsed, group="hedged")
+    content, usage = answer
+    return content, usage, "hedge" in cancels
+
+
+def query_openai(prompt, model: str | None = None, tier: str | None = None):
+    """The model's answer to `prompt`, retried on transient errors; recorded for llm_accounting."""
+    model = model or LLM_MODEL
+    call = LLMCallRecord(model=model, tier=tier)
+    t0 = time.perf_counter()
+    try:
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            call.retries = attempt
+            try:
+                with track_stage("llm_call") as sp:
+                    if LLM_HEDGE:
+                        content, usage, call.hedged = _hedged_complete(prompt, model)
+                    else:
+                        content, usage = _complete(prompt, model)
+                    sp.bytes = len(content.encode("utf-8"))
+                _count_tokens(call, prompt, content, usage)
+                return content
+            except RETRYABLE_ERRORS as e:
+                if attempt == LLM_MAX_RETRIES:
+                    llm_failures.inc(reason=type(e).__name__)
+                    call.error = type(e).__name__
+                    raise
+                llm_retries.inc(reason=type(e).__name__)
+                time.sleep(min(2 ** attempt, 10))
+            except openai.OpenAIError as e:
+                llm_failures.inc(reason=type(e).__name__)
+                call.error = type(e).__name__
+                raise
+    finally:
+        call.latency_ms = (time.perf_counter() - t0) * 1000
+        record_llm_call(call)
+
+
+def _count_tokens(call: LLMCallRecord, prompt: str, content: str, usage: tuple[int, int] | None):
+    if usage:
+        call.prompt_tokens, call.completion_tokens = usage
+    else:
+        call.prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+        call.completion_tokens = estimate_tokens(content)
+        call.estimated = True
+    if call.hedged:
+        # the abandoned twin was billed for the prompt too; its completion stopped early and is not counted
+        call.prompt_tokens *= 2
+        call.estimated = True
@@ -0,0 +1,212 @@
+# app/utils/metrics.py
+"""
+Minimal, dependency-free Prometheus metrics (text exposition format 0.0.4).
+
+Values are per process: with several uvicorn workers, scrape each worker
+or aggregate in Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from app.utils import tracing
+
+# seconds; spans sub-ms upserts up to multi-minute LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda kv: tuple(map(str, kv[0])))
+            lines.extend(self._render_samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self, items):
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket (non-cumulative) counts, +Inf last, then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][idx] += 1
+            state[1] += value
+
+    def _render_samples(self, items):
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# === Pipeline metrics
+stage_seconds = REGISTRY.register(Histogram(
+    "cv_pipeline_stage_seconds",
+    "Duration of CV pipeline stages.",
+    ("stage", "outcome"),
+))
+llm_tokens = REGISTRY.register(Counter(
+    "cv_llm_tokens_total",
+    "LLM tokens used, by kind (prompt/completion).",
+    ("kind",),
+))
+llm_cache_hits = REGISTRY.register(Counter(
+    "cv_llm_cache_hits_total",
+    "LLM work avoided by reusing an earlier result.",
+    ("cache",),
+))
+cv_parse_modes = REGISTRY.register(Counter(
+    "cv_parse_mode_total",
+    "CV parses by mode: full, delta (revision of an earlier version), unchanged, "
+    "heuristic (no LLM call), heuristic_partial (LLM asked for some sections only) "
+    "or packed (several CVs in one request).",
+    ("mode",),
+))
+cv_text_tokens = REGISTRY.register(Counter(
+    "cv_text_tokens_estimated_total",
+    "Estimated tokens of extracted CV text (raw) and of the CV text sent to the LLM (sent).",
+    ("kind",),
+))
+llm_call_seconds = REGISTRY.register(Histogram(
+    "cv_llm_call_seconds",
+    "Duration of LLM calls (including retries) by model tier.",
+    ("tier", "outcome"),
+))
+llm_routes = REGISTRY.register(Counter(
+    "cv_llm_route_total",
+    "LLM requests by the model tier the router picked.",
+    ("tier",),
+))
+llm_escalations = REGISTRY.register(Counter(
+    "cv_llm_escalations_total",
+    "LLM answers handed to a stronger model tier, by tier and reason.",
+    ("tier", "reason"),
+))
+llm_hedges = REGISTRY.register(Counter(
+    "cv_llm_hedges_total",
+    "Hedged LLM requests: won (the duplicate answered first), lost, or over_budget (not sent).",
+    ("outcome",),
+))
+llm_hedged_seconds = REGISTRY.register(Histogram(
+    "cv_llm_hedged_request_seconds",
+    "Latency of LLM requests with hedging on, for hedge-eligible requests (hedged) "
+    "and the control group sent without a hedge (control).",
+    ("group",),
+))
+llm_retries = REGISTRY.register(Counter(
+    "cv_llm_retries_total",
+    "LLM requests retried, by reason.",
+    ("reason",),
+))
+llm_failures = REGISTRY.register(Counter(
+    "cv_llm_failures_total",
+    "LLM requests or responses that failed for good, by reason.",
+    ("reason",),
+))
+
+
+def observe_stage(stage: str, seconds: float, outcome: str = "success"):
+    stage_seconds.observe(seconds, stage=stage, outcome=outcome)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Time a block (or, as a decorator, a function) into cv_pipeline_stage_seconds
+    and record it as a trace span. Yields the span; setting `span.error` marks
+    the stage as failed without raising.
+    """
+    t0 = time.perf_counter()
+    outcome = "success"
+    with tracing.span(stage) as sp:
+        try:
+            yield sp
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            if sp.error is not None:
+                outcome = "error"
+            observe_stage(stage, time.perf_counter() - t0, outcome)
@@ -0,0 +1,198 @@
+# app/utils/profiling.py
+"""
+Opt-in profiling of single API requests and pipeline runs.
+
+A request is profiled when it carries `X-Profile: 1` together with a valid
+`X-Admin-Token`; a pipeline run when it is started with `profile=True`.
+Uses pyinstrument (sampling, written as collapsed stacks) when installed,
+cProfile (.pstats) otherwise. Only the newest PROFILE_MAX_FILES files are
+kept in PROFILE_DIR.
+
+When nothing asks for a profile, the only cost is one ContextVar lookup
+per request.
+"""
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from app.security.admin import is_admin_token
+from app.utils.audit_logger import logger
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(PROJECT_ROOT, "Profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))
+# "auto" (pyinstrument if installed), "sampling" or "cprofile"
+PROFILER = os.getenv("PROFILER", "auto").lower()
+PROFILE_EXTENSIONS = (".pstats", ".collapsed")
+
+# profile id requested for the current request, set by ProfileRequestMiddleware
+requested_profile: ContextVar[str | None] = ContextVar("requested_profile", default=None)
+
+_active = threading.local()
+_retention_lock = threading.Lock()
+
+
+def new_profile_id(label: str) -> str:
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label).strip("_")[:60]
+    return f"{time.strftime('%Y%m%d-%H%M%S')}_{safe}_{uuid.uuid4().hex[:6]}"
+
+
+def _use_sampling() -> bool:
+    return SamplingProfiler is not None and PROFILER in ("auto", "sampling")
+
+
+def _collapsed_stacks(frame, prefix: str, out: list[str]):
+    name = f"{frame.function} ({frame.file_path_short}:{frame.line_no})"
+    stack = f"{prefix};{name}" if prefix else name
+    self_time = frame.time - sum(child.time for child in frame.children)
+    if self_time > 0:
+        out.append(f"{stack} {int(self_time * 1_000_000)}")
+    for child in frame.children:
+        _collapsed_stacks(child, stack, out)
+
+
+@contextmanager
+def profile(profile_id: str):
+    """
+    Profile the block into PROFILE_DIR/<profile_id>.(pstats|collapsed).
+    Nested or concurrent requests on a thread that is already being profiled run unprofiled.
+    """
+    if getattr(_active, "on", False):
+        yield
+        return
+    _active.on = True
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    sampling = _use_sampling()
+    if sampling:
+        profiler = SamplingProfiler()
+        path = os.path.join(PROFILE_DIR, f"{profile_id}.collapsed")
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        path = os.path.join(PROFILE_DIR, f"{profile_id}.pstats")
+        profiler.enable()
+    try:
+        yield
+    finally:
+        try:
+            if not sampling:
+                profiler.disable()
+                profiler.dump_stats(path)
+            else:
+                session = profiler.stop()
+                lines: list[str] = []
+                root = session.root_frame()
+                if root is not None:
+                    _collapsed_stacks(root, "", lines)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            logger.info(f"🔬 Profile written: {path}")
+            enforce_retention()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write profile {profile_id}: {e}")
+        finally:
+            _active.on = False
+
+
+def list_profiles() -> list[os.DirEntry]:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    with os.scandir(PROFILE_DIR) as it:
+        entries = [e for e in it if e.is_file() and e.name.endswith(PROFILE_EXTENSIONS)]
+    return sorted(entries, key=lambda e: e.stat().st_mtime, reverse=True)
+
+
+def profile_path(name: str) -> str | None:
+    """Path of a stored profile, or None if `name` is not one of them."""
+    if os.path.basename(name) != name or not name.endswith(PROFILE_EXTENSIONS):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def enforce_retention():
+    with _retention_lock:
+        for entry in list_profiles()[PROFILE_MAX_FILES:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def _profiled_endpoint(endpoint):
+    """Wrap a route endpoint so it is profiled in the thread (or task) it actually runs in."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profile_id = requested_profile.get()
+            if profile_id is None:
+                return await endpoint(*args, **kwargs)
+            with profile(profile_id):
+                return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profile_id = requested_profile.get()
+            if profile_id is None:
+                return endpoint(*args, **kwargs)
+            with profile(profile_id):
+                return endpoint(*args, **kwargs)
+    return wrapper
+
+
+class ProfileRequestMiddleware:
+    """
+    Plain ASGI middleware: marks requests carrying `X-Profile: 1` and a valid
+    `X-Admin-Token` for profiling and returns the profile id in `X-Profile-Id`.
+    Other requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") != b"1" or not is_admin_token(
+            headers.get(b"x-admin-token", b"").decode("latin-1") or None
+        ):
+            return await self.app(scope, receive, send)
+
+        profile_id = new_profile_id(f"{scope['method']}_{scope['path']}")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        token = requested_profile.set(profile_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            requested_profile.reset(token)
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class for routers whose endpoints can be profiled on request.
+    Sync endpoints run in the threadpool, so the profiler has to be started
+    there rather than in a middleware on the event loop.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled_endpoint(endpoint), **kwargs)
@@ -0,0 +1,167 @@
+# app/utils/tracing.py
+"""
+Per-document pipeline traces: nested spans (stage, start, duration, rows,
+bytes, error) written to the pipeline_spans table.
+
+    with trace(document_id):
+        with span("parse") as sp:
+            sp.rows = ...
+
+Finished spans are only appended to an in-memory buffer on the hot path;
+a daemon thread writes them in batches (TRACE_BATCH_SIZE rows or every
+TRACE_FLUSH_SECONDS, whichever comes first). Spans opened outside a
+trace() block are timed but not stored.
+"""
+import atexit
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_BATCH_SIZE = int(os.getenv("TRACE_BATCH_SIZE", 500))
+TRACE_FLUSH_SECONDS = float(os.getenv("TRACE_FLUSH_SECONDS", 2))
+
+
+class _Trace:
+    __slots__ = ("trace_id", "document_id", "ids")
+
+    def __init__(self, document_id: int):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.document_id = document_id
+        self.ids = itertools.count(1)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "rows", "bytes", "error")
+
+    def __init__(self, name: str, trace: _Trace | None, parent_id: int | None):
+        self.trace = trace
+        self.span_id = next(trace.ids) if trace else None
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.rows = None
+        self.bytes = None
+        self.error = None
+
+
+_current_trace: ContextVar[_Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def trace(document_id: int):
+    """Record every span opened inside the block under one trace for `document_id`."""
+    current = _current_trace.get()
+    if not TRACING_ENABLED or (current is not None and current.document_id == document_id):
+        yield
+        return
+    token = _current_trace.set(_Trace(document_id))
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a child of the current span; yields the Span so callers can set rows/bytes."""
+    tr = _current_trace.get()
+    parent = _current_span.get()
+    sp = Span(name, tr, parent.span_id if parent is not None and parent.trace is tr else None)
+    token = _current_span.set(sp)
+    t0 = time.perf_counter()
+    try:
+        yield sp
+    except BaseException as e:
+        if sp.error is None:
+            sp.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        if tr is not None:
+            _writer.record((
+                tr.document_id, tr.trace_id, sp.span_id, sp.parent_id, sp.name, sp.start,
+                (time.perf_counter() - t0) * 1000, sp.rows, sp.bytes,
+                sp.error[:500] if sp.error else None,
+            ))
+
+
+def annotate(**fields):
+    """Set rows / bytes / error on the innermost open span, if any."""
+    sp = _current_span.get()
+    if sp is not None:
+        for key, value in fields.items():
+            setattr(sp, key, value)
+
+
+def ensure_table():
+    """Create pipeline_spans on databases that predate it."""
+    # imported here so that importing tracing never touches the database
+    from db.session import engine
+    from app.models import PipelineSpan
+    PipelineSpan.__table__.create(bind=engine, checkfirst=True)
+
+
+class _SpanWriter:
+    """Buffers finished spans and inserts them from a background thread."""
+
+    COLUMNS = (
+        "document_id", "trace_id", "span_id", "parent_id", "name",
+        "start", "duration_ms", "rows", "bytes", "error",
+    )
+
+    def __init__(self):
+        self._pending: list[tuple] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._table_ready = False
+
+    def record(self, row: tuple):
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= TRACE_BATCH_SIZE
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(TRACE_FLUSH_SECONDS)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        with self._write_lock:
+            try:
+                if not self._table_ready:
+                    ensure_table()
+                    self._table_ready = True
+                from db.session import engine
+                from app.models import PipelineSpan
+                with engine.begin() as conn:
+                    conn.execute(
+                        PipelineSpan.__table__.insert(),
+                        [dict(zip(self.COLUMNS, row)) for row in rows],
+                    )
+            except Exception as e:
+                # tracing must never break the pipeline; drop the batch
+                from app.utils.audit_logger import logger
+                logger.warning(f"⚠️ Dropped {len(rows)} trace spans: {e}")
+
+
+_writer = _SpanWriter()
+flush = _writer.flush
+atexit.register(flush)
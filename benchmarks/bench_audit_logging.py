@@ -0,0 +1,124 @@
+# benchmarks/bench_audit_logging.py
+"""
+Pipeline throughput (person + section upserts + commit per document, no LLM)
+with audit logging off, with the old synchronous handlers, and through the
+queue listener with and without per-row sampling.
+
+    python -m benchmarks.bench_audit_logging --documents 300
+"""
+import argparse
+import copy
+import logging
+import os
+import shutil
+import time
+
+from benchmarks.common import (
+    create_schema,
+    load_llm_fixtures,
+    use_scratch_audit_log,
+    use_scratch_database,
+)
+
+
+def run_documents(fixtures: list[dict], n: int, tag: str) -> float:
+    """Store `n` parsed CVs for fresh persons; return documents/sec."""
+    from db.session import SessionLocal
+    from app.models import Document
+    from app.services.parse_cv import upsert_parsed_data
+
+    session = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        for i in range(n):
+            data = copy.deepcopy(fixtures[i % len(fixtures)])
+            data["email"] = f"{tag}-{i}@example.com"
+            doc = Document(title=f"{tag}_{i}.docx", source_filename=f"{tag}_{i}.docx", uploaded_by="bench")
+            session.add(doc)
+            session.flush()
+            upsert_parsed_data(session, doc, data)
+            session.commit()
+        return n / (time.perf_counter() - t0)
+    finally:
+        session.close()
+
+
+def wait_for_drain(log_queue) -> float:
+    t0 = time.perf_counter()
+    while not log_queue.empty():
+        time.sleep(0.001)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--documents", type=int, default=300)
+    ap.add_argument("--rounds", type=int, default=5, help="interleaved rounds per mode")
+    ap.add_argument("--sample-rate", type=float, default=0.1, help="row sample rate for the sampled mode")
+    ap.add_argument("--console", action="store_true", help="keep console output (default: /dev/null)")
+    args = ap.parse_args()
+
+    log_dir = use_scratch_audit_log()
+    db_path = use_scratch_database()
+    try:
+        create_schema()
+        from app.utils import audit_logger as audit
+
+        if not args.console:
+            audit.console_handler.setStream(open(os.devnull, "w", encoding="utf-8"))
+        fixtures = load_llm_fixtures()
+        logger = audit.logger
+        direct_handlers = [audit.file_handler, audit.json_handler, audit.console_handler]
+
+        def logging_off():
+            logger.disabled = True
+
+        def direct():
+            # old setup: handlers called synchronously on the hot path, every row logged
+            logger.disabled = False
+            audit.listener.stop()
+            logger.removeHandler(audit.queue_handler)
+            for h in direct_handlers:
+                logger.addHandler(h)
+
+        def queued(rate):
+            def setup():
+                logger.disabled = False
+                if audit.queue_handler not in logger.handlers:
+                    for h in direct_handlers:
+                        logger.removeHandler(h)
+                    logger.addHandler(audit.queue_handler)
+                    audit.listener.start()
+                audit.row_sampler.rate = rate
+            return setup
+
+        modes = {
+            "off": logging_off,
+            "direct handlers": direct,
+            "queue (rows 100%)": queued(1.0),
+            f"queue (rows {args.sample_rate:.0%})": queued(args.sample_rate),
+        }
+        # interleave the modes so none of them benefits from a smaller database
+        elapsed = {name: 0.0 for name in modes}
+        drain = {name: 0.0 for name in modes}
+        per_round = max(1, args.documents // args.rounds)
+        for r in range(args.rounds):
+            for name, setup in modes.items():
+                setup()
+                elapsed[name] += per_round / run_documents(fixtures, per_round, f"{name}-{r}")
+                drain[name] += wait_for_drain(audit.log_queue)
+
+        total = per_round * args.rounds
+        base = total / elapsed["off"]
+        print(f"{'mode':<24} {'docs/sec':>10} {'vs off':>8} {'queue drain':>12}")
+        for name in modes:
+            dps = total / elapsed[name]
+            print(f"{name:<24} {dps:>10.1f} {dps / base:>7.0%} {drain[name] * 1000:>10.1f}ms")
+        logging.shutdown()
+    finally:
+        os.remove(db_path)
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
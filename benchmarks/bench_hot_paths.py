@@ -0,0 +1,264 @@
+# benchmarks/bench_hot_paths.py
+"""
+Micro-benchmarks for the parsing, upsert and rendering hot paths, offline:
+DOCX text from Resumes_Test/, parsed-CV JSON from benchmarks/fixtures.
+
+    python -m benchmarks.bench_hot_paths --output bench_results.json
+    python -m benchmarks.bench_hot_paths --compare old.json new.json --threshold 0.10
+
+--compare exits with status 1 if any case got slower than the threshold.
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks.common import (
+    create_schema,
+    load_llm_fixtures,
+    print_table,
+    summarize,
+    time_calls,
+    use_scratch_audit_log,
+    use_scratch_database,
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESUME_GLOB = os.path.join(REPO_ROOT, "Resumes_Test", "*.docx")
+
+# what the LLM actually hands normalize_date, plus the messy variants CVs contain
+DATE_SAMPLES = [
+    "2019", "2019-04", "2019/04", "04/2019", "2019-04-15", "15.04.2019", "April 2019",
+    "Apr 2019", "Spring 2019", "since 2019", "Present", "present", "", "n/a", "2019 - 2021",
+]
+
+
+def bench_extract_text(iterations: int) -> dict:
+    from app.services.llm_cv_parser import extract_text_from_docx
+
+    results = {}
+    for path in sorted(glob.glob(RESUME_GLOB)):
+        name = os.path.splitext(os.path.basename(path))[0]
+        results[f"extract_text_from_docx[{name}]"] = summarize(
+            time_calls(lambda: extract_text_from_docx(path), iterations)
+        )
+    return results
+
+
+def bench_heuristic_parse(iterations: int) -> dict:
+    from app.services.heuristic_parser import parse_cv_heuristically
+    from app.services.llm_cv_parser import extract_styled_paragraphs_from_docx
+
+    results = {}
+    for path in sorted(glob.glob(RESUME_GLOB)):
+        name = os.path.splitext(os.path.basename(path))[0]
+        styled = extract_styled_paragraphs_from_docx(path)
+        results[f"parse_cv_heuristically[{name}]"] = summarize(
+            time_calls(lambda: parse_cv_heuristically(styled), iterations)
+        )
+    return results
+
+
+def bench_normalize_date(iterations: int) -> dict:
+    from app.services.parse_cv import normalize_date
+
+    def run():
+        for raw in DATE_SAMPLES:
+            normalize_date(raw)
+
+    return {f"normalize_date[x{len(DATE_SAMPLES)}]": summarize(time_calls(run, iterations))}
+
+
+def _new_person(session, tag: str):
+    from app.models import Person
+    person = Person(full_name=f"Bench {tag}", email=f"{tag}@example.com")
+    session.add(person)
+    session.flush()
+    return person
+
+
+def bench_upserts(fixture: dict, iterations: int) -> dict:
+    """
+    fresh:     every row is an insert (new person, rolled back after each call)
+    populated: the same data again for a committed person, so every row is a
+               compare-only no-op; relationships are reloaded on each call
+    """
+    from db.session import SessionLocal
+    from app.services.parse_cv import SECTION_UPSERTS
+
+    results = {}
+    session = SessionLocal()
+    try:
+        counter = iter(range(10**9))
+        for key, fn in SECTION_UPSERTS:
+            rows = fixture.get(key) or []
+
+            def fresh_setup():
+                session.rollback()
+                return _new_person(session, f"fresh-{next(counter)}")
+
+            samples = time_calls(lambda person: fn(session, person, rows), iterations,
+                                 setup=fresh_setup)
+            session.rollback()
+            results[f"{fn.__name__}[fresh,{len(rows)} rows]"] = summarize(samples)
+
+        populated = _new_person(session, "populated")
+        for key, fn in SECTION_UPSERTS:
+            fn(session, populated, fixture.get(key) or [])
+        session.commit()
+        for key, fn in SECTION_UPSERTS:
+            rows = fixture.get(key) or []
+
+            def populated_setup():
+                session.expire_all()
+                return populated
+
+            samples = time_calls(lambda person: fn(session, person, rows), iterations, setup=populated_setup)
+            results[f"{fn.__name__}[populated,{len(rows)} rows]"] = summarize(samples)
+        return results
+    finally:
+        session.rollback()
+        session.close()
+
+
+def seed_person(fixture: dict) -> int:
+    from db.session import SessionLocal
+    from app.models import Document
+    from app.services.parse_cv import upsert_parsed_data
+
+    session = SessionLocal()
+    try:
+        doc = Document(title="bench.docx", source_filename="bench.docx", uploaded_by="bench")
+        session.add(doc)
+        session.flush()
+        person = upsert_parsed_data(session, doc, copy.deepcopy(fixture), fallback_email="render@example.com")
+        session.commit()
+        return person.id
+    finally:
+        session.close()
+
+
+def bench_rendering(person_id: int, iterations: int, out_dir: str) -> dict:
+    from sqlalchemy.orm import selectinload
+    from db.session import SessionLocal
+    from app.models import Person
+    from app.services.generate_pdf import generate_cv_pdf
+    from app.services.plot_timeline_vertical import collect_timeline_events, plot_timeline_and_save
+
+    results = {}
+    pdf_path = os.path.join(out_dir, "bench.pdf")
+    results["generate_cv_pdf"] = summarize(time_calls(
+        lambda: generate_cv_pdf(person_id, output_path=pdf_path), iterations, warmup=2
+    ))
+
+    session = SessionLocal()
+    try:
+        person = session.get(Person, person_id, options=[selectinload("*")])
+        results["collect_timeline_events"] = summarize(
+            time_calls(lambda: collect_timeline_events(person), iterations * 10)
+        )
+    finally:
+        session.close()
+
+    # slow (matplotlib + 300 dpi PNG): a handful of runs is enough
+    results["plot_timeline_and_save"] = summarize(time_calls(
+        lambda: plot_timeline_and_save(person_id, document_id=None, save_dir=out_dir),
+        max(3, iterations // 10), warmup=1,
+    ))
+    return results
+
+
+def run_suite(args) -> dict:
+    log_dir = use_scratch_audit_log()
+    db_path = use_scratch_database()
+    out_dir = tempfile.mkdtemp(prefix="bench_render_")
+    try:
+        create_schema()
+        from app.utils import audit_logger
+        audit_logger.console_handler.setStream(open(os.devnull, "w", encoding="utf-8"))
+
+        fixture = load_llm_fixtures()[0]
+        results = {}
+        results.update(bench_extract_text(args.iterations))
+        results.update(bench_heuristic_parse(args.iterations))
+        results.update(bench_normalize_date(args.iterations * 10))
+        results.update(bench_upserts(fixture, args.iterations))
+        results.update(bench_rendering(seed_person(fixture), args.iterations // 5 or 1, out_dir))
+        return results
+    finally:
+        os.remove(db_path)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path: str, new_path: str, metric: str, threshold: float) -> int:
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'case':<52} {'base':>10} {'new':>10} {'change':>8}")
+    for case in sorted(set(base) | set(new)):
+        if case not in base or case not in new:
+            print(f"{case:<52} {'(only in ' + ('base' if case in base else 'new') + ')':>30}")
+            continue
+        old, cur = base[case][metric], new[case][metric]
+        change = (cur - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{case:<52} {old:>8.3f}ms {cur:>8.3f}ms {change:>+7.1%}{flag}")
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%} on {metric}")
+    return 1 if regressions else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--iterations", type=int, default=50, help="base iteration count (slow cases use fewer)")
+    ap.add_argument("--output", default="bench_results.json", help="where to write the results")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two results files")
+    ap.add_argument("--metric", default="p50_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    ap.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    args = ap.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, metric=args.metric, threshold=args.threshold))
+
+    results = run_suite(args)
+    print_table(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "git_revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "iterations": args.iterations,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_login_storm.py
+"""
+Login storm: logins/sec and latency of an unrelated endpoint (GET /documents)
+while many clients log in at once. Starts a real uvicorn server on a scratch DB.
+
+    python -m benchmarks.bench_login_storm --hash-workers 2     # process pool
+    python -m benchmarks.bench_login_storm --hash-workers 0     # bcrypt in the request threadpool
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import (
+    create_schema,
+    print_table,
+    start_server,
+    summarize,
+    use_scratch_database,
+    wait_until_up,
+)
+
+
+def seed(n_users: int, password: str):
+    from db.session import SessionLocal
+    from app.models import Person
+    from app.security.passwords import hash_password
+
+    hashed = hash_password(password)
+    session = SessionLocal()
+    try:
+        session.add_all(
+            Person(full_name=f"Storm User {i}", email=f"storm{i}@example.com", password_hash=hashed)
+            for i in range(n_users)
+        )
+        session.commit()
+    finally:
+        session.close()
+
+
+async def probe(client, url: str, headers: dict, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = await client.get(url, headers=headers)
+        r.raise_for_status()
+        samples.append(time.perf_counter() - t0)
+        await asyncio.sleep(0.02)
+
+
+async def login_loop(client, url: str, user: int, password: str, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        r = await client.post(url, data={"username": f"storm{user}@example.com", "password": password})
+        r.raise_for_status()
+        samples.append(time.perf_counter() - t0)
+
+
+async def run(base_url: str, token: str, args) -> dict:
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=args.concurrency + 10)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await wait_until_up(client, base_url)
+
+        # 1) baseline: probe alone
+        stop, baseline = asyncio.Event(), []
+        task = asyncio.create_task(probe(client, f"{base_url}/documents", headers, stop, baseline))
+        await asyncio.sleep(args.baseline)
+        stop.set()
+        await task
+
+        # 2) storm: probe while `concurrency` clients log in back to back
+        stop, during, logins = asyncio.Event(), [], []
+        tasks = [asyncio.create_task(probe(client, f"{base_url}/documents", headers, stop, during))]
+        tasks += [
+            asyncio.create_task(login_loop(client, f"{base_url}/login", i % args.users, args.password, stop, logins))
+            for i in range(args.concurrency)
+        ]
+        t0 = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - t0
+
+    print_table({
+        "GET /documents (idle)": summarize(baseline),
+        "GET /documents (during login storm)": summarize(during),
+        "POST /login": summarize(logins),
+    })
+    print(f"\nlogins/sec: {len(logins) / elapsed:.1f} "
+          f"({args.concurrency} concurrent clients, {args.hash_workers} hash workers)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--hash-workers", type=int, default=2, help="PASSWORD_HASH_WORKERS for the server")
+    ap.add_argument("--concurrency", type=int, default=32, help="concurrent login clients")
+    ap.add_argument("--users", type=int, default=64)
+    ap.add_argument("--duration", type=float, default=10.0, help="storm length in seconds")
+    ap.add_argument("--baseline", type=float, default=3.0, help="idle probe length in seconds")
+    ap.add_argument("--password", default="storm-password")
+    args = ap.parse_args()
+
+    db_path = use_scratch_database()
+    server = None
+    try:
+        create_schema()
+        seed(args.users, args.password)
+
+        from app.config import ACCESS_TOKEN_EXPIRE_DELTA
+        from app.routes.auth import create_access_token
+        token = create_access_token({"sub": "storm0@example.com"}, ACCESS_TOKEN_EXPIRE_DELTA)
+
+        server, base_url = start_server({"PASSWORD_HASH_WORKERS": str(args.hash_workers)})
+        asyncio.run(run(base_url, token, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
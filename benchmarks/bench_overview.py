@@ -0,0 +1,90 @@
+# benchmarks/bench_overview.py
+"""
+Dashboard load: GET /documents/{id}/overview vs. the three-call sequence
+GET /me + GET /documents/{id} + GET /documents/{id}/visualizations.
+
+    python -m benchmarks.bench_overview --documents 500 --iterations 300
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_schema, print_table, summarize, time_calls, use_scratch_database
+
+
+def seed(n_documents: int) -> tuple[int, int]:
+    """Create one user with `n_documents` documents, each with two PDFs and two timelines."""
+    from db.session import SessionLocal
+    from app.models import Document, Person, Visualization
+
+    session = SessionLocal()
+    try:
+        user = Person(full_name="Bench Mark", email="bench@example.com", short_bio="Benchmark user.")
+        session.add(user)
+        session.flush()
+        start = datetime(2025, 1, 1)
+        doc_id = None
+        for i in range(n_documents):
+            doc = Document(
+                title=f"cv_{i}.docx",
+                source_filename=f"static/uploads/{user.id}_cv_{i}.docx",
+                uploaded_by=str(user.id),
+                upload_time=start + timedelta(minutes=i),
+                status="complete",
+            )
+            session.add(doc)
+            session.flush()
+            for rev in range(2):
+                session.add(Visualization(document_id=doc.id, type="pdf",
+                                          file_path=f"PDFs_Test/UniCV_Bench_Mark_{user.id}.pdf"))
+                session.add(Visualization(document_id=doc.id, type="timeline:png",
+                                          file_path=f"static/timelines/timeline_doc_{doc.id}_{rev}.png"))
+            doc_id = doc.id
+        user.document_id = doc_id
+        session.commit()
+        return user.id, doc_id
+    finally:
+        session.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--documents", type=int, default=200)
+    ap.add_argument("--iterations", type=int, default=200)
+    args = ap.parse_args()
+
+    db_path = use_scratch_database()
+    try:
+        create_schema()
+        _, doc_id = seed(args.documents)
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.config import ACCESS_TOKEN_EXPIRE_DELTA
+        from app.routes.auth import create_access_token
+
+        client = TestClient(app)
+        token = create_access_token({"sub": "bench@example.com"}, ACCESS_TOKEN_EXPIRE_DELTA)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def three_calls():
+            for url in ("/me", f"/documents/{doc_id}", f"/documents/{doc_id}/visualizations"):
+                client.get(url, headers=headers).raise_for_status()
+
+        def overview():
+            client.get(f"/documents/{doc_id}/overview", headers=headers).raise_for_status()
+
+        results = {
+            "three calls (/me + status + visualizations)": summarize(time_calls(three_calls, args.iterations)),
+            "GET /documents/{id}/overview": summarize(time_calls(overview, args.iterations)),
+        }
+        print_table(results)
+        speedup = results["three calls (/me + status + visualizations)"]["mean_ms"] / \
+            results["GET /documents/{id}/overview"]["mean_ms"]
+        print(f"\noverview is {speedup:.1f}x faster on mean latency")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_packing.py
+"""
+Bulk ingestion with one LLM request per CV vs. packed requests (--pack),
+offline: synthetic .docx CVs, the offline LLM stand-in with a fixed latency
+per request, and the heuristic parser off so every CV goes to the LLM.
+
+    python -m benchmarks.bench_packing --persons 80 --llm-latency-ms 1500
+
+Reported per mode: throughput, LLM requests, and the prompt overhead per CV,
+i.e. the estimated prompt tokens that are not CV text (instructions, delimiters).
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import REPO_ROOT
+from benchmarks.synthetic import generate_cv, write_docx
+
+
+def run_mode(cv_dir: str, extra_args: list[str], args) -> dict:
+    work = tempfile.mkdtemp(prefix="bench_packing_")
+    db_path = os.path.join(work, "bench.sqlite")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "OPENAI_API_KEY": "offline-benchmark",
+        "AUDIT_LOG_DIR": os.path.join(work, "audit"),
+        "AUDIT_ROW_SAMPLE_RATE": "0",
+        "LLM_OFFLINE": "1",
+        "LLM_OFFLINE_LATENCY_MS": str(args.llm_latency_ms),
+        "HEURISTIC_PARSE": "false",
+        "PYTHONPATH": REPO_ROOT,
+    }
+    try:
+        subprocess.run(
+            [sys.executable, "-c", "from benchmarks.common import create_schema; create_schema()"],
+            env=env, cwd=work, check=True,
+        )
+        t0 = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "app.services.bulk_ingest", cv_dir, "--uploaded-by", "bench",
+             "--fallback-email", "bench@example.com", "--manifest", os.path.join(work, "manifest.jsonl"),
+             "--concurrency", str(args.concurrency), *extra_args],
+            env=env, cwd=work, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        elapsed = time.perf_counter() - t0
+
+        from app.services.text_compaction import estimate_tokens
+        conn = sqlite3.connect(db_path)
+        try:
+            docs, cv_tokens = conn.execute("SELECT COUNT(*), SUM(text_tokens_sent) FROM documents").fetchone()
+            # packed CVs share their request's prompt
+            prompts = [row[0] for row in conn.execute("SELECT DISTINCT llm_prompt FROM documents")]
+        finally:
+            conn.close()
+        prompt_tokens = sum(estimate_tokens(p) for p in prompts if p)
+        return {
+            "documents": docs,
+            "docs_per_min": docs / elapsed * 60,
+            "requests": len(prompts),
+            "overhead_per_doc": (prompt_tokens - (cv_tokens or 0)) / max(docs, 1),
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--persons", type=int, default=80)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--llm-latency-ms", type=int, default=1500, help="offline latency per LLM request")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--pack-max-docs", type=int, default=4)
+    args = ap.parse_args()
+
+    cv_dir = tempfile.mkdtemp(prefix="bench_packing_cvs_")
+    try:
+        for index in range(args.persons):
+            write_docx(generate_cv(index, args.seed), os.path.join(cv_dir, f"cv_{index:07d}.docx"))
+        modes = {
+            "one request per CV": [],
+            f"packed (up to {args.pack_max_docs})": ["--pack", "--pack-max-docs", str(args.pack_max_docs)],
+        }
+        results = {name: run_mode(cv_dir, extra, args) for name, extra in modes.items()}
+    finally:
+        shutil.rmtree(cv_dir, ignore_errors=True)
+
+    base = results["one request per CV"]
+    print(f"{'mode':<24} {'docs':>6} {'docs/min':>10} {'vs single':>10} {'requests':>9} {'overhead/CV':>12}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['documents']:>6} {r['docs_per_min']:>10.1f} "
+              f"{r['docs_per_min'] / base['docs_per_min']:>9.0%} {r['requests']:>9} "
+              f"{r['overhead_per_doc']:>8.0f} tok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_profile_read.py
+"""
+Full profile retrieval: assembling Person + its CV sections through the ORM
+vs. reading the stored profile document (one row).
+
+    python -m benchmarks.bench_profile_read --persons 2000 --iterations 500
+
+Cases, each with a fresh session per read, for random persons:
+- ORM, joinedload per collection (as generate_cv_pdf loads a person) + serialization
+- ORM, selectinload per collection (what rebuild_profile runs) + serialization
+- ORM, sparse fieldset experiences,languages (GET /me?fields=...) + serialization
+- profile_documents row (what GET /persons/{id}/profile serves)
+- GET /persons/{id}/profile end to end, for the HTTP overhead on top
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.common import print_table, summarize, time_calls, use_scratch_database
+from benchmarks.synthetic import bulk_load
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--persons", type=int, default=2000)
+    ap.add_argument("--iterations", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_profile_"), "bench.sqlite")
+    use_scratch_database(db_path)
+    try:
+        bulk_load(db_path, args.persons, args.seed)
+
+        from sqlalchemy.orm import joinedload
+        from db.session import SessionLocal
+        from app import schemas
+        from app.models import Person, ProfileDocument
+        from app.services.profile_documents import (
+            PROFILE_COLLECTIONS,
+            build_profile,
+            load_person,
+            parse_fields,
+            rebuild_all,
+        )
+
+        rebuild_all()
+        rng = random.Random(args.seed)
+
+        def pick():
+            return rng.randint(1, args.persons)
+
+        def orm_joined(person_id):
+            session = SessionLocal()
+            try:
+                person = session.get(Person, person_id, options=[joinedload(c) for c in PROFILE_COLLECTIONS])
+                schemas.Person.model_validate(person).model_dump_json()
+            finally:
+                session.close()
+
+        def orm_selectin(person_id):
+            session = SessionLocal()
+            try:
+                build_profile(session, person_id)
+            finally:
+                session.close()
+
+        sparse = parse_fields("experiences,languages")
+
+        def orm_sparse(person_id):
+            session = SessionLocal()
+            try:
+                load_person(session, person_id, sparse).model_dump_json()
+            finally:
+                session.close()
+
+        def read_model(person_id):
+            session = SessionLocal()
+            try:
+                session.get(ProfileDocument, person_id).body
+            finally:
+                session.close()
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.routes.auth import get_current_principal
+        from app.security.principal_cache import Principal
+
+        # synthetic persons uploaded their own CVs, so each reads their own profile
+        caller = {"id": 1}
+        app.dependency_overrides[get_current_principal] = lambda: Principal(caller["id"], "bench@example.com")
+        client = TestClient(app)
+
+        def endpoint(person_id):
+            caller["id"] = person_id
+            client.get(f"/persons/{person_id}/profile").raise_for_status()
+
+        results = {
+            "ORM joinedload x10 + serialize": summarize(time_calls(orm_joined, args.iterations, setup=pick)),
+            "ORM selectinload x10 + serialize": summarize(time_calls(orm_selectin, args.iterations, setup=pick)),
+            "ORM fields=experiences,languages": summarize(time_calls(orm_sparse, args.iterations, setup=pick)),
+            "profile_documents row": summarize(time_calls(read_model, args.iterations, setup=pick)),
+            "GET /persons/{id}/profile": summarize(time_calls(endpoint, args.iterations, setup=pick)),
+        }
+        print_table(results)
+        speedup = results["ORM joinedload x10 + serialize"]["mean_ms"] / results["profile_documents row"]["mean_ms"]
+        print(f"\nthe read model is {speedup:.1f}x faster than joinedload assembly on mean latency")
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
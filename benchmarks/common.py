@@ -0,0 +1,152 @@
+# benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts.
+Run benchmarks from the repo root, e.g. `python -m benchmarks.bench_overview`.
+"""
+import os
+import glob
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+
+def use_scratch_database(path: str | None = None) -> str:
+    """
+    Point DATABASE_URL at a throwaway SQLite file.
+    Must be called before anything imports db.session / app.database.
+    """
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="bench_", suffix=".sqlite")
+        os.close(fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    return path
+
+
+def use_scratch_audit_log() -> str:
+    """Send audit logs to a temp dir. Must be called before app.utils.audit_logger is imported."""
+    path = tempfile.mkdtemp(prefix="bench_audit_")
+    os.environ["AUDIT_LOG_DIR"] = path
+    return path
+
+
+def load_llm_fixtures() -> list[dict]:
+    """Recorded LLM responses (parsed-CV JSON) from benchmarks/fixtures/llm_responses."""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "llm_responses", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            fixtures.append(json.load(f))
+    return fixtures
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_server_sandbox() -> str:
+    """
+    Temp working directory for a server started with start_server(cwd=...):
+    links back to app/, so the uploads, PDFs, timelines and audit logs the
+    server writes stay out of the repo. Delete it when done.
+    """
+    path = tempfile.mkdtemp(prefix="bench_server_")
+    os.symlink(os.path.join(REPO_ROOT, "app"), os.path.join(path, "app"))
+    for d in ("static", "PDFs_Test"):
+        os.makedirs(os.path.join(path, d))
+    return path
+
+
+def start_server(env: dict | None = None, workers: int = 1, cwd: str = REPO_ROOT):
+    """
+    Start `uvicorn app.main:app` on a free local port with the current
+    environment (plus `env`). Returns (process, base_url).
+    """
+    port = free_port()
+    full_env = {**os.environ, **(env or {})}
+    full_env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, full_env.get("PYTHONPATH")]))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=cwd, env=full_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return proc, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_up(client, base_url: str, timeout: float = 30):
+    """Poll an httpx.AsyncClient against the server until it answers."""
+    import asyncio
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get(f"{base_url}/metrics")
+            return
+        except Exception:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def create_schema():
+    from app.models import Base
+    from db.session import engine
+    Base.metadata.create_all(engine)
+
+
+def time_calls(fn, iterations: int, warmup: int = 5, setup=None) -> list[float]:
+    """
+    Call `fn` repeatedly and return per-call wall times in seconds.
+    If given, `setup()` runs untimed before every call and its return value is passed to `fn`.
+    """
+    samples = []
+    for i in range(warmup + iterations):
+        if setup is None:
+            t0 = time.perf_counter()
+            fn()
+        else:
+            arg = setup()
+            t0 = time.perf_counter()
+            fn(arg)
+        elapsed = time.perf_counter() - t0
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Summary statistics in milliseconds."""
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def print_table(results: dict[str, dict]):
+    width = max([40, *map(len, results)])
+    print(f"{'case':<{width}} {'n':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, s in results.items():
+        print(
+            f"{name:<{width}} {s['n']:>6} {s['mean_ms']:>8.2f}ms {s['p50_ms']:>8.2f}ms "
+            f"{s['p95_ms']:>8.2f}ms {s['p99_ms']:>8.2f}ms"
+        )
@@ -0,0 +1,240 @@
+# benchmarks/load_test.py
+"""
+Closed-loop load test of the real API: each virtual user registers, logs in,
+then repeatedly uploads a CV, polls until the document is complete and
+fetches its overview and artifacts. Users arrive at --arrival-rate per second.
+
+By default a local uvicorn server is started on a scratch database with the
+offline LLM stand-in (LLM_OFFLINE=1), so no API key is needed:
+
+    python -m benchmarks.load_test --users 20 --arrival-rate 2 --uploads-per-user 3 --workers 2 \\
+        --slo "POST /documents/upload:p95=500" --slo "e2e:p95=30000" --max-error-rate 0.01
+
+Use --base-url to target an already running server (start it with LLM_OFFLINE=1).
+Exits with status 1 if an SLO or the error-rate limit is breached.
+"""
+import argparse
+import asyncio
+import glob
+import os
+import shutil
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+from benchmarks.common import (
+    FIXTURE_DIR,
+    REPO_ROOT,
+    create_schema,
+    make_server_sandbox,
+    percentile,
+    start_server,
+    use_scratch_database,
+    wait_until_up,
+)
+
+PASSWORD = "load-test-password"
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class RequestFailed(Exception):
+    pass
+
+
+class Recorder:
+    """Latencies and errors per endpoint, plus end-to-end upload -> complete times."""
+
+    def __init__(self, client):
+        self.client = client
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.e2e: list[float] = []
+        self.e2e_failed = 0
+        self.elapsed = 0.0
+
+    async def call(self, name: str, method: str, url: str, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+        except Exception as e:
+            self.samples[name].append(time.perf_counter() - t0)
+            self.errors[name] += 1
+            raise RequestFailed(f"{name}: {type(e).__name__}: {e}")
+        self.samples[name].append(time.perf_counter() - t0)
+        if r.status_code >= 400:
+            self.errors[name] += 1
+            raise RequestFailed(f"{name}: HTTP {r.status_code}")
+        return r
+
+
+def artifact_name(url: str) -> str:
+    if url.startswith("/pdfs/"):
+        return "GET /pdfs/{file}"
+    if url.startswith("/static/"):
+        return "GET /static/{file}"
+    return "GET artifact"
+
+
+async def virtual_user(rec: Recorder, index: int, run_id: str, docx_files: list[str], args):
+    email = f"load-{run_id}-{index}@example.com"
+    try:
+        await rec.call("POST /register", "POST", "/register", json={
+            "user": {"full_name": f"Load User {index}", "email": email}, "password": PASSWORD,
+        })
+        r = await rec.call("POST /login", "POST", "/login", data={"username": email, "password": PASSWORD})
+    except RequestFailed:
+        return
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    for n in range(args.uploads_per_user):
+        path = docx_files[(index + n) % len(docx_files)]
+        with open(path, "rb") as f:
+            content = f.read()
+        t_start = time.perf_counter()
+        try:
+            r = await rec.call("POST /documents/upload", "POST", "/documents/upload", headers=headers,
+                               files={"file": (os.path.basename(path), content, DOCX_MIME)})
+            doc_id = r.json()["document_id"]
+
+            status, deadline = "pending", time.monotonic() + args.complete_timeout
+            while status not in ("complete", "error") and time.monotonic() < deadline:
+                await asyncio.sleep(args.poll_interval)
+                r = await rec.call("GET /documents/{id}", "GET", f"/documents/{doc_id}", headers=headers)
+                status = r.json()["status"]
+            if status != "complete":
+                rec.e2e_failed += 1
+                continue
+            rec.e2e.append(time.perf_counter() - t_start)
+
+            r = await rec.call("GET /documents/{id}/overview", "GET", f"/documents/{doc_id}/overview",
+                               headers=headers)
+            for artifact in r.json()["artifacts"]:
+                await rec.call(artifact_name(artifact["url"]), "GET", artifact["url"])
+        except RequestFailed:
+            rec.e2e_failed += 1
+        if args.think_time:
+            await asyncio.sleep(args.think_time)
+
+
+async def run(base_url: str, args) -> Recorder:
+    import httpx
+
+    docx_files = sorted(glob.glob(args.docx))
+    if not docx_files:
+        raise SystemExit(f"No .docx files match {args.docx}")
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.users + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        await wait_until_up(client, base_url)
+        rec = Recorder(client)
+
+        async def arrive(i):
+            await asyncio.sleep(i / args.arrival_rate)
+            await virtual_user(rec, i, run_id, docx_files, args)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(arrive(i) for i in range(args.users)))
+        rec.elapsed = time.perf_counter() - t0
+    return rec
+
+
+def parse_slo(spec: str) -> tuple[str, float, float]:
+    """'POST /documents/upload:p95=500' -> (name, 95.0, 0.5 seconds)"""
+    try:
+        name, _, rest = spec.rpartition(":")
+        pct, _, ms = rest.partition("=")
+        if not name or not pct.startswith("p"):
+            raise ValueError
+        return name, float(pct[1:]), float(ms) / 1000
+    except ValueError:
+        raise SystemExit(f"Bad --slo {spec!r}; expected NAME:pNN=MILLISECONDS, e.g. 'e2e:p95=30000'")
+
+
+def report(rec: Recorder, args) -> int:
+    names = sorted(rec.samples)
+    width = max([34, *map(len, names)])
+    print(f"{'endpoint':<{width}} {'n':>6} {'err':>5} {'req/s':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name in names:
+        s = rec.samples[name]
+        print(
+            f"{name:<{width}} {len(s):>6} {rec.errors[name]:>5} {len(s) / rec.elapsed:>7.1f} "
+            f"{percentile(s, 50) * 1000:>7.1f}ms {percentile(s, 95) * 1000:>7.1f}ms {percentile(s, 99) * 1000:>7.1f}ms"
+        )
+    e2e = rec.e2e
+    print(
+        f"\nupload -> complete: {len(e2e)} ok, {rec.e2e_failed} failed/timed out; "
+        f"p50 {percentile(e2e, 50):.2f}s  p95 {percentile(e2e, 95):.2f}s  p99 {percentile(e2e, 99):.2f}s"
+    )
+    total = sum(len(s) for s in rec.samples.values())
+    errors = sum(rec.errors.values())
+    error_rate = errors / total if total else 0.0
+    print(f"throughput: {len(e2e) / rec.elapsed * 60:.1f} documents/min, {total / rec.elapsed:.1f} req/s "
+          f"over {rec.elapsed:.1f}s; error rate {error_rate:.2%} ({errors}/{total})")
+
+    breaches = []
+    for spec in args.slo or []:
+        name, pct, limit = parse_slo(spec)
+        samples = e2e if name == "e2e" else rec.samples.get(name, [])
+        if not samples:
+            breaches.append(f"{name}: no samples")
+            continue
+        value = percentile(samples, pct)
+        ok = value <= limit
+        print(f"SLO {name} p{pct:g} <= {limit * 1000:.0f}ms: {value * 1000:.0f}ms {'ok' if ok else 'BREACHED'}")
+        if not ok:
+            breaches.append(spec)
+    if error_rate > args.max_error_rate:
+        breaches.append(f"error rate {error_rate:.2%} > {args.max_error_rate:.2%}")
+    attempted = len(e2e) + rec.e2e_failed
+    if attempted and rec.e2e_failed / attempted > args.max_error_rate:
+        breaches.append(f"{rec.e2e_failed}/{attempted} uploads did not complete")
+    if breaches:
+        print("\nFAILED: " + "; ".join(breaches))
+        return 1
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--base-url", help="target a running server instead of starting one")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    ap.add_argument("--users", type=int, default=10, help="virtual users")
+    ap.add_argument("--arrival-rate", type=float, default=1.0, help="new virtual users per second")
+    ap.add_argument("--uploads-per-user", type=int, default=2)
+    ap.add_argument("--think-time", type=float, default=0.0, help="seconds between a user's uploads")
+    ap.add_argument("--poll-interval", type=float, default=0.5)
+    ap.add_argument("--complete-timeout", type=float, default=120.0, help="seconds to wait for 'complete'")
+    ap.add_argument("--request-timeout", type=float, default=60.0)
+    ap.add_argument("--docx", default=os.path.join(REPO_ROOT, "Resumes_Test", "*.docx"), help="glob of CVs to upload")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated LLM latency (local server only)")
+    ap.add_argument("--slo", action="append", metavar="NAME:pNN=MS", help="latency SLO, repeatable; NAME 'e2e' = upload -> complete")
+    ap.add_argument("--max-error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    if args.base_url:
+        sys.exit(report(asyncio.run(run(args.base_url, args)), args))
+
+    db_path = use_scratch_database()
+    sandbox = make_server_sandbox()
+    server = None
+    try:
+        create_schema()
+        server, base_url = start_server({
+            "LLM_OFFLINE": "1",
+            "LLM_OFFLINE_FIXTURES": os.path.join(FIXTURE_DIR, "llm_responses"),
+            "LLM_OFFLINE_LATENCY_MS": str(args.llm_latency_ms),
+            "AUDIT_ROW_SAMPLE_RATE": os.environ.get("AUDIT_ROW_SAMPLE_RATE", "0"),
+        }, workers=args.workers, cwd=sandbox)
+        code = report(asyncio.run(run(base_url, args)), args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        os.remove(db_path)
+        shutil.rmtree(sandbox, ignore_errors=True)
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
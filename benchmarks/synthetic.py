@@ -0,0 +1,485 @@
+# benchmarks/synthetic.py
+"""
+Seeded synthetic CVs for scale testing.
+
+    # parsed-CV JSON (the PROMPT_TEMPLATE schema), e.g. a heavy academic profile
+    python -m benchmarks.synthetic json --persons 100 --out synthetic/json --count publications=200 --count professional_experience=40
+
+    # the same CVs as .docx files for the real upload / parsing path
+    python -m benchmarks.synthetic docx --persons 100 --out synthetic/docx
+
+    # bulk-load persons (with documents and all CV sections) into a fresh SQLite file
+    python -m benchmarks.synthetic load --persons 1000000 --database synthetic/scale.sqlite
+
+The same --seed and person index always produce the same CV in json and docx;
+load draws already-normalised rows of the same shape (no date strings to parse).
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+# entries per section; override with --count SECTION=N
+DEFAULT_COUNTS = {
+    "education": 2,
+    "professional_experience": 4,
+    "languages": 3,
+    "further_education": 1,
+    "certifications": 2,
+    "awards": 1,
+    "publications": 2,
+    "personal_achievements": 1,
+    "private_milestones": 1,
+}
+
+FIRST_NAMES = [
+    "Ada", "Carlos", "Lina", "Maria", "Jonas", "Aiko", "Noah", "Fatima", "Liam", "Sofia", "Mateo", "Chen",
+    "Olga", "Priya", "Kwame", "Elena", "Tomás", "Ingrid", "Yusuf", "Hana", "Luca", "Amara", "Pavel", "Zoe",
+]
+LAST_NAMES = [
+    "Lovelens", "Mendoza", "Aiko", "High", "Berg", "Tanaka", "Okafor", "Schmidt", "Rossi", "Novak", "Silva",
+    "Kowalski", "Haddad", "Nguyen", "Larsen", "Moreau", "Ivanova", "Mensah", "Fischer", "García", "Kim",
+]
+DEGREES = ["BSc", "MSc", "PhD", "BA", "MA", "MBA", "Diploma", "Bachelor of Engineering", "Dr. rer. nat."]
+FIELDS = [
+    "Computer Science", "Physics", "Economics", "Mechanical Engineering", "Biology", "Mathematics",
+    "Business Administration", "Chemistry", "Linguistics", "Agricultural Sciences", None,
+]
+INSTITUTIONS = [
+    "ETH Zurich", "University of Vienna", "TU Munich", "University of Lisbon", "Kyoto University",
+    "University of Cape Town", "McGill University", "University of Edinburgh", "Seoul National University",
+    "Universidad de Buenos Aires", "Moo-versity of Agricultural Sciences",
+]
+TITLES = [
+    "Software Engineer", "Senior Data Scientist", "Project Manager", "Research Assistant", "Team Lead",
+    "Consultant", "Product Owner", "Lab Technician", "Head of Operations", "Intern", "Postdoctoral Researcher",
+]
+COMPANIES = [
+    "Acme Analytics", "Northwind Traders", "Globex", "Initech", "Umbrella Research", "Stark Industries",
+    "Wayne Enterprises", "Green Pastures Cooperative", "Hooli", "Vandelay Industries", "Cyberdyne Systems",
+]
+CITIES = ["Zurich", "Berlin", "Lisbon", "Tokyo", "Toronto", "Nairobi", "Vienna", "Remote", None]
+ROLE_TYPES = ["Full-time", "Part-time", "Contract", "Internship", None]
+LANGUAGES = ["English", "German", "French", "Spanish", "Japanese", "Portuguese", "Swahili", "Korean", "Italian"]
+PROFICIENCIES = ["Native", "Mother tongue", "Fluent", "Professional", "Intermediate", "Basic", "Beginner", None]
+CERTIFICATIONS = [
+    ("AWS Certified Solutions Architect", "Amazon Web Services"), ("PMP", "PMI"), ("CKA", "CNCF"),
+    ("Scrum Master", "Scrum Alliance"), ("CFA Level II", "CFA Institute"), ("TOEFL", "ETS"),
+]
+AWARDS = [
+    ("Best Paper Award", "IEEE"), ("Employee of the Year", None), ("Dean's List", None),
+    ("Golden Nose", "Farmers' Secret Stash Task Force"), ("Innovation Prize", "Chamber of Commerce"),
+]
+JOURNALS = [
+    "Nature", "Physical Review Letters", "Journal of Dairy Science", "ACM Computing Surveys",
+    "The Lancet", "Econometrica", "IEEE Transactions on Software Engineering", "PLOS ONE",
+]
+TOPICS = [
+    "graph neural networks", "grazing patterns", "monetary policy", "protein folding", "distributed consensus",
+    "soil microbiomes", "language acquisition", "battery chemistry", "urban mobility", "sparse transformers",
+]
+MILESTONES = ["Married", "Birth of first child", "Moved abroad", "Ran first marathon", "Sabbatical year"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+          "November", "December"]
+
+
+def messy_date(rng: random.Random, d: date) -> str:
+    """One of the many ways a CV (or the LLM) writes a date."""
+    style = rng.randrange(14)
+    if style == 0:
+        return f"{d.year}"
+    if style == 1:
+        return f"{d.month:02d}/{d.year}"
+    if style == 2:
+        return f"{d.year}-{d.month:02d}"
+    if style == 3:
+        return f"{MONTHS[d.month - 1]} {d.year}"
+    if style == 4:
+        return f"{MONTHS[d.month - 1][:3]}. {d.year}"
+    if style == 5:
+        return d.isoformat()
+    if style == 6:
+        return f"{d.day:02d}.{d.month:02d}.{d.year}"
+    if style == 7:
+        return f"{d.year}/{d.month:02d}"
+    if style == 8:
+        return f"{MONTHS[d.month - 1].lower()} {d.year}"
+    if style == 9:
+        return f"Spring {d.year}" if d.month < 7 else f"Autumn {d.year}"
+    if style == 10:
+        return f"ca. {d.year}"
+    if style == 11:
+        # transposed letters, e.g. "Mrach 2019"
+        m = MONTHS[d.month - 1]
+        return f"{m[0]}{m[2]}{m[1]}{m[3:]} {d.year}"
+    if style == 12:
+        return f" {d.year} "
+    return f"{d.month}/{d.day}/{d.year}"
+
+
+def _random_date(rng: random.Random, start_year: int, end_year: int) -> date:
+    return date(rng.randint(start_year, end_year), rng.randint(1, 12), rng.randint(1, 28))
+
+
+def _period(rng: random.Random, birth_year: int, max_years: int = 8, ongoing: float = 0.1):
+    start = _random_date(rng, birth_year + 18, 2024)
+    if rng.random() < ongoing:
+        return start, None
+    end = start + timedelta(days=rng.randint(30, 365 * max_years))
+    return start, min(end, date(2025, 6, 30))
+
+
+def person_rng(seed: int, index: int) -> random.Random:
+    return random.Random(seed * 1_000_003 + index)
+
+
+def generate_cv(index: int, seed: int = 42, counts: dict | None = None) -> dict:
+    """Parsed-CV JSON for person `index`, in the PROMPT_TEMPLATE schema."""
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    rng = person_rng(seed, index)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    birth_year = rng.randint(1955, 2000)
+    handle = f"{first}.{last}".lower().replace(" ", "")
+
+    def dates(start, end):
+        return messy_date(rng, start), (messy_date(rng, end) if end else rng.choice(["present", "Present", "now", ""]))
+
+    cv = {
+        "full_name": f"{first} {last}",
+        "email": f"{handle}.{index}@example.com",
+        "phone": f"+41 7{rng.randint(5, 9)} {rng.randint(100, 999)} {rng.randint(10, 99)} {rng.randint(10, 99)}"
+        if rng.random() < 0.7 else None,
+        "linkedin": f"/in/{handle}-{index}" if rng.random() < 0.6 else None,
+        "github": f"github.com/{handle}{index}" if rng.random() < 0.3 else None,
+        "website": None,
+        "short_bio": (
+            f"{first} {last} is a {rng.choice(TITLES).lower()} with a background in "
+            f"{rng.choice([f for f in FIELDS if f]).lower()}. Interested in {rng.choice(TOPICS)}."
+        ),
+    }
+
+    rows = []
+    for _ in range(counts["education"]):
+        start, end = _period(rng, birth_year, 5, ongoing=0.05)
+        s, e = dates(start, end)
+        rows.append({"degree": rng.choice(DEGREES), "field": rng.choice(FIELDS), "start_date": s, "end_date": e,
+                     "institution": rng.choice(INSTITUTIONS)})
+    cv["education"] = rows
+
+    rows = []
+    for _ in range(counts["professional_experience"]):
+        start, end = _period(rng, birth_year, 10)
+        s, e = dates(start, end)
+        rows.append({
+            "title": rng.choice(TITLES), "company": rng.choice(COMPANIES), "start_date": s, "end_date": e,
+            "location": rng.choice(CITIES), "role_type": rng.choice(ROLE_TYPES),
+            "role_description": f"Worked on {rng.choice(TOPICS)} and {rng.choice(TOPICS)}; "
+                                f"led a team of {rng.randint(2, 15)}.",
+        })
+    cv["professional_experience"] = rows
+
+    cv["languages"] = [
+        {"language": lang, "proficiency_written": rng.choice(PROFICIENCIES),
+         "proficiency_spoken": rng.choice(PROFICIENCIES)}
+        for lang in rng.sample(LANGUAGES, min(counts["languages"], len(LANGUAGES)))
+    ]
+
+    rows = []
+    for _ in range(counts["further_education"]):
+        start, end = _period(rng, birth_year, 1, ongoing=0.0)
+        s, e = dates(start, end)
+        rows.append({"title": f"Course on {rng.choice(TOPICS)}", "start_date": s, "end_date": e,
+                     "institution": rng.choice(INSTITUTIONS)})
+    cv["further_education"] = rows
+
+    rows = []
+    for _ in range(counts["certifications"]):
+        name, issuer = rng.choice(CERTIFICATIONS)
+        start, end = _period(rng, birth_year, 3, ongoing=0.5)
+        s, e = dates(start, end)
+        rows.append({"name": name, "issuer": issuer, "start_date": s, "end_date": e})
+    cv["certifications"] = rows
+
+    rows = []
+    for _ in range(counts["awards"]):
+        name, awarded_by = rng.choice(AWARDS)
+        d = _random_date(rng, birth_year + 18, 2025)
+        rows.append({"name": name, "awarded_by": awarded_by or rng.choice(COMPANIES),
+                     "start_date": messy_date(rng, d), "end_date": None})
+    cv["awards"] = rows
+
+    rows = []
+    for i in range(counts["publications"]):
+        d = _random_date(rng, birth_year + 22, 2025)
+        coauthors = ", ".join(f"{rng.choice(FIRST_NAMES)[0]}. {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(0, 5)))
+        rows.append({
+            "start_date": messy_date(rng, d), "end_date": None,
+            "title": f"On {rng.choice(TOPICS)} in {rng.choice(TOPICS)} ({i + 1})",
+            "journal": rng.choice(JOURNALS),
+            "authors": f"{first[0]}. {last}" + (f", {coauthors}" if coauthors else ""),
+        })
+    cv["publications"] = rows
+
+    rows = []
+    for _ in range(counts["personal_achievements"]):
+        d = _random_date(rng, birth_year + 10, 2025)
+        rows.append({"start_date": messy_date(rng, d), "end_date": None,
+                     "achievement": f"Volunteer mentor for {rng.choice(TOPICS)}",
+                     "description": f"Mentored {rng.randint(3, 40)} students."})
+    cv["personal_achievements"] = rows
+
+    rows = []
+    for _ in range(counts["private_milestones"]):
+        d = _random_date(rng, birth_year + 5, 2025)
+        rows.append({"start_date": messy_date(rng, d), "end_date": None,
+                     "event": rng.choice(MILESTONES), "description": ""})
+    cv["private_milestones"] = rows
+    return cv
+
+
+def write_docx(cv: dict, path: str):
+    """Render a generated CV as a plain .docx, roughly how people write them."""
+    from docx import Document as DocxDocument
+
+    doc = DocxDocument()
+    doc.add_heading(cv["full_name"], level=0)
+    contact = " | ".join(filter(None, [cv.get("email"), cv.get("phone"), cv.get("linkedin"), cv.get("github")]))
+    doc.add_paragraph(contact)
+    doc.add_paragraph(cv["short_bio"])
+
+    def section(title, rows, fmt):
+        if rows:
+            doc.add_heading(title, level=1)
+            for row in rows:
+                doc.add_paragraph(fmt(row), style="List Bullet")
+
+    def span(row):
+        return f"{row.get('start_date') or ''} – {row.get('end_date') or ''}".strip(" –")
+
+    section("Professional Experience", cv["professional_experience"], lambda r: (
+        f"{span(r)}: {r['title']}, {r['company']}" + (f" ({r['location']})" if r.get("location") else "")
+        + (f". {r['role_description']}" if r.get("role_description") else "")
+    ))
+    section("Education", cv["education"], lambda r: (
+        f"{span(r)}: {r['degree']}" + (f" in {r['field']}" if r.get("field") else "") + f", {r['institution']}"
+    ))
+    section("Further Education", cv["further_education"], lambda r: f"{span(r)}: {r['title']}, {r['institution']}")
+    section("Certifications", cv["certifications"], lambda r: f"{r['name']} ({r['issuer']}), {span(r)}")
+    section("Awards", cv["awards"], lambda r: f"{r['start_date']}: {r['name']}, {r['awarded_by']}")
+    section("Publications", cv["publications"], lambda r: (
+        f"{r['authors']} ({r['start_date']}). {r['title']}. {r['journal']}."
+    ))
+    section("Languages", cv["languages"], lambda r: (
+        f"{r['language']}: {r.get('proficiency_spoken') or 'n/a'} (spoken), "
+        f"{r.get('proficiency_written') or 'n/a'} (written)"
+    ))
+    section("Achievements", cv["personal_achievements"], lambda r: (
+        f"{r['start_date']}: {r['achievement']}. {r['description']}"
+    ))
+    section("Personal", cv["private_milestones"], lambda r: f"{r['start_date']}: {r['event']}")
+    doc.save(path)
+
+
+# --- bulk load -----------------------------------------------------------------------------------
+
+PRECISIONS = ("year", "month", "day")
+
+
+def _structured_period(rng: random.Random, birth_year: int, max_years: int, ongoing: float):
+    """(start, start_precision, end, end_precision) without going through date parsing."""
+    start, end = _period(rng, birth_year, max_years, ongoing)
+    return start, rng.choice(PRECISIONS), end, (rng.choice(PRECISIONS) if end else None)
+
+
+def bulk_rows(index: int, seed: int, counts: dict, person_id: int, document_id: int, row_ids: dict):
+    """
+    Table rows for one person, already normalised (dates as date + precision),
+    so loading millions of persons never goes through dateutil.
+    """
+    rng = person_rng(seed, index)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    birth_year = rng.randint(1955, 2000)
+    email = f"{first}.{last}".lower() + f".{index}@example.com"
+    upload_time = datetime(2024, 1, 1) + timedelta(seconds=index * 7)
+    out = {
+        "documents": [(document_id, f"cv_{index}.docx", f"static/uploads/cv_{index}.docx", str(person_id),
+                       upload_time, "complete")],
+        "persons": [(person_id, f"{first} {last}", email, None, f"/in/{first}-{last}-{index}".lower(), None, None,
+                     f"{first} {last}, {rng.choice(TITLES).lower()}.", document_id, str(person_id))],
+    }
+
+    def next_id(table):
+        row_ids[table] += 1
+        return row_ids[table]
+
+    out["educations"] = [
+        (next_id("educations"), person_id, rng.choice(INSTITUTIONS), rng.choice(DEGREES), rng.choice(FIELDS),
+         *_structured_period(rng, birth_year, 5, 0.05))
+        for _ in range(counts["education"])
+    ]
+    out["experiences"] = [
+        (next_id("experiences"), person_id, rng.choice(TITLES), rng.choice(COMPANIES), rng.choice(CITIES),
+         *_structured_period(rng, birth_year, 10, 0.1), rng.choice(ROLE_TYPES), f"Worked on {rng.choice(TOPICS)}.")
+        for _ in range(counts["professional_experience"])
+    ]
+    out["languages"] = [
+        (next_id("languages"), person_id, lang, rng.choice(PROFICIENCIES), rng.choice(PROFICIENCIES))
+        for lang in rng.sample(LANGUAGES, min(counts["languages"], len(LANGUAGES)))
+    ]
+    out["further_educations"] = [
+        (next_id("further_educations"), person_id, f"Course on {rng.choice(TOPICS)}",
+         *_structured_period(rng, birth_year, 1, 0.0), rng.choice(INSTITUTIONS))
+        for _ in range(counts["further_education"])
+    ]
+    out["certifications"] = [
+        (next_id("certifications"), person_id, *rng.choice(CERTIFICATIONS), *_structured_period(rng, birth_year, 3, 0.5))
+        for _ in range(counts["certifications"])
+    ]
+    out["awards"] = [
+        (next_id("awards"), person_id, name, awarded_by or rng.choice(COMPANIES),
+         _random_date(rng, birth_year + 18, 2025), "year", None, None)
+        for name, awarded_by in (rng.choice(AWARDS) for _ in range(counts["awards"]))
+    ]
+    out["publications"] = [
+        (next_id("publications"), person_id, f"On {rng.choice(TOPICS)} ({i + 1})", rng.choice(JOURNALS),
+         f"{first[0]}. {last}", _random_date(rng, birth_year + 22, 2025), rng.choice(PRECISIONS))
+        for i in range(counts["publications"])
+    ]
+    out["personal_achievements"] = [
+        (next_id("personal_achievements"), person_id, f"Volunteer mentor for {rng.choice(TOPICS)}", "",
+         _random_date(rng, birth_year + 10, 2025), "year", None, None)
+        for _ in range(counts["personal_achievements"])
+    ]
+    out["private_milestones"] = [
+        (next_id("private_milestones"), person_id, rng.choice(MILESTONES), "",
+         _random_date(rng, birth_year + 5, 2025), "year", None, None)
+        for _ in range(counts["private_milestones"])
+    ]
+    return out
+
+
+# column order of the tuples produced by bulk_rows()
+BULK_COLUMNS = {
+    "documents": ("id", "title", "source_filename", "uploaded_by", "upload_time", "status"),
+    "persons": ("id", "full_name", "email", "phone", "linkedin", "github", "website", "short_bio", "document_id",
+                "created_by"),
+    "educations": ("id", "person_id", "institution", "degree", "field_of_study", "start_date",
+                   "start_date_precision", "end_date", "end_date_precision"),
+    "experiences": ("id", "person_id", "title", "company", "location", "start_date", "start_date_precision",
+                    "end_date", "end_date_precision", "role_type", "role_description"),
+    "languages": ("id", "person_id", "language", "proficiency_written", "proficiency_spoken"),
+    "further_educations": ("id", "person_id", "title", "start_date", "start_date_precision", "end_date",
+                          "end_date_precision", "institution"),
+    "certifications": ("id", "person_id", "name", "issuer", "start_date", "start_date_precision", "end_date",
+                       "end_date_precision"),
+    "awards": ("id", "person_id", "name", "awarded_by", "start_date", "start_date_precision", "end_date",
+               "end_date_precision"),
+    "publications": ("id", "person_id", "title", "journal", "authors", "publication_date",
+                     "publication_date_precision"),
+    "personal_achievements": ("id", "person_id", "achievement", "description", "start_date",
+                              "start_date_precision", "end_date", "end_date_precision"),
+    "private_milestones": ("id", "person_id", "event", "description", "start_date", "start_date_precision",
+                           "end_date", "end_date_precision"),
+}
+
+
+def bulk_load(db_path: str, persons: int, seed: int = 42, counts: dict | None = None,
+              batch_size: int = 5000) -> dict:
+    """
+    Create the schema in a fresh SQLite file and insert `persons` persons
+    (each with one document and all CV sections). Returns rows per table.
+
+    Speed comes from raw executemany in large transactions with journaling
+    and fsync off; fine for a throwaway database, never for a real one.
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} exists; bulk load only targets a fresh database")
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    from sqlalchemy import create_engine
+    from app.models import Base
+    Base.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    sqlite3.register_adapter(date, date.isoformat)
+    sqlite3.register_adapter(datetime, lambda dt: dt.isoformat(sep=" "))
+
+    statements = {
+        table: f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        for table, cols in BULK_COLUMNS.items()
+    }
+    totals = {table: 0 for table in BULK_COLUMNS}
+    row_ids = {table: 0 for table in BULK_COLUMNS}
+    t0 = time.perf_counter()
+    try:
+        for batch_start in range(0, persons, batch_size):
+            batch = {table: [] for table in BULK_COLUMNS}
+            for index in range(batch_start, min(persons, batch_start + batch_size)):
+                for table, rows in bulk_rows(index, seed, counts, index + 1, index + 1, row_ids).items():
+                    batch[table].extend(rows)
+            with conn:
+                for table, rows in batch.items():
+                    conn.executemany(statements[table], rows)
+                    totals[table] += len(rows)
+            done = min(persons, batch_start + batch_size)
+            print(f"\r{done:>10,} / {persons:,} persons  {done / (time.perf_counter() - t0):,.0f}/s", end="", flush=True)
+        print()
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return totals
+
+
+def parse_counts(values: list[str]) -> dict:
+    counts = {}
+    for item in values or []:
+        key, _, n = item.partition("=")
+        if key not in DEFAULT_COUNTS or not n.isdigit():
+            raise SystemExit(f"--count expects SECTION=N with SECTION in {', '.join(DEFAULT_COUNTS)}")
+        counts[key] = int(n)
+    return counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("mode", choices=["json", "docx", "load"])
+    ap.add_argument("--persons", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--start", type=int, default=0, help="first person index (to extend an earlier run)")
+    ap.add_argument("--count", action="append", metavar="SECTION=N", help="entries per section, repeatable")
+    ap.add_argument("--out", default="synthetic", help="output directory for json/docx")
+    ap.add_argument("--database", default="synthetic/scale.sqlite", help="fresh SQLite file for load")
+    ap.add_argument("--batch-size", type=int, default=5000, help="persons per transaction for load")
+    args = ap.parse_args()
+    counts = parse_counts(args.count)
+
+    t0 = time.perf_counter()
+    if args.mode == "load":
+        totals = bulk_load(args.database, args.persons, args.seed, counts, args.batch_size)
+        elapsed = time.perf_counter() - t0
+        print(f"Loaded {sum(totals.values()):,} rows in {elapsed:.1f}s into {args.database}")
+        for table, n in totals.items():
+            print(f"  {table:<24} {n:>12,}")
+        return
+
+    os.makedirs(args.out, exist_ok=True)
+    for index in range(args.start, args.start + args.persons):
+        cv = generate_cv(index, args.seed, counts)
+        if args.mode == "json":
+            with open(os.path.join(args.out, f"cv_{index:07d}.json"), "w", encoding="utf-8") as f:
+                json.dump(cv, f, ensure_ascii=False, indent=2)
+        else:
+            write_docx(cv, os.path.join(args.out, f"cv_{index:07d}.docx"))
+    print(f"Wrote {args.persons} {args.mode} CVs to {args.out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,26 @@
 # db/session.py
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./db/database.sqlite"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./db/database.sqlite")
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+
+def add_missing_columns(table) -> list[str]:
+    """
+    ALTER TABLE ... ADD COLUMN for the columns of `table` an older database
+    lacks (they must be nullable). Returns the names of the columns added.
+    """
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    added = []
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name not in existing:
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                ))
+                added.append(column.name)
+    return added